@@ -0,0 +1,91 @@
+"""
+Posts per second through POST /api/posts/ one at a time versus
+POST /api/posts/bulk/ with a JSON array and an NDJSON stream, with and
+without the incremental related-posts update, on top of an existing
+archive. Each run creates ``--posts`` new posts.
+
+Usage: python -m benchmarks.bench_bulk_create [--posts 2000] [--archive 5000]
+"""
+import argparse
+import json
+import time
+
+from benchmarks.common import api_client, get_author, report, seed_posts, setup_django
+
+
+def payload(run, n):
+    return {
+        'title': f'Imported post {run}-{n}',
+        'excerpt': f'Excerpt of imported post {n}',
+        'content': '<p>' + 'lorem ipsum dolor sit amet ' * 100 + '</p>',
+        'tags': [f'tag{n % 50}', f'tag{n % 7}'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--posts', type=int, default=2000)
+    parser.add_argument('--archive', type=int, default=5000, help='Posts already in the database')
+    parser.add_argument('--single', type=int, default=300,
+                        help='Posts created one request at a time (the slow path, so fewer)')
+    args = parser.parse_args()
+
+    setup_django()
+    seed_posts(args.archive, index_tags=True, index_search=True)
+
+    from django.db import connection
+
+    client = api_client()
+    client.force_login(get_author())
+
+    def single(run, count):
+        for n in range(count):
+            response = client.post('/api/posts/', payload(run, n), content_type='application/json', secure=True)
+            assert response.status_code == 201, response.content
+        return count
+
+    def bulk_json(query):
+        def send(run, count):
+            body = [payload(run, n) for n in range(count)]
+            response = client.post(f'/api/posts/bulk/{query}', body, content_type='application/json', secure=True)
+            assert response.status_code == 201, response.content
+            return response.json()['created']
+        return send
+
+    def bulk_ndjson(query):
+        def send(run, count):
+            body = ''.join(json.dumps(payload(run, n)) + '\n' for n in range(count))
+            response = client.post(f'/api/posts/bulk/{query}', body, content_type='application/x-ndjson',
+                                   secure=True)
+            assert response.status_code == 201, response.content
+            return response.json()['created']
+        return send
+
+    runs = [
+        ('single POST /api/posts/', single, args.single),
+        ('bulk, JSON array', bulk_json(''), args.posts),
+        ('bulk, JSON array, ?related=false', bulk_json('?related=false'), args.posts),
+        ('bulk, NDJSON, ?related=false', bulk_ndjson('?related=false'), args.posts),
+    ]
+    queries = 0
+
+    def count_query(execute, sql, params, many, context):
+        nonlocal queries
+        queries += 1
+        return execute(sql, params, many, context)
+
+    rows = []
+    for run, (name, send, count) in enumerate(runs):
+        queries = 0
+        with connection.execute_wrapper(count_query):
+            started = time.perf_counter()
+            created = send(run, count)
+            elapsed = time.perf_counter() - started
+        rows.append((name, created, f'{created / elapsed:.0f}', f'{queries / created:.2f}'))
+
+    print(f'{args.archive} posts in the archive beforehand\n')
+    report(rows, ['path', 'posts', 'posts/s', 'queries/post'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+CPU cost against bytes saved for each content coding and level on real
+API payloads (post list pages, a long post, related posts, an export
+chunk), to pick ``COMPRESSION_LEVELS``; then the end-to-end cost of
+CompressionMiddleware on a list page, with and without its ETag-keyed
+cache of compressed bodies.
+
+brotli and zstd rows appear when the ``brotli`` / ``zstandard`` packages
+are installed.
+
+Usage: python -m benchmarks.bench_compression [--posts 2000] [--iterations 200]
+"""
+import argparse
+
+from benchmarks.common import api_client, measure, report, seed_posts, setup_django
+
+LEVELS = {
+    'gzip': [1, 4, 6, 9],
+    'br': [1, 4, 5, 6, 9, 11],
+    'zstd': [1, 3, 6, 9, 19],
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--posts', type=int, default=2000)
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    setup_django()
+    seed_posts(args.posts, index_tags=True, cover_every=3,
+               content=lambda i: '<p>' + f'Paragraph {i} of a reasonably long post body. ' * (40 + i % 200) + '</p>')
+
+    from django.test import override_settings
+    from blogapp import compression
+    from blogapp.export import PostExport
+    from blogapp.models import Post
+    from blogapp.related import rebuild_all
+
+    rebuild_all()
+    slug = Post.objects.order_by('-published_at').values_list('slug', flat=True).first()
+    client = api_client()
+
+    def body(path):
+        with override_settings(POSTS_CACHE_TIMEOUT=0):
+            response = client.get(path, secure=True)
+        assert response.status_code == 200, response.content[:200]
+        return response.content
+
+    payloads = [
+        ('list, 20 posts', body('/api/posts/')),
+        ('list, 100 posts', body('/api/posts/?page_size=100')),
+        ('detail', body(f'/api/posts/{slug}/')),
+        ('related', body(f'/api/posts/{slug}/related/')),
+        ('export chunk', next(PostExport(origin='https://localhost').chunks())),
+    ]
+
+    rows = []
+    for name, data in payloads:
+        rows.append((name, 'identity', '-', f'{len(data):,}', '1.00', '-', '-'))
+        for coding in compression.available_encodings():
+            for level in LEVELS[coding]:
+                p50, _, encoded = measure(lambda: compression.encode(data, coding, level), args.iterations)
+                rows.append((name, coding, level, f'{len(encoded):,}', f'{len(data) / len(encoded):.2f}',
+                             f'{p50 * 1000:.0f}', f'{len(data) / p50 / 1000:.0f}'))
+    report(rows, ['payload', 'coding', 'level', 'bytes', 'ratio', 'p50 us', 'MB/s'])
+
+    path = '/api/posts/?page_size=100'
+    variants = [
+        ('no Accept-Encoding', '', {}),
+        ('gzip', 'gzip', {'COMPRESSION_CACHE_TIMEOUT': 0}),
+        ('gzip, compressed-body cache', 'gzip', {}),
+    ]
+    if 'br' in compression.available_encodings():
+        variants.append(('br', 'br', {'COMPRESSION_CACHE_TIMEOUT': 0}))
+    e2e = []
+    for name, accept_encoding, overrides in variants:
+        # Response cache on, so the view's cost is the same in every row
+        with override_settings(POSTS_CACHE_TIMEOUT=300, **overrides):
+            p50, p95, response = measure(
+                lambda: client.get(path, secure=True, HTTP_ACCEPT_ENCODING=accept_encoding), args.iterations)
+        e2e.append((name, f'{p50 * 1000:.0f}', f'{p95 * 1000:.0f}', f'{len(response.content):,}'))
+    print()
+    report(e2e, [f'GET {path}', 'p50 us', 'p95 us', 'bytes'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+"""
+Throughput and latency under many concurrent keep-alive clients, for the
+two ways of deploying the API: gunicorn sync workers on the WSGI app, and
+gunicorn with uvicorn workers on the ASGI app with the async post views
+(``DJANGO_ASYNC_POST_VIEWS=true``).
+
+Each server runs against the same seeded scratch database; ``--clients``
+connections each send post list/detail/related requests back to back for
+``--duration`` seconds. The run is repeated with ``--slow-clients`` extra
+connections that trickle their request headers in, one byte every
+``--trickle`` seconds, like clients on a poor mobile link: a sync worker is
+held by such a client until its request is complete. The response cache is
+off unless ``--with-cache``.
+
+Usage: python -m benchmarks.bench_concurrency [--clients 500] [--workers 2] [--slow-clients 8]
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from benchmarks.common import percentile, report, seed_posts, setup_django
+
+# Command line settings only: keep gunicorn.conf.py out of this comparison
+SERVERS = {
+    'wsgi (sync workers)': (['--config', os.devnull, 'blogapp_api.wsgi:application'], {}),
+    'asgi (uvicorn workers)': (['--config', os.devnull, 'blogapp_api.asgi:application',
+                                '-k', 'uvicorn_worker.UvicornWorker'],
+                               {'DJANGO_ASYNC_POST_VIEWS': 'true'}),
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(gunicorn_args, env, port, with_cache):
+    """Start gunicorn on ``port`` and wait until it accepts connections."""
+    env = {
+        **os.environ, **env,
+        'POSTS_CACHE_TIMEOUT': '300' if with_cache else '0',
+        'METRICS_SAMPLE_RATE': '0',
+    }
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', *gunicorn_args,
+         '--bind', f'127.0.0.1:{port}', '--backlog', '2048', '--log-level', 'warning'],
+        env=env,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return process
+        except OSError:
+            if process.poll() is not None:
+                raise RuntimeError('gunicorn exited during startup')
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError('gunicorn did not start listening in time')
+
+
+async def read_response(reader):
+    """Status code, body length and whether the server keeps the connection open."""
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split()[1])
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers.get('content-length', 0)))
+    return status, len(body), headers.get('connection', '').lower() != 'close'
+
+
+async def client(port, paths, offset, stop_at, samples, statuses):
+    reader = writer = None
+    n = offset
+    while time.monotonic() < stop_at:
+        path = paths[n % len(paths)]
+        n += 1
+        request = (f'GET {path} HTTP/1.1\r\nHost: localhost\r\nX-Forwarded-Proto: https\r\n'
+                   f'Accept: application/json\r\nConnection: keep-alive\r\n\r\n').encode()
+        started = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(request)
+            status, _, keep_alive = await read_response(reader)
+        except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            statuses['error'] = statuses.get('error', 0) + 1
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+            continue
+        samples.append((time.perf_counter() - started) * 1000)
+        statuses[status] = statuses.get(status, 0) + 1
+        if not keep_alive:
+            writer.close()
+            reader = writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def slow_client(port, path, stop_at, trickle):
+    request = (f'GET {path} HTTP/1.1\r\nHost: localhost\r\nX-Forwarded-Proto: https\r\n'
+               f'Accept: application/json\r\nConnection: close\r\n\r\n').encode()
+    while time.monotonic() < stop_at:
+        writer = None
+        try:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            for n in range(len(request)):
+                if time.monotonic() >= stop_at:
+                    break
+                writer.write(request[n:n + 1])
+                await asyncio.sleep(trickle)
+            else:
+                await read_response(reader)
+        except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            await asyncio.sleep(trickle)
+        finally:
+            if writer is not None:
+                writer.close()
+
+
+async def load(port, paths, clients, duration, slow_clients=0, trickle=0.5):
+    samples, statuses = [], {}
+    started = time.monotonic()
+    stop_at = started + duration
+    await asyncio.gather(
+        *[client(port, paths, n, stop_at, samples, statuses) for n in range(clients)],
+        *[slow_client(port, paths[0], stop_at, trickle) for _ in range(slow_clients)],
+    )
+    return samples, statuses, time.monotonic() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--posts', type=int, default=2000)
+    parser.add_argument('--clients', type=int, default=500)
+    parser.add_argument('--duration', type=float, default=15)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--slow-clients', type=int, default=8)
+    parser.add_argument('--trickle', type=float, default=0.5)
+    parser.add_argument('--with-cache', action='store_true')
+    args = parser.parse_args()
+
+    setup_django()
+    seed_posts(args.posts, index_tags=True)
+
+    from blogapp.models import Post
+    from blogapp.related import recompute_related
+
+    slugs = list(Post.objects.order_by('-published_at').values_list('slug', flat=True)[:20])
+    for post_id in Post.objects.filter(slug__in=slugs).values_list('id', flat=True):
+        recompute_related(post_id)
+    paths = ['/api/posts/', '/api/posts/?tag=tag3']
+    paths += [f'/api/posts/{slug}/' for slug in slugs] + [f'/api/posts/{slug}/related/' for slug in slugs[:5]]
+
+    rows = []
+    for name, (gunicorn_args, env) in SERVERS.items():
+        port = free_port()
+        server = start_server([*gunicorn_args, '--workers', str(args.workers)], env, port, args.with_cache)
+        try:
+            asyncio.run(load(port, paths, min(args.clients, 20), 2))  # warm up
+            for slow_clients in sorted({0, args.slow_clients}):
+                samples, statuses, elapsed = asyncio.run(
+                    load(port, paths, args.clients, args.duration, slow_clients, args.trickle))
+                ok = statuses.get(200, 0)
+                others = ', '.join(f'{key}: {count}' for key, count in statuses.items() if key != 200) or '-'
+                rows.append((
+                    name, slow_clients, f'{ok / elapsed:.0f}',
+                    *(f'{percentile(samples, pct):.1f}' if samples else '-' for pct in (50, 95, 99)),
+                    others,
+                ))
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(f'{args.clients} concurrent clients, {args.workers} workers, {args.duration:.0f}s per run\n')
+    report(rows, ['server', 'slow clients', 'req/s', 'p50 ms', 'p95 ms', 'p99 ms', 'non-200'])
+
+
+if __name__ == '__main__':
+    main()
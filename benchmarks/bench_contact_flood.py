@@ -0,0 +1,139 @@
+"""
+Worker capacity under a contact form flood, with and without the contact
+throttles (blogapp.throttling).
+
+gunicorn runs ``--workers`` sync workers. ``--readers`` keep-alive clients
+read posts back to back and ``--visitors`` clients submit the contact form
+once a second each, every time as a new person (address and email), while ``--spammers`` clients
+post it as fast as they can from a single address and email. Readers'
+throughput and latency show how much capacity the flood leaves for
+everyone else; the first run has no flood, for reference.
+
+Usage: python -m benchmarks.bench_contact_flood [--spammers 50] [--duration 15]
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from benchmarks.bench_concurrency import client, free_port, read_response, start_server
+from benchmarks.common import percentile, report, seed_posts, setup_django
+
+UNLIMITED = {'CONTACT_THROTTLE_IP': 'none', 'CONTACT_THROTTLE_EMAIL': 'none'}
+
+SCENARIOS = [
+    # name, spam, server environment
+    ('no flood', False, {}),
+    ('flood, no throttles', True, UNLIMITED),
+    ('flood, memory throttles', True, {'DJANGO_THROTTLE_BACKEND': 'memory'}),
+    # The default cache is per process, like the memory backend; point
+    # DJANGO_CACHE_BACKEND at a shared cache to measure the shared case
+    ('flood, cache throttles', True, {'DJANGO_THROTTLE_BACKEND': 'cache'}),
+]
+
+
+def contact_request(ip, email, n):
+    body = json.dumps({'name': 'Load test', 'email': email, 'subject': 'Hello',
+                       'message': f'Message {n} from {ip}'}).encode()
+    head = (f'POST /api/contact/ HTTP/1.1\r\nHost: localhost\r\nX-Forwarded-Proto: https\r\n'
+            f'X-Forwarded-For: {ip}\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\n'
+            f'Connection: keep-alive\r\n\r\n').encode()
+    return head + body
+
+
+async def poster(port, sender, stop_at, interval, samples, statuses):
+    """Post the contact form repeatedly; ``sender(n)`` gives the nth request's address and email."""
+    reader = writer = None
+    n = 0
+    while time.monotonic() < stop_at:
+        n += 1
+        started = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(contact_request(*sender(n), n))
+            status, _, keep_alive = await read_response(reader)
+        except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            statuses['error'] = statuses.get('error', 0) + 1
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+            continue
+        samples.append((time.perf_counter() - started) * 1000)
+        statuses[status] = statuses.get(status, 0) + 1
+        if not keep_alive:
+            writer.close()
+            reader = writer = None
+        if interval:
+            await asyncio.sleep(max(0, interval - (time.perf_counter() - started)))
+    if writer is not None:
+        writer.close()
+
+
+async def flood(port, paths, args, spam):
+    readers = ([], {})
+    visitors = ([], {})
+    spammers = ([], {})
+    started = time.monotonic()
+    stop_at = started + args.duration
+    await asyncio.gather(
+        *[client(port, paths, n, stop_at, *readers) for n in range(args.readers)],
+        *[poster(port, lambda k, n=n: (f'198.51.{n}.{k % 250}', f'visitor{n}-{k}@example.com'),
+                 stop_at, 1.0, *visitors)
+          for n in range(args.visitors)],
+        *[poster(port, lambda k: ('203.0.113.66', 'spam@example.com'), stop_at, 0, *spammers)
+          for _ in range(args.spammers if spam else 0)],
+    )
+    return readers, visitors, spammers, time.monotonic() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--posts', type=int, default=2000)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--readers', type=int, default=20)
+    parser.add_argument('--visitors', type=int, default=10)
+    parser.add_argument('--spammers', type=int, default=50)
+    parser.add_argument('--duration', type=float, default=15)
+    args = parser.parse_args()
+
+    setup_django()
+    seed_posts(args.posts, index_tags=True)
+
+    from blogapp.models import Post
+
+    slugs = list(Post.objects.order_by('-published_at').values_list('slug', flat=True)[:20])
+    paths = ['/api/posts/'] + [f'/api/posts/{slug}/' for slug in slugs]
+
+    rows = []
+    for name, spam, env in SCENARIOS:
+        port = free_port()
+        server = start_server(['--config', os.devnull, 'blogapp_api.wsgi:application',
+                               '--workers', str(args.workers)], env, port, with_cache=False)
+        try:
+            (read_samples, read_statuses), (visit_samples, visit_statuses), (_, spam_statuses), elapsed = \
+                asyncio.run(flood(port, paths, args, spam))
+        finally:
+            server.terminate()
+            server.wait()
+        rows.append((
+            name,
+            f"{read_statuses.get(200, 0) / elapsed:.0f}",
+            f'{percentile(read_samples, 50):.1f}' if read_samples else '-',
+            f'{percentile(read_samples, 99):.1f}' if read_samples else '-',
+            f"{visit_statuses.get(201, 0)}/{sum(visit_statuses.values())}",
+            f'{percentile(visit_samples, 99):.1f}' if visit_samples else '-',
+            spam_statuses.get(201, 0),
+            spam_statuses.get(429, 0),
+            sum(count for key, count in spam_statuses.items() if key not in (201, 429)),
+        ))
+
+    print(f'{args.workers} sync workers, {args.readers} readers, {args.visitors} visitors, '
+          f'{args.spammers} spammers, {args.duration:.0f}s per run\n')
+    report(rows, ['scenario', 'reads/s', 'read p50 ms', 'read p99 ms', 'visitors ok',
+                  'visit p99 ms', 'spam accepted', 'spam 429', 'spam other'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""
+What database connection handling (blogapp_api.database) does to
+throughput: a new connection per request against persistent,
+health-checked connections, and on SQLite the rollback journal against
+WAL, while readers and writers share the database.
+
+gunicorn runs ``--workers`` gthread workers of ``--threads`` threads.
+``--readers`` keep-alive clients read posts back to back while
+``--writers`` clients post the contact form back to back (throttles off),
+so every run mixes reads with a steady stream of write transactions.
+"errors" counts failed requests (500s, mostly "database is locked" on
+SQLite) and dropped connections.
+
+On SQLite the scratch database is a local file, so a new connection costs
+little beyond its setup pragmas. Point ``BENCH_DATABASE_URL`` at a
+PostgreSQL database to measure what reconnecting costs there (TCP, auth,
+backend start-up), along with psycopg's connection pool when
+``psycopg_pool`` is installed.
+
+Usage: python -m benchmarks.bench_db_connections [--workers 2] [--threads 4] [--duration 10]
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import time
+
+from benchmarks.bench_concurrency import client, free_port, start_server
+from benchmarks.bench_contact_flood import UNLIMITED, poster
+from benchmarks.common import percentile, report, seed_posts, setup_django
+
+SQLITE_SCENARIOS = [
+    # name, server environment
+    ('rollback journal, connection per request', {'DJANGO_SQLITE_JOURNAL_MODE': 'DELETE',
+                                                  'DJANGO_DB_CONN_MAX_AGE': '0'}),
+    ('rollback journal, persistent', {'DJANGO_SQLITE_JOURNAL_MODE': 'DELETE'}),
+    ('WAL, connection per request', {'DJANGO_DB_CONN_MAX_AGE': '0'}),
+    ('WAL, persistent', {}),
+]
+
+POSTGRESQL_SCENARIOS = [
+    ('connection per request', {'DJANGO_DB_POOL': 'false', 'DJANGO_DB_CONN_MAX_AGE': '0'}),
+    ('persistent', {'DJANGO_DB_POOL': 'false'}),
+    ('pool', {}),
+]
+
+
+async def mixed_load(port, paths, args):
+    readers = ([], {})
+    writers = ([], {})
+    started = time.monotonic()
+    stop_at = started + args.duration
+    await asyncio.gather(
+        *[client(port, paths, n, stop_at, *readers) for n in range(args.readers)],
+        *[poster(port, lambda k, n=n: (f'198.51.{n}.{k % 250}', f'writer{n}-{k}@example.com'),
+                 stop_at, 0, *writers)
+          for n in range(args.writers)],
+    )
+    return readers, writers, time.monotonic() - started
+
+
+def errors(statuses, ok):
+    return sum(count for key, count in statuses.items() if key != ok)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--posts', type=int, default=2000)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=20)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=10)
+    args = parser.parse_args()
+
+    setup_django()
+    seed_posts(args.posts, index_tags=True)
+
+    from django.db import connection
+    from blogapp.models import Post
+    from blogapp_api.database import pool_available
+
+    slugs = list(Post.objects.order_by('-published_at').values_list('slug', flat=True)[:20])
+    paths = ['/api/posts/'] + [f'/api/posts/{slug}/' for slug in slugs]
+    if connection.vendor == 'sqlite':
+        scenarios = SQLITE_SCENARIOS
+    else:
+        scenarios = POSTGRESQL_SCENARIOS if pool_available() else POSTGRESQL_SCENARIOS[:2]
+    connection.close()
+
+    rows = []
+    for name, env in scenarios:
+        env = {**UNLIMITED, **env,
+               'DJANGO_WORKER_PROCESSES': str(args.workers), 'DJANGO_WORKER_THREADS': str(args.threads)}
+        if connection.vendor == 'sqlite':
+            # The journal mode is a property of the file and only leaves
+            # WAL while nothing else has it open: switch it before the
+            # workers connect, so their own pragma finds it set
+            with sqlite3.connect(connection.settings_dict['NAME']) as db:
+                db.execute(f"PRAGMA journal_mode={env.get('DJANGO_SQLITE_JOURNAL_MODE', 'WAL')}")
+            db.close()
+        port = free_port()
+        server = start_server(['--config', os.devnull, 'blogapp_api.wsgi:application',
+                               '--workers', str(args.workers), '-k', 'gthread', '--threads', str(args.threads)],
+                              env, port, with_cache=False)
+        try:
+            asyncio.run(mixed_load(port, paths, argparse.Namespace(readers=4, writers=0, duration=1)))  # warm up
+            (read_samples, read_statuses), (write_samples, write_statuses), elapsed = \
+                asyncio.run(mixed_load(port, paths, args))
+        finally:
+            server.terminate()
+            server.wait()
+        rows.append((
+            name,
+            f'{read_statuses.get(200, 0) / elapsed:.0f}',
+            f'{percentile(read_samples, 50):.1f}' if read_samples else '-',
+            f'{percentile(read_samples, 99):.1f}' if read_samples else '-',
+            f'{write_statuses.get(201, 0) / elapsed:.0f}',
+            f'{percentile(write_samples, 50):.1f}' if write_samples else '-',
+            f'{percentile(write_samples, 99):.1f}' if write_samples else '-',
+            errors(read_statuses, 200) + errors(write_statuses, 201),
+        ))
+
+    print(f'{connection.vendor}, {args.workers} workers x {args.threads} threads, {args.readers} readers, '
+          f'{args.writers} writers, {args.duration:.0f}s per run\n')
+    report(rows, ['connections', 'reads/s', 'read p50 ms', 'read p99 ms',
+                  'writes/s', 'write p50 ms', 'write p99 ms', 'errors'])
+
+
+if __name__ == '__main__':
+    main()
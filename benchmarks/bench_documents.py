@@ -0,0 +1,91 @@
+"""
+Latency of post detail/related reads served from render-on-write documents
+(blogapp.documents) against the viewset, with the response cache off and
+on, in plain, gzip and brotli encodings; and what the rendering adds to a
+post save.
+
+Requests go through the whole in-process middleware stack
+(django.test.Client), so the numbers include Django's own per-request cost.
+
+Usage: python -m benchmarks.bench_documents [--posts 5000] [--iterations 500]
+"""
+import argparse
+import random
+
+from benchmarks.common import api_client, measure, report, seed_posts, setup_django
+
+SITE_URL = 'https://localhost'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--posts', type=int, default=5000)
+    parser.add_argument('--content-size', type=int, default=8000, help='Characters of body per post')
+    parser.add_argument('--iterations', type=int, default=500)
+    parser.add_argument('--saves', type=int, default=100)
+    args = parser.parse_args()
+
+    setup_django()
+    seed_posts(args.posts, content_size=args.content_size, index_tags=True)
+
+    from django.core.cache import cache
+    from django.test import override_settings
+    from blogapp import compression
+    from blogapp.documents import render_all
+    from blogapp.models import Post
+    from blogapp.related import rebuild_all
+
+    rebuild_all()
+    with override_settings(SITE_URL=SITE_URL):
+        render_all()
+    slugs = list(Post.objects.values_list('slug', flat=True)[:200])
+    client = api_client()
+    rng = random.Random(0)
+
+    encodings = [('identity', ''), ('gzip', 'gzip')]
+    if compression.brotli is not None:
+        encodings.append(('br', 'br'))
+    variants = [
+        # name, SITE_URL, POSTS_CACHE_TIMEOUT
+        ('viewset, no cache', '', 0),
+        ('viewset, cache hits', '', 300),
+        ('documents', SITE_URL, 0),
+    ]
+
+    rows = []
+    for endpoint, path in [('detail', '/api/posts/{}/'), ('related', '/api/posts/{}/related/')]:
+        for name, site_url, timeout in variants:
+            for coding, accept_encoding in encodings if site_url else encodings[:1]:
+                def fetch():
+                    return client.get(path.format(rng.choice(slugs)), secure=True,
+                                      HTTP_ACCEPT_ENCODING=accept_encoding)
+
+                cache.clear()
+                with override_settings(SITE_URL=site_url, POSTS_CACHE_TIMEOUT=timeout):
+                    if timeout:
+                        for slug in slugs:
+                            client.get(path.format(slug), secure=True)
+                    p50, p95, response = measure(fetch, args.iterations)
+                assert response.status_code == 200, response.content[:200]
+                rows.append((endpoint, name, coding, f'{p50 * 1000:.0f}', f'{p95 * 1000:.0f}',
+                             f'{len(response.content):,}'))
+
+    print(f'{args.posts} posts of {args.content_size:,} characters, {args.iterations} requests each\n')
+    report(rows, ['endpoint', 'served by', 'encoding', 'p50 us', 'p95 us', 'last body bytes'])
+
+    def save():
+        post = Post.objects.get(slug=rng.choice(slugs))
+        post.title = f'{post.title[:150]} (edited)'
+        post.save()
+
+    save_rows = []
+    for name, site_url in [('without documents', ''), ('with documents', SITE_URL)]:
+        with override_settings(SITE_URL=site_url, IMAGE_VARIANTS_ASYNC=False):
+            p50, p95, _ = measure(save, args.saves)
+        save_rows.append((name, f'{p50:.2f}', f'{p95:.2f}'))
+    print()
+    report(save_rows, ['Post.save()', 'p50 ms', 'p95 ms'])
+
+
+if __name__ == '__main__':
+    main()
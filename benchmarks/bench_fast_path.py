@@ -0,0 +1,70 @@
+"""
+Benchmark the fast read path (.values() rows + orjson) against the DRF
+serializers + JSONRenderer, in serializations per second, for list pages
+and related-style detail payloads at several page sizes.
+
+Usage: python -m benchmarks.bench_fast_path [--page-sizes 10 100 1000]
+"""
+import argparse
+
+from benchmarks.common import measure, report, seed_posts, setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--page-sizes', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--iterations', type=int, default=50)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.test import RequestFactory
+    from rest_framework.renderers import JSONRenderer
+    from rest_framework.request import Request
+    from blogapp import fastpath
+    from blogapp.fastpath import PostRowSerializer, dumps
+    from blogapp.models import Post
+    from blogapp.serializers import PostListSerializer, PostSerializer
+
+    seed_posts(max(args.page_sizes), tags=lambda i: ['django', 'python', f'topic-{i % 50}'])
+    request = Request(RequestFactory().get('/api/posts/', secure=True, HTTP_HOST='localhost'))
+    queryset = Post.objects.select_related('author').order_by('-published_at', '-id')
+    renderer = JSONRenderer()
+    orjson = fastpath.orjson
+
+    def drf(serializer_class, size):
+        def run():
+            posts = list(queryset[:size])
+            data = serializer_class(posts, many=True, context={'request': request}).data
+            return renderer.render(data)
+        return run
+
+    def fast(serializer_class, size, encoder):
+        def run():
+            fastpath.orjson = encoder
+            rows = PostRowSerializer(serializer_class, request)
+            return dumps(rows.serialize(queryset.values(*rows.columns)[:size]), exact=rows.exact)
+        return run
+
+    rows = []
+    for size in sorted(args.page_sizes):
+        for shape, serializer_class in (('list', PostListSerializer), ('full', PostSerializer)):
+            variants = [
+                ('DRF serializer', drf(serializer_class, size)),
+                ('fast path, stdlib json', fast(serializer_class, size, None)),
+            ]
+            if orjson is not None:
+                variants.append(('fast path, orjson', fast(serializer_class, size, orjson)))
+            expected = None
+            for name, run in variants:
+                p50, p95, body = measure(run, args.iterations)
+                fastpath.orjson = orjson
+                expected = expected or body
+                rows.append((size, shape, name, f'{p50:.2f}', f'{p95:.2f}', f'{1000 / p50:,.0f}',
+                             'yes' if body == expected else 'NO'))
+
+    report(rows, ['page size', 'fields', 'variant', 'p50 ms', 'p95 ms', 'pages/s', 'identical'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Compare gunicorn's defaults (one sync worker, no preload) with the
+settings in gunicorn.conf.py, for both of its interfaces: requests per
+second and latency under ``--clients`` concurrent keep-alive clients, then
+the resident (RSS) and proportional (PSS) memory of each worker. PSS
+splits pages shared copy-on-write between the processes mapping them, so
+it shows what preloading saves.
+
+Usage: python -m benchmarks.bench_gunicorn [--clients 100] [--duration 15]
+"""
+import argparse
+import asyncio
+import os
+
+from benchmarks.bench_concurrency import free_port, load, start_server
+from benchmarks.common import percentile, report, seed_posts, setup_django
+
+CONFIG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'gunicorn.conf.py')
+
+SERVERS = {
+    'defaults (1 sync worker)': (['--config', os.devnull, 'blogapp_api.wsgi:application'], {}),
+    'gunicorn.conf.py, wsgi': (['--config', CONFIG], {'GUNICORN_INTERFACE': 'wsgi'}),
+    'gunicorn.conf.py, asgi': (['--config', CONFIG], {'GUNICORN_INTERFACE': 'asgi',
+                                                       'DJANGO_ASYNC_POST_VIEWS': 'true'}),
+}
+
+
+def memory_mb(pid):
+    """``(rss, pss)`` of a process in MB."""
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            name, _, rest = line.partition(':')
+            if name in ('Rss', 'Pss'):
+                values[name] = int(rest.split()[0]) / 1024
+    return values['Rss'], values['Pss']
+
+
+def worker_pids(master_pid):
+    with open(f'/proc/{master_pid}/task/{master_pid}/children') as f:
+        return [int(pid) for pid in f.read().split()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--posts', type=int, default=2000)
+    parser.add_argument('--clients', type=int, default=100)
+    parser.add_argument('--duration', type=float, default=15)
+    args = parser.parse_args()
+
+    setup_django()
+    seed_posts(args.posts, index_tags=True)
+
+    from blogapp.models import Post
+
+    slugs = list(Post.objects.order_by('-published_at').values_list('slug', flat=True)[:20])
+    paths = ['/api/posts/', '/api/posts/?tag=tag3'] + [f'/api/posts/{slug}/' for slug in slugs]
+
+    rows = []
+    for name, (gunicorn_args, env) in SERVERS.items():
+        port = free_port()
+        server = start_server(gunicorn_args, env, port, with_cache=False)
+        try:
+            asyncio.run(load(port, paths, min(args.clients, 20), 2))  # warm up
+            samples, statuses, elapsed = asyncio.run(load(port, paths, args.clients, args.duration))
+            workers = [memory_mb(pid) for pid in worker_pids(server.pid)]
+            master_rss, _ = memory_mb(server.pid)
+        finally:
+            server.terminate()
+            server.wait()
+        rows.append((
+            name, len(workers), f'{statuses.get(200, 0) / elapsed:.0f}',
+            f'{percentile(samples, 50):.1f}', f'{percentile(samples, 99):.1f}',
+            f'{master_rss:.0f}',
+            f'{sum(rss for rss, _ in workers) / len(workers):.0f}',
+            f'{sum(pss for _, pss in workers) / len(workers):.0f}',
+        ))
+
+    print(f'{args.clients} concurrent clients, {args.duration:.0f}s per server\n')
+    report(rows, ['server', 'workers', 'req/s', 'p50 ms', 'p99 ms', 'master RSS MB',
+                  'RSS/worker MB', 'PSS/worker MB'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Bytes read from the database and latency for reads of long posts: the list,
+related and search endpoints (which leave ``content`` out and so no longer
+read it), and the detail endpoint with and without a ``?fields=`` sparse
+fieldset.
+
+"DB bytes" re-runs the SELECTs a request made and sums the size of every
+value they return. The "before" column does the same for the query the
+endpoint used to make: every post column, joined to the author.
+
+Usage: python -m benchmarks.bench_lazy_content [--content-size 50000] [--posts 500]
+"""
+import argparse
+
+from benchmarks.common import api_client, measure, report, seed_posts, setup_django
+
+
+def value_size(value):
+    if value is None:
+        return 0
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    return len(str(value).encode())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--posts', type=int, default=500)
+    parser.add_argument('--content-size', type=int, default=50_000, help='Characters of body per post')
+    parser.add_argument('--iterations', type=int, default=50)
+    args = parser.parse_args()
+
+    setup_django()
+    seed_posts(args.posts, content_size=args.content_size, index_tags=True, index_search=True)
+
+    from django.db import connection
+    from django.test import override_settings
+    from blogapp.models import Post, RelatedPost
+    from blogapp.related import rebuild_all
+
+    rebuild_all()
+    slug = Post.objects.order_by('-published_at').values_list('slug', flat=True).first()
+    everything = Post.objects.select_related('author')
+    old_related = RelatedPost.objects.filter(post__slug=slug).select_related('related__author').order_by('rank')
+
+    cases = [
+        # name, path, the old query
+        ('posts list', '/api/posts/', everything.order_by('-published_at', '-id')[:20]),
+        ('posts list, 100 per page', '/api/posts/?page_size=100', everything.order_by('-published_at', '-id')[:100]),
+        ('related posts', f'/api/posts/{slug}/related/', old_related),
+        ('search', '/api/posts/search/?q=lorem', everything.order_by('-published_at')[:20]),
+        ('post detail', f'/api/posts/{slug}/', everything.filter(slug=slug)),
+        ('post detail, ?fields=title,slug,excerpt', f'/api/posts/{slug}/?fields=title,slug,excerpt',
+         everything.filter(slug=slug)),
+    ]
+
+    def selects_of(func):
+        captured = []
+
+        def capture(execute, sql, params, many, context):
+            if sql.lstrip().upper().startswith('SELECT'):
+                captured.append((sql, params))
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(capture):
+            func()
+        return captured
+
+    def bytes_read(selects):
+        total = 0
+        with connection.cursor() as cursor:
+            for sql, params in selects:
+                cursor.execute(sql, params)
+                total += sum(value_size(value) for row in cursor.fetchall() for value in row)
+        return total
+
+    client = api_client()
+    rows = []
+    with override_settings(POSTS_CACHE_TIMEOUT=0):
+        for name, path, old_query in cases:
+            fetch = lambda: client.get(path, secure=True)
+            response = fetch()
+            assert response.status_code == 200, (path, response.content[:200])
+            now = bytes_read(selects_of(fetch))
+            before = bytes_read(selects_of(lambda: list(old_query.all())))
+            p50, p95, _ = measure(fetch, args.iterations)
+            old_p50, _, _ = measure(lambda: list(old_query.all()), args.iterations)
+            rows.append((name, f'{before / 1024:,.1f}', f'{now / 1024:,.1f}',
+                         f'{old_p50:.2f}', f'{p50:.2f}', f'{p95:.2f}', f'{len(response.content) / 1024:,.1f}'))
+
+    print(f'{args.posts} posts of {args.content_size:,} characters\n')
+    report(rows, ['request', 'before DB KB', 'DB KB', 'old query p50 ms', 'p50 ms', 'p95 ms', 'response KB'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark the /media/ handler against the previous
+django.views.static.serve + placeholder fallback view.
+
+Usage: python -m benchmarks.bench_media [--size-kb 512]
+"""
+import argparse
+import os
+
+from benchmarks.common import measure, report, setup_django
+
+
+def legacy_view():
+    from django.conf import settings
+    from django.views.static import serve
+
+    def serve_placeholder(request, path):
+        response = serve(request, path, document_root=settings.MEDIA_ROOT)
+        if response.status_code == 404:
+            return serve(request, 'placeholder.jpg', document_root=settings.BASE_DIR)
+        return response
+    return serve_placeholder
+
+
+def consume(response):
+    if response.streaming:
+        body = b''.join(response.streaming_content)
+    else:
+        body = response.content
+    if hasattr(response, 'close'):
+        response.close()
+    return response.status_code, len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size-kb', type=int, default=512)
+    parser.add_argument('--iterations', type=int, default=300)
+    args = parser.parse_args()
+
+    setup_django()
+
+    import tempfile
+    from django.http import Http404
+    from django.test import RequestFactory, override_settings
+    from blogapp.media import serve_media
+
+    media_root = tempfile.mkdtemp(prefix='blogbench-media-')
+    os.makedirs(os.path.join(media_root, 'posts'))
+    with open(os.path.join(media_root, 'posts', 'cover-0123456789ab.jpg'), 'wb') as f:
+        f.write(os.urandom(args.size_kb * 1024))
+
+    factory = RequestFactory()
+    views = {'static.serve (old)': legacy_view(), 'serve_media (new)': serve_media}
+    rows = []
+    with override_settings(MEDIA_ROOT=media_root):
+        first = serve_media(factory.get('/media/posts/cover-0123456789ab.jpg'), 'posts/cover-0123456789ab.jpg')
+        first.close()
+        scenarios = [
+            ('full file', 'posts/cover-0123456789ab.jpg', {}),
+            ('revalidate (If-None-Match)', 'posts/cover-0123456789ab.jpg', {'HTTP_IF_NONE_MATCH': first['ETag']}),
+            ('revalidate (If-Modified-Since)', 'posts/cover-0123456789ab.jpg',
+             {'HTTP_IF_MODIFIED_SINCE': first['Last-Modified']}),
+            ('range 64KB', 'posts/cover-0123456789ab.jpg', {'HTTP_RANGE': 'bytes=0-65535'}),
+            ('missing -> placeholder', 'posts/missing.jpg', {}),
+        ]
+        for label, path, headers in scenarios:
+            for name, view in views.items():
+                def call():
+                    try:
+                        return consume(view(factory.get(f'/media/{path}', **headers), path))
+                    except Http404:
+                        return 404, 0
+                p50, p95, (status, size) = measure(call, args.iterations, warmup=5)
+                rows.append((label, name, status, size, f'{p50:.3f}', f'{p95:.3f}'))
+
+    report(rows, ['scenario', 'view', 'status', 'bytes', 'p50 ms', 'p95 ms'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+"""
+Measure the overhead of the request metrics middleware on the post list
+endpoint at several sample rates.
+
+Usage: python -m benchmarks.bench_metrics [--rates 0 0.1 1]
+"""
+import argparse
+
+from benchmarks.common import api_client, measure, report, seed_posts, setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--posts', type=int, default=1000)
+    parser.add_argument('--rates', type=float, nargs='+', default=[0.0, 0.1, 1.0])
+    parser.add_argument('--iterations', type=int, default=300)
+    args = parser.parse_args()
+
+    setup_django()
+    seed_posts(args.posts, index_tags=True)
+
+    from django.test import override_settings
+    from blogapp.metrics import registry
+
+    client = api_client()
+    rows = []
+    # The response cache would hide the work being measured
+    with override_settings(POSTS_CACHE_TIMEOUT=0):
+        for rate in args.rates:
+            registry.reset()
+            with override_settings(METRICS_SAMPLE_RATE=rate):
+                p50, p95, _ = measure(lambda: client.get('/api/posts/', secure=True), args.iterations, warmup=10)
+            rows.append((rate, f'{p50:.3f}', f'{p95:.3f}'))
+
+    report(rows, ['sample rate', 'p50 ms', 'p95 ms'])
+    print()
+    print(registry.render_prometheus())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Benchmark the post list endpoint: keyset pagination with the compact list
+serializer against the previous "serialize every post" behaviour.
+
+Usage: python -m benchmarks.bench_post_list [--sizes 10000 100000]
+"""
+import argparse
+
+from benchmarks.common import api_client, measure, report, seed_posts, setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--legacy-iterations', type=int, default=3)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.test import RequestFactory
+    from rest_framework.renderers import JSONRenderer
+    from rest_framework.request import Request
+    from blogapp.models import Post
+    from blogapp.pagination import KeysetPagination
+    from blogapp.serializers import PostSerializer
+
+    client = api_client()
+    factory = RequestFactory()
+    rows = []
+    seeded = 0
+    for size in sorted(args.sizes):
+        seed_posts(size - seeded)
+        seeded = size
+
+        def legacy():
+            request = Request(factory.get('/api/posts/', secure=True, HTTP_HOST='localhost'))
+            queryset = Post.objects.all().select_related('author')
+            data = PostSerializer(queryset, many=True, context={'request': request}).data
+            return JSONRenderer().render(data)
+
+        p50, p95, body = measure(legacy, args.legacy_iterations, warmup=1)
+        rows.append((size, 'legacy (all posts, full)', f'{p50:.1f}', f'{p95:.1f}', len(body)))
+
+        first = lambda: client.get('/api/posts/', secure=True).content
+        p50, p95, body = measure(first, args.iterations)
+        rows.append((size, 'keyset first page', f'{p50:.1f}', f'{p95:.1f}', len(body)))
+
+        # Build a cursor that points near the end of the archive
+        published_at, pk = Post.objects.order_by('published_at', 'id').values_list('published_at', 'id')[100]
+        cursor = KeysetPagination().encode_cursor(Post(pk=pk, published_at=published_at))
+        deep_url = f'/api/posts/?cursor={cursor}'
+        deep = lambda: client.get(deep_url, secure=True).content
+        p50, p95, body = measure(deep, args.iterations)
+        rows.append((size, 'keyset deep page', f'{p50:.1f}', f'{p95:.1f}', len(body)))
+
+    report(rows, ['posts', 'variant', 'p50 ms', 'p95 ms', 'bytes'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Load test the post list/detail/related endpoints with the versioned response
+cache disabled and enabled, and report throughput and hit/miss counters.
+
+Usage: python -m benchmarks.bench_response_cache [--posts 5000] [--threads 4]
+"""
+import argparse
+import random
+import threading
+import time
+
+from benchmarks.common import api_client, report, seed_posts, setup_django
+
+
+def run_load(urls, threads, duration):
+    """Hammer ``urls`` from ``threads`` clients for ``duration`` seconds; return requests/second."""
+    from django.db import connection
+
+    deadline = time.perf_counter() + duration
+    counts = [0] * threads
+
+    def worker(index):
+        client = api_client()
+        rng = random.Random(index)
+        while time.perf_counter() < deadline:
+            client.get(rng.choice(urls), secure=True)
+            counts[index] += 1
+        connection.close()
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return sum(counts) / duration
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--posts', type=int, default=5000)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=10.0)
+    args = parser.parse_args()
+
+    setup_django()
+    seed_posts(args.posts, index_tags=True)
+
+    from django.core.cache import cache
+    from django.test import override_settings
+    from blogapp.cache import cache_stats, reset_cache_stats
+    from blogapp.models import Post
+    from blogapp.related import rebuild_all
+
+    rebuild_all()
+    slugs = list(Post.objects.values_list('slug', flat=True)[:200])
+    urls = ['/api/posts/', '/api/posts/?page_size=50', '/api/posts/?tag=tag3']
+    urls += [f'/api/posts/{slug}/' for slug in slugs[:100]]
+    urls += [f'/api/posts/{slug}/related/' for slug in slugs[100:]]
+
+    rows = []
+    for label, timeout in [('no cache', 0), ('versioned cache', 300)]:
+        cache.clear()
+        reset_cache_stats()
+        with override_settings(POSTS_CACHE_TIMEOUT=timeout):
+            rps = run_load(urls, args.threads, args.duration)
+        stats = cache_stats()
+        rows.append((label, f'{rps:.0f}', stats['hits'], stats['misses']))
+
+    report(rows, ['variant', 'req/s', 'hits', 'misses'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark /api/posts/search/ against a LIKE scan over the same posts.
+
+Usage: python -m benchmarks.bench_search [--posts 50000]
+"""
+import argparse
+import random
+
+from benchmarks.common import api_client, measure, report, seed_posts, setup_django
+
+TOPIC_WORDS = (
+    'django python react javascript css html database index query cache latency throughput '
+    'server client deploy docker kubernetes postgres sqlite redis async thread worker queue '
+    'template component state hook router middleware serializer model migration schema test'
+).split()
+# Filler vocabulary with a Zipf-like frequency curve, topic words spread through the tail
+VOCABULARY = [f'word{n}' for n in range(3000)]
+for rank, word in enumerate(TOPIC_WORDS):
+    VOCABULARY.insert(100 + rank * 40, word)
+WEIGHTS = [1 / (rank + 1) for rank in range(len(VOCABULARY))]
+
+
+def make_content(i):
+    rng = random.Random(i)
+    words = rng.choices(VOCABULARY, weights=WEIGHTS, k=400)
+    # A handful of posts mention a rare word, like a real long-tail query
+    if i % 997 == 0:
+        words.insert(rng.randrange(len(words)), 'zeppelin')
+    return '<p>' + ' '.join(words) + '</p>'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--posts', type=int, default=50000)
+    parser.add_argument('--iterations', type=int, default=30)
+    args = parser.parse_args()
+
+    setup_django()
+    seconds = seed_posts(args.posts, content=make_content, index_search=True)
+    print(f'Seeded and indexed {args.posts} posts in {seconds:.1f}s')
+
+    from django.db.models import Q
+    from blogapp.models import Post
+    from blogapp.serializers import PostListSerializer
+
+    client = api_client()
+    rows = []
+    for label, q in [('common term', 'django'), ('two terms', 'redis latency'),
+                     ('rare term', 'zeppelin'), ('prefix', 'kuber')]:
+        url = f'/api/posts/search/?q={q.replace(" ", "+")}'
+        p50, p95, body = measure(lambda: client.get(url, secure=True).content, args.iterations)
+        rows.append((label, 'fts index', f'{p50:.1f}', f'{p95:.1f}', len(body)))
+
+        def like_scan():
+            condition = Q()
+            for term in q.split():
+                condition &= Q(title__icontains=term) | Q(excerpt__icontains=term) | Q(content__icontains=term)
+            page = list(Post.objects.filter(condition).select_related('author')[:20])
+            return PostListSerializer(page, many=True).data
+
+        p50, p95, _ = measure(like_scan, max(3, args.iterations // 10), warmup=1)
+        rows.append((label, 'LIKE scan', f'{p50:.1f}', f'{p95:.1f}', '-'))
+
+    report(rows, ['query', 'method', 'p50 ms', 'p95 ms', 'bytes'])
+
+
+if __name__ == '__main__':
+    main()
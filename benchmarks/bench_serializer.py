@@ -0,0 +1,68 @@
+"""
+Microbenchmark post serialization throughput: the previous
+get_cover_image_url (an os.path.exists per post without a cover) against
+the filesystem-free version.
+
+Usage: python -m benchmarks.bench_serializer [--posts 100 1000]
+"""
+import argparse
+import os
+
+from benchmarks.common import measure, report, seed_posts, setup_django
+
+
+def legacy_serializer():
+    from django.conf import settings
+    from blogapp.serializers import PostSerializer
+
+    class LegacyPostSerializer(PostSerializer):
+        def get_cover_image_url(self, obj):
+            if obj.cover_image and obj.cover_image.name:
+                return self.context['request'].build_absolute_uri(obj.cover_image.url)
+            placeholder_path = os.path.join(settings.MEDIA_ROOT, 'posts', 'placeholder.jpg')
+            if not os.path.exists(placeholder_path):
+                os.makedirs(os.path.dirname(placeholder_path), exist_ok=True)
+                with open(placeholder_path, 'w'):
+                    pass
+            return self.context['request'].build_absolute_uri(f"{settings.MEDIA_URL}posts/placeholder.jpg")
+
+    return LegacyPostSerializer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--posts', type=int, nargs='+', default=[100, 1000])
+    parser.add_argument('--iterations', type=int, default=50)
+    args = parser.parse_args()
+
+    setup_django()
+
+    import tempfile
+    from django.test import RequestFactory, override_settings
+    from rest_framework.request import Request
+    from blogapp.models import Post
+    from blogapp.serializers import PostListSerializer, PostSerializer
+
+    request = Request(RequestFactory().get('/api/posts/', secure=True, HTTP_HOST='localhost'))
+    variants = [
+        ('PostSerializer (old)', legacy_serializer()),
+        ('PostSerializer (new)', PostSerializer),
+        ('PostListSerializer (new)', PostListSerializer),
+    ]
+    rows = []
+    seeded = 0
+    with override_settings(MEDIA_ROOT=tempfile.mkdtemp(prefix='blogbench-media-')):
+        for count in sorted(args.posts):
+            seed_posts(count - seeded)
+            seeded = count
+            posts = list(Post.objects.select_related('author').order_by('-published_at')[:count])
+            for name, serializer_class in variants:
+                run = lambda: serializer_class(posts, many=True, context={'request': request}).data
+                p50, p95, _ = measure(run, args.iterations)
+                rows.append((count, name, f'{p50:.2f}', f'{p95:.2f}', f'{count / p50 * 1000:,.0f}'))
+
+    report(rows, ['posts', 'serializer', 'p50 ms', 'p95 ms', 'posts/s'])
+
+
+if __name__ == '__main__':
+    main()
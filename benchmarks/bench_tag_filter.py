@@ -0,0 +1,46 @@
+"""
+Benchmark tag-filtered post listing and the tag facet endpoint as the
+archive grows. Latency should stay roughly flat across sizes.
+
+Usage: python -m benchmarks.bench_tag_filter [--sizes 10000 50000 100000]
+"""
+import argparse
+
+from benchmarks.common import api_client, measure, report, seed_posts, setup_django
+
+
+def zipf_tags(i):
+    # A few very common tags, a long tail of rare ones
+    return [f'tag{i % 5}', f'tag{i % 97}', f'rare{i % 1009}']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 50000, 100000])
+    parser.add_argument('--iterations', type=int, default=50)
+    args = parser.parse_args()
+
+    setup_django()
+    client = api_client()
+    queries = [
+        ('common tag', '/api/posts/?tag=tag1'),
+        ('rare tag', '/api/posts/?tag=rare17'),
+        ('any of two', '/api/posts/?tags=tag1,tag42'),
+        ('all of two', '/api/posts/?tags=tag1,tag42&match=all'),
+        ('tag facets', '/api/tags/'),
+    ]
+
+    rows = []
+    seeded = 0
+    for size in sorted(args.sizes):
+        seed_posts(size - seeded, content_size=500, tags=zipf_tags, index_tags=True)
+        seeded = size
+        for label, url in queries:
+            p50, p95, body = measure(lambda: client.get(url, secure=True).content, args.iterations)
+            rows.append((size, label, f'{p50:.2f}', f'{p95:.2f}', len(body)))
+
+    report(rows, ['posts', 'query', 'p50 ms', 'p95 ms', 'bytes'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Each benchmark runs against a throwaway SQLite database (or whatever
+``DATABASE_URL`` points at when ``BENCH_DATABASE_URL`` is set) so it never
+touches the development database.
+"""
+import os
+import statistics
+import tempfile
+import time
+
+import django
+
+
+def setup_django():
+    """Point Django at a scratch database, configure it and run migrations."""
+    scratch = os.environ.get('BENCH_DATABASE_URL')
+    if not scratch:
+        path = os.path.join(tempfile.mkdtemp(prefix='blogbench-'), 'bench.sqlite3')
+        scratch = f'sqlite:///{path}'
+    os.environ['DATABASE_URL'] = scratch
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blogapp_api.settings')
+    django.setup()
+
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0, interactive=False)
+
+
+def get_author(username=None):
+    from django.contrib.auth.models import User
+    if username is not None:
+        return User.objects.get_or_create(username=username, defaults={'email': f'{username}@example.com'})[0]
+    user = User.objects.filter(is_superuser=True).first()
+    if user is None:
+        user = User.objects.create_superuser('bench', 'bench@example.com', 'bench-pass')
+    return user
+
+
+def seed_posts(count, content_size=4000, batch_size=2000, tags=None, content=None,
+               index_tags=False, index_search=False, authors=1, cover_every=0):
+    """
+    Bulk insert ``count`` synthetic posts and return the elapsed seconds.
+
+    ``tags`` and ``content`` are callables mapping the post number to its tag
+    list and body. ``index_tags`` and ``index_search`` fill in the tag and
+    full-text indexes as well, since ``bulk_create`` skips the save signals.
+    Posts are spread over ``authors`` users, and every ``cover_every``-th
+    post gets a cover image name with one variant (no files are written).
+    """
+    from datetime import timedelta
+    from django.utils import timezone
+    from blogapp.models import Post
+    from blogapp.related import index_new_posts
+    from blogapp.search import index_posts
+
+    writers = [get_author()] + [get_author(f'bench{n}') for n in range(1, authors)]
+    start_id = Post.objects.count()
+    body = '<p>' + ('lorem ipsum dolor sit amet ' * (content_size // 27 + 1))[:content_size] + '</p>'
+    now = timezone.now()
+    if tags is None:
+        tags = lambda i: [f'tag{i % 50}', f'tag{i % 7}']
+    if content is None:
+        content = lambda i: body
+
+    def cover(i):
+        if not cover_every or i % cover_every:
+            return {}
+        name = f'posts/bench-{i}.jpg'
+        variant = {'name': f'posts/variants/bench-{i}-640w-0123456789ab.webp',
+                   'width': 640, 'height': 360, 'format': 'webp'}
+        return {'cover_image': name, 'cover_image_variants': {'source': name, 'variants': [variant]}}
+
+    def flush(batch):
+        Post.objects.bulk_create(batch)
+        if index_tags:
+            index_new_posts(batch)
+        if index_search:
+            index_posts(batch)
+
+    started = time.perf_counter()
+    batch = []
+    for i in range(start_id, start_id + count):
+        batch.append(Post(
+            title=f'Benchmark post {i}',
+            slug=f'benchmark-post-{i}',
+            excerpt=f'Excerpt for benchmark post {i}',
+            content=content(i),
+            author=writers[i % len(writers)],
+            tags=tags(i),
+            published_at=now - timedelta(minutes=i),
+            **cover(i),
+        ))
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+    return time.perf_counter() - started
+
+
+def api_client():
+    from django.test import Client
+    return Client(HTTP_HOST='localhost')
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def measure(func, iterations, warmup=2):
+    """Call ``func`` repeatedly; return (p50_ms, p95_ms, last_result)."""
+    result = None
+    for _ in range(warmup):
+        result = func()
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        result = func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), percentile(samples, 95), result
+
+
+def report(rows, headers):
+    widths = [max(len(str(h)), *(len(str(r[i])) for r in rows)) for i, h in enumerate(headers)]
+    line = '  '.join(str(h).ljust(w) for h, w in zip(headers, widths))
+    print(line)
+    print('-' * len(line))
+    for row in rows:
+        print('  '.join(str(c).ljust(w) for c, w in zip(row, widths)))
@@ -0,0 +1,205 @@
+"""
+Reproducible latency/throughput run over every API endpoint, in-process
+through both the WSGI handler (django.test.Client) and the ASGI handler
+(django.test.AsyncClient). Results, with the environment they were taken
+in, are written as JSON so runs can be compared.
+
+Usage:
+    python -m benchmarks.run --output before.json
+    python -m benchmarks.run --output after.json --compare before.json
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import subprocess
+import time
+from datetime import datetime, timezone
+
+from benchmarks.common import percentile, report, seed_posts, setup_django
+
+
+def endpoints(slug, cursor):
+    """``(name, method, path, body)`` for each measured request."""
+    return [
+        ('posts list', 'get', '/api/posts/', None),
+        ('posts list, 100 per page', 'get', '/api/posts/?page_size=100', None),
+        ('posts list, deep cursor', 'get', f'/api/posts/?cursor={cursor}', None),
+        ('posts by tag', 'get', '/api/posts/?tag=topic-3', None),
+        ('posts by all tags', 'get', '/api/posts/?tags=topic-3,common&match=all', None),
+        ('post detail', 'get', f'/api/posts/{slug}/', None),
+        ('related posts', 'get', f'/api/posts/{slug}/related/', None),
+        ('tags', 'get', '/api/tags/', None),
+        ('search', 'get', '/api/posts/search/?q=lorem', None),
+        ('contact create', 'post', '/api/contact/', {
+            'name': 'Bench', 'email': 'bench@example.com', 'subject': 'Benchmark', 'message': 'Hello',
+        }),
+    ]
+
+
+def request_kwargs(body, n):
+    if body is None:
+        return {'secure': True}
+    # Vary the message so the outbox does not dedupe the inserts away
+    return {'secure': True, 'content_type': 'application/json',
+            'data': {**body, 'message': f"{body['message']} {n}"}}
+
+
+def summarize(samples, elapsed, status, size, queries):
+    return {
+        'p50_ms': round(percentile(samples, 50), 3),
+        'p95_ms': round(percentile(samples, 95), 3),
+        'p99_ms': round(percentile(samples, 99), 3),
+        'mean_ms': round(sum(samples) / len(samples), 3),
+        'requests_per_second': round(len(samples) / elapsed, 1),
+        'status': status,
+        'bytes': size,
+        'queries': queries,
+    }
+
+
+def run_wsgi(method, path, body, iterations, warmup):
+    from django.db import connection, reset_queries
+    from django.test import Client
+    from django.test.utils import CaptureQueriesContext
+
+    client = Client()
+    call = getattr(client, method)
+    for n in range(warmup):
+        call(path, **request_kwargs(body, -n - 1))
+    # request_started resets the query log, so start the capture from an empty one
+    # and count before the next request clears it again
+    reset_queries()
+    with CaptureQueriesContext(connection) as queries:
+        response = call(path, **request_kwargs(body, 0))
+    query_count = len(queries)
+
+    samples = []
+    started = time.perf_counter()
+    for n in range(1, iterations + 1):
+        t0 = time.perf_counter()
+        call(path, **request_kwargs(body, n))
+        samples.append((time.perf_counter() - t0) * 1000)
+    elapsed = time.perf_counter() - started
+    return summarize(samples, elapsed, response.status_code, len(response.content), query_count)
+
+
+async def run_asgi(method, path, body, iterations, warmup):
+    from django.test import AsyncClient
+
+    client = AsyncClient()
+    call = getattr(client, method)
+    offset = 10 ** 6  # keep contact messages distinct from the WSGI run
+    for n in range(warmup):
+        await call(path, **request_kwargs(body, offset - n - 1))
+    response = await call(path, **request_kwargs(body, offset))
+
+    samples = []
+    started = time.perf_counter()
+    for n in range(1, iterations + 1):
+        t0 = time.perf_counter()
+        await call(path, **request_kwargs(body, offset + n))
+        samples.append((time.perf_counter() - t0) * 1000)
+    elapsed = time.perf_counter() - started
+    return summarize(samples, elapsed, response.status_code, len(response.content), None)
+
+
+def environment(args):
+    import django
+    from django.db import connection
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'taken_at': datetime.now(timezone.utc).isoformat(),
+        'git_commit': commit,
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+        'platform': platform.platform(),
+        'options': vars(args),
+    }
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = {(r['endpoint'], r['interface']): r for r in json.load(f)['results']}
+    rows = []
+    for result in results:
+        before = baseline.get((result['endpoint'], result['interface']))
+        if before is None:
+            continue
+        change = (result['p50_ms'] - before['p50_ms']) / before['p50_ms'] * 100 if before['p50_ms'] else 0.0
+        rows.append((result['endpoint'], result['interface'], before['p50_ms'], result['p50_ms'],
+                     f'{change:+.1f}%', before.get('queries'), result.get('queries')))
+    print()
+    report(rows, ['endpoint', 'interface', 'p50 before', 'p50 after', 'change', 'queries before', 'after'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--posts', type=int, default=5000)
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--interfaces', nargs='+', choices=['wsgi', 'asgi'], default=['wsgi', 'asgi'])
+    parser.add_argument('--with-cache', action='store_true', help='leave the response cache enabled')
+    parser.add_argument('--output', default='benchmark-results.json')
+    parser.add_argument('--compare', metavar='BASELINE_JSON')
+    args = parser.parse_args()
+
+    # Seeds the data generator and the metrics middleware's sampling alike
+    random.seed(args.seed)
+    setup_django()
+
+    from django.conf import settings
+    from django.test import override_settings
+    from blogapp.models import Post
+    from blogapp.pagination import KeysetPagination
+    from blogapp.related import recompute_related
+
+    rng = random.Random(args.seed)
+    seed_posts(
+        args.posts, index_tags=True, index_search=True, authors=8, cover_every=3,
+        tags=lambda i: sorted({f'topic-{rng.randrange(200)}', f'topic-{i % 7}', 'common'}),
+    )
+    post = Post.objects.order_by('-published_at').first()
+    recompute_related(post.pk)
+    deep = Post.objects.order_by('published_at', 'id')[min(100, args.posts - 1)]
+    cursor = KeysetPagination().encode_cursor(deep)
+
+    results = []
+    # AsyncClient always sends "Host: testserver". The contact throttles would
+    # turn the repeated submissions into 429s; bench_contact_flood covers them
+    no_throttles = {'contact_ip': 'none', 'contact_email': 'none'}
+    with override_settings(POSTS_CACHE_TIMEOUT=300 if args.with_cache else 0,
+                           ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+                           REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': no_throttles}):
+        for name, method, path, body in endpoints(post.slug, cursor):
+            for interface in args.interfaces:
+                if interface == 'wsgi':
+                    stats = run_wsgi(method, path, body, args.iterations, args.warmup)
+                else:
+                    stats = asyncio.run(run_asgi(method, path, body, args.iterations, args.warmup))
+                results.append({'endpoint': name, 'interface': interface, 'method': method.upper(),
+                                'path': path, **stats})
+
+    with open(args.output, 'w') as f:
+        json.dump({'environment': environment(args), 'results': results}, f, indent=2)
+
+    report(
+        [(r['endpoint'], r['interface'], r['status'], r['p50_ms'], r['p95_ms'], r['p99_ms'],
+          r['requests_per_second'], r['queries'] if r['queries'] is not None else '-') for r in results],
+        ['endpoint', 'interface', 'status', 'p50 ms', 'p95 ms', 'p99 ms', 'req/s', 'queries'],
+    )
+    print(f'\nWrote {args.output}')
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
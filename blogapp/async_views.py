@@ -0,0 +1,184 @@
+"""
+Native async read endpoints for posts, for ASGI deployments.
+
+Off by default: under the gthread WSGI server these routes are served by
+the viewset, which is faster for ordinary clients. With ``ASYNC_POST_VIEWS``
+on (meant for an ASGI server), the post list, detail and related routes are
+served by coroutines: GET requests answered with plain JSON (see
+``fast_path_applies``) run end to end on the async ORM and the row
+serializer of blogapp.fastpath, so the event loop keeps serving other
+clients while queries are in flight. Everything else on those routes
+(writes, the browsable API, other media types) is handed to the DRF
+``PostViewSet`` in a worker thread. Errors raised on the async path get the
+response the viewset would send (the list view's JSON error bodies, DRF's
+exception handling for the others), so responses are the same either way.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import Http404
+from django.urls import URLPattern
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import APIException, NotAcceptable
+from rest_framework.request import Request
+
+from .cache import acached_json, aget_content_version, shared_cache
+from .conditional import evaluate, set_validators
+from .fastpath import PostRowSerializer, fast_path_applies
+from .models import Post, RelatedPost
+from .serializers import PostListSerializer, PostSerializer, requested_fields
+from .views import (
+    LATEST_UPDATE, LIST_STATS, RELATED_STATS, PostViewSet, detail_stats_query, detail_validators_result,
+    list_error_response, list_validators_result, related_validators_result, version_validators_result,
+)
+
+
+def negotiate(request):
+    """A DRF ``Request`` with the renderer DRF would pick, or ``None`` if nothing is acceptable."""
+    view = PostViewSet()
+    drf_request = Request(request, negotiator=view.get_content_negotiator())
+    try:
+        renderer, media_type = drf_request.negotiator.select_renderer(drf_request, view.get_renderers())
+    except NotAcceptable:
+        return None
+    drf_request.accepted_renderer, drf_request.accepted_media_type = renderer, media_type
+    return drf_request
+
+
+async def conditional_json(request, name, result, build):
+    """``conditional_response`` + ``cached_response`` for the async views."""
+    if result is None:
+        return await acached_json(name, request, build)
+    etag, timestamp, not_modified = evaluate(request, name, result)
+    if not_modified is not None:
+        return set_validators(not_modified, etag, timestamp)
+    response = await acached_json(name, request, build)
+    if response is None or response.status_code != 200:
+        return response
+    return set_validators(response, etag, timestamp)
+
+
+async def post_list(request, view):
+    backend = view.filter_backends[0]()
+    await backend.aprepare(request, view)
+    queryset = backend.filter_queryset(request, view.get_queryset(), view)
+    if shared_cache():
+        latest = await Post.objects.order_by().aaggregate(**LATEST_UPDATE)
+        result = version_validators_result(await aget_content_version(), latest)
+    else:
+        result = list_validators_result(await queryset.order_by().aaggregate(**LIST_STATS))
+
+    async def build():
+        rows = PostRowSerializer(PostListSerializer, request)
+        paginator = view.paginator
+        page = await paginator.apaginate_queryset(queryset.values(*rows.columns), request, view)
+        return rows.response({'next': paginator.get_next_link(), 'results': rows.serialize(page)})
+
+    return await conditional_json(request, 'list', result, build)
+
+
+async def post_detail(request, view, slug):
+    result = detail_validators_result(await detail_stats_query(slug).afirst())
+    if result is None:
+        raise Http404(f"No {Post._meta.object_name} matches the given query.")
+
+    fields = requested_fields(request, PostSerializer)
+
+    async def build():
+        rows = PostRowSerializer(PostSerializer, request, fields=fields)
+        found = [row async for row in view.get_queryset().filter(slug=slug).values(*rows.columns)[:1]]
+        if not found:
+            raise Http404(f"No {Post._meta.object_name} matches the given query.")
+        return rows.response(rows.serialize(found)[0])
+
+    return await conditional_json(request, 'detail', result, build)
+
+
+async def post_related(request, view, slug):
+    stats = await RelatedPost.objects.filter(post__slug=slug).aaggregate(**RELATED_STATS)
+
+    async def build():
+        rows = PostRowSerializer(PostListSerializer, request, prefix='related__')
+        related = RelatedPost.objects.filter(post__slug=slug).order_by('rank').values(*rows.columns)
+        related_rows = [row async for row in related]
+        if not related_rows:
+            post_id = await Post.objects.filter(slug=slug).values_list('id', flat=True).afirst()
+            if post_id is None:
+                return None
+            rows = PostRowSerializer(PostListSerializer, request)
+            latest = view.get_queryset().exclude(id=post_id).values(*rows.columns)[:3]
+            related_rows = [row async for row in latest]
+        return rows.response(rows.serialize(related_rows))
+
+    return await conditional_json(request, 'related', related_validators_result(stats), build)
+
+
+HANDLERS = {
+    'post-list': ('list', post_list),
+    'post-detail': ('retrieve', post_detail),
+    'post-related': ('related', post_related),
+}
+
+
+def allow_header(actions):
+    """The ``Allow`` header DRF sends for a route bound to ``actions``."""
+    # DRF routes HEAD to the GET action
+    methods = [m for m in PostViewSet.http_method_names
+               if m in actions or m == 'options' or (m == 'head' and 'get' in actions)]
+    return ', '.join(m.upper() for m in methods)
+
+
+def error_response(action, viewset, exc):
+    """What the viewset answers when ``exc`` is raised by ``action``."""
+    if action == 'list':
+        return list_error_response(exc)
+    # Http404 and API errors become DRF error responses; anything else is
+    # re-raised, as it is from the viewset
+    return viewset.handle_exception(exc)
+
+
+def async_route(action, handler, drf_view):
+    allow = allow_header(drf_view.actions)
+    sync_view = sync_to_async(drf_view)
+
+    @wraps(drf_view)
+    async def view(request, *args, **kwargs):
+        # Basic auth credentials are checked by the viewset
+        if request.method == 'GET' and 'format' not in kwargs and 'HTTP_AUTHORIZATION' not in request.META:
+            drf_request = negotiate(request)
+            if drf_request is not None and fast_path_applies(drf_request):
+                viewset = PostViewSet(request=drf_request, action=action, args=args, kwargs=kwargs,
+                                      format_kwarg=None, headers={'Allow': allow, 'Vary': 'Accept'})
+                # The session user SessionAuthentication would find (no CSRF
+                # check applies to GET), loaded without blocking the event loop;
+                # setting it keeps DRF from loading it again synchronously
+                drf_request.user = await request.auser()
+                try:
+                    viewset.check_permissions(drf_request)
+                    viewset.check_throttles(drf_request)
+                except APIException as exc:
+                    response = viewset.handle_exception(exc)
+                else:
+                    try:
+                        response = await handler(drf_request, viewset, *args, **kwargs)
+                    except Exception as exc:
+                        response = error_response(action, viewset, exc)
+                if response is not None:
+                    response = viewset.finalize_response(drf_request, response)
+                    return response.render() if hasattr(response, 'render') else response
+        return await sync_view(request, *args, **kwargs)
+
+    return csrf_exempt(view)
+
+
+def async_post_urls(urls):
+    """Swap the post list/detail/related routes in ``router.urls`` for async ones."""
+    patterns = []
+    for pattern in urls:
+        name = getattr(pattern, 'name', None)
+        if name in HANDLERS:
+            action, handler = HANDLERS[name]
+            pattern = URLPattern(pattern.pattern, async_route(action, handler, pattern.callback),
+                                 pattern.default_args, name)
+        patterns.append(pattern)
+    return patterns
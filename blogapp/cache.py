@@ -0,0 +1,184 @@
+"""
+Versioned response cache for the read-only post endpoints.
+
+Every cache key embeds a global content version. Saving or deleting a post
+bumps the version, which orphans every cached response at once (O(1)
+invalidation); stale entries simply age out of the cache backend.
+
+The version only reaches other worker processes through a shared cache. On
+a per-process backend (local memory) with several workers, a write would
+leave the other workers serving stale responses, so the cache is off
+there (see ``shared_cache``).
+"""
+import hashlib
+import json
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.response import Response
+
+from .fastpath import JSONBytesResponse, dumps, fast_path_applies
+
+CONTENT_VERSION_KEY = 'blogapp:posts:version'
+
+# Backends whose entries each process keeps to itself
+PER_PROCESS_BACKENDS = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0}
+
+
+def shared_cache():
+    """Whether every web worker process sees the same default cache."""
+    if getattr(settings, 'WORKER_PROCESSES', 1) <= 1:
+        return True
+    return settings.CACHES['default']['BACKEND'] not in PER_PROCESS_BACKENDS
+
+
+def cache_timeout():
+    if not shared_cache():
+        return 0
+    return getattr(settings, 'POSTS_CACHE_TIMEOUT', 300)
+
+
+def get_content_version():
+    version = cache.get(CONTENT_VERSION_KEY)
+    if version is None:
+        # Seed from the clock so a restarted process (or an evicted key) never
+        # reuses a version that still has entries in a persistent cache
+        cache.add(CONTENT_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(CONTENT_VERSION_KEY, 0)
+    return version
+
+
+async def aget_content_version():
+    version = await cache.aget(CONTENT_VERSION_KEY)
+    if version is None:
+        await cache.aadd(CONTENT_VERSION_KEY, time.time_ns(), None)
+        version = await cache.aget(CONTENT_VERSION_KEY, 0)
+    return version
+
+
+def bump_content_version():
+    try:
+        return cache.incr(CONTENT_VERSION_KEY)
+    except ValueError:
+        cache.add(CONTENT_VERSION_KEY, time.time_ns(), None)
+        return cache.get(CONTENT_VERSION_KEY)
+
+
+def invalidate_posts():
+    """
+    Invalidate every cached post response.
+
+    Bumps immediately and, inside a transaction, once more after commit so a
+    response cached from pre-commit data in the meantime is orphaned too.
+    """
+    bump_content_version()
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(bump_content_version)
+
+
+def response_cache_key(name, request, version=None):
+    # Absolute URLs appear in the payload, so the scheme and host are part of the key
+    url = request.build_absolute_uri()
+    digest = hashlib.md5(url.encode('utf-8'), usedforsecurity=False).hexdigest()
+    if version is None:
+        version = get_content_version()
+    return f'blogapp:posts:{version}:{name}:{digest}'
+
+
+def record(outcome):
+    with _stats_lock:
+        _stats[outcome] += 1
+
+
+def cache_stats():
+    """Process-local hit/miss counters."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset_cache_stats():
+    with _stats_lock:
+        for key in _stats:
+            _stats[key] = 0
+
+
+async def acached_json(name, request, build):
+    """
+    ``cached_response`` for the async read views. ``build`` is a coroutine
+    function returning a ``JSONBytesResponse``, or ``None`` when it cannot
+    answer (which is passed through).
+    """
+    timeout = cache_timeout()
+    if not timeout:
+        return await build()
+
+    key = response_cache_key(name, request, version=await aget_content_version())
+    data = await cache.aget(key)
+    if data is not None:
+        record('hits')
+        # Entries stored by the sync views may hold response.data
+        response = JSONBytesResponse(data if isinstance(data, bytes) else dumps(data, exact=True))
+        response['X-Cache'] = 'HIT'
+        return response
+
+    record('misses')
+    response = await build()
+    if response is None:
+        return None
+    if isinstance(response, JSONBytesResponse) and response.status_code == 200:
+        await cache.aset(key, response.content, timeout)
+    response['X-Cache'] = 'MISS'
+    return response
+
+
+def cached_response(name):
+    """
+    Cache the serialized ``response.data`` of a viewset action.
+
+    Only successful responses are stored. The rendered body is not cached so
+    content negotiation still works; rendering is cheap next to the queries
+    and serialization a hit skips. Fast-path responses are stored as their
+    JSON bytes and decoded again for any other renderer. Each response gets
+    an ``X-Cache`` header.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            timeout = cache_timeout()
+            if not timeout:
+                return method(self, request, *args, **kwargs)
+
+            key = response_cache_key(name, request)
+            data = cache.get(key)
+            if data is not None:
+                record('hits')
+                if not isinstance(data, bytes):
+                    response = Response(data)
+                elif fast_path_applies(request):
+                    response = JSONBytesResponse(data)
+                else:
+                    response = Response(json.loads(data))
+                response['X-Cache'] = 'HIT'
+                return response
+
+            record('misses')
+            response = method(self, request, *args, **kwargs)
+            if response.status_code == 200:
+                if isinstance(response, Response):
+                    cache.set(key, response.data, timeout)
+                elif isinstance(response, JSONBytesResponse):
+                    cache.set(key, response.content, timeout)
+            response['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,126 @@
+"""
+Content codings for API responses: ``Accept-Encoding`` negotiation and
+gzip/brotli/zstd encoding, whole or streamed.
+
+gzip is always available; brotli (``br``) when the ``brotli`` package is
+installed and zstd when ``zstandard`` is. gzip output is deterministic (no
+timestamp in the header), so the same body always encodes to the same
+bytes.
+"""
+import gzip
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Server preference when the client accepts several equally
+PREFERENCE = ('br', 'zstd', 'gzip')
+
+DEFAULT_LEVELS = {'br': 4, 'zstd': 3, 'gzip': 6}
+
+# Media types compressed: the API's JSON and NDJSON. Pages that embed a
+# secret next to request-controlled text (HTML with CSRF tokens: the admin,
+# the browsable API) are never compressed, so their compressed size cannot
+# leak the secret (BREACH). Static files come precompressed from WhiteNoise;
+# images, video and archives are compressed already.
+COMPRESSIBLE_TYPES = (
+    'application/json',
+    'application/x-ndjson',
+    'application/problem+json',
+)
+
+
+def available_encodings():
+    """The codings this process can produce, best first."""
+    installed = {'br': brotli is not None, 'zstd': zstandard is not None, 'gzip': True}
+    return tuple(coding for coding in PREFERENCE if installed[coding])
+
+
+def compressible(content_type):
+    media_type = (content_type or '').partition(';')[0].strip().lower()
+    return media_type in COMPRESSIBLE_TYPES
+
+
+def parse_accept_encoding(header):
+    """``"gzip, br;q=0.5"`` -> ``{"gzip": 1.0, "br": 0.5}``; malformed q-values count as 0."""
+    accepted = {}
+    for item in header.split(','):
+        coding, _, params = item.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def negotiate_encoding(header, offered=None):
+    """
+    The coding from ``offered`` (server preference order, default
+    ``available_encodings()``) to answer ``Accept-Encoding: header`` with,
+    or ``None`` for the identity coding.
+    """
+    if not header:
+        return None
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get('*', 0.0)
+    best, best_q = None, 0.0
+    for coding in available_encodings() if offered is None else offered:
+        q = accepted.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def encode(data, coding, level=None):
+    """``data`` in ``coding``; ``level`` is the gzip level (1-9), brotli quality (0-11) or zstd level."""
+    level = DEFAULT_LEVELS.get(coding) if level is None else level
+    if coding == 'gzip':
+        return gzip.compress(data, compresslevel=level, mtime=0)
+    if coding == 'br' and brotli is not None:
+        return brotli.compress(data, quality=level)
+    if coding == 'zstd' and zstandard is not None:
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    raise ValueError(f"Unsupported content coding {coding!r}")
+
+
+class StreamEncoder:
+    """
+    Encodes a body chunk by chunk. Each ``encode()`` flushes, so what the
+    view yields goes out as it is produced; ``finish()`` ends the stream.
+    """
+
+    def __init__(self, coding, level=None):
+        level = DEFAULT_LEVELS.get(coding) if level is None else level
+        if coding == 'gzip':
+            compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+            self._encode = lambda chunk: compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            self.finish = compressor.flush
+        elif coding == 'br' and brotli is not None:
+            compressor = brotli.Compressor(quality=level)
+            self._encode = lambda chunk: compressor.process(chunk) + compressor.flush()
+            self.finish = compressor.finish
+        elif coding == 'zstd' and zstandard is not None:
+            compressor = zstandard.ZstdCompressor(level=level).compressobj()
+            self._encode = lambda chunk: (compressor.compress(chunk)
+                                          + compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK))
+            self.finish = compressor.flush
+        else:
+            raise ValueError(f"Unsupported content coding {coding!r}")
+
+    def encode(self, chunk):
+        return self._encode(chunk) if chunk else b''
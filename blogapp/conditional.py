@@ -0,0 +1,68 @@
+"""
+Conditional GET support (ETag / Last-Modified / 304) for the post endpoints.
+
+Validators are computed from ``Post.updated_at``, small aggregates or the
+content version of blogapp.cache, not from the response body, so a matching ``If-None-Match`` or
+``If-Modified-Since`` is answered before any serialization happens.
+"""
+import hashlib
+from functools import wraps
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+def etag_for(name, url, media_type, parts):
+    """Strong ETag over the endpoint, the full URL, the media type and ``parts``."""
+    fingerprint = '|'.join([name, url, media_type or '', *(str(part) for part in parts)])
+    return '"%s"' % hashlib.sha1(fingerprint.encode('utf-8'), usedforsecurity=False).hexdigest()
+
+
+def make_etag(request, name, parts):
+    """``etag_for`` the request's URL and negotiated media type."""
+    return etag_for(name, request.build_absolute_uri(), getattr(request, 'accepted_media_type', ''), parts)
+
+
+def evaluate(request, name, result):
+    """
+    Turn a validators result into ``(etag, timestamp, not_modified)``;
+    ``not_modified`` is the 304 response when the client's copy is current.
+    """
+    parts, last_modified = result
+    etag = make_etag(request, name, parts)
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    return etag, timestamp, get_conditional_response(request, etag=etag, last_modified=timestamp)
+
+
+def set_validators(response, etag, timestamp):
+    response['ETag'] = etag
+    if timestamp is not None:
+        response['Last-Modified'] = http_date(timestamp)
+    return response
+
+
+def conditional_response(name, validators):
+    """
+    Wrap a viewset action with ETag/Last-Modified handling.
+
+    ``validators`` is a viewset method name; it is called with the action's
+    arguments and returns ``(parts, last_modified)`` or ``None`` when the
+    resource has no validators (e.g. it does not exist).
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            result = getattr(self, validators)(request, *args, **kwargs)
+            if result is None:
+                return method(self, request, *args, **kwargs)
+
+            etag, timestamp, not_modified = evaluate(request, name, result)
+            if not_modified is None:
+                response = method(self, request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+            else:
+                response = not_modified
+            return set_validators(response, etag, timestamp)
+        return wrapper
+    return decorator
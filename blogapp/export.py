@@ -0,0 +1,152 @@
+"""
+Streaming export of the post archive, for ``GET /api/posts/export/`` and
+``manage.py export_posts``.
+
+Posts are read with ``.values().iterator()`` (a server-side cursor on
+PostgreSQL), serialized one row at a time into what the detail endpoint
+returns, and yielded as NDJSON lines or the elements of one JSON array in
+buffers of about ``EXPORT_BUFFER_SIZE`` bytes, optionally gzipped on the
+fly. Nothing is accumulated, so memory use does not depend on the archive
+size.
+
+Rows come in ``(updated_at, id)`` order up to ``until``, which trails the
+moment the export started by ``EXPORT_UNTIL_LAG_SECONDS``: ``updated_at`` is
+set before a save commits, so a post still being saved then would otherwise
+be older than the next delta's ``since`` by the time it becomes visible.
+Passing ``until`` back as ``since`` fetches the next delta.
+
+Under ASGI the view streams ``achunks()``: Django's ASGI handler can only
+stream an async iterator and would read a sync one to the end first.
+"""
+import zlib
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.negotiation import BaseContentNegotiation
+
+from .fastpath import PostRowSerializer, dumps
+from .models import Post
+from .serializers import PostSerializer
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'json': 'application/json',
+}
+
+
+def export_chunk_size():
+    return getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+
+
+def export_buffer_size():
+    return getattr(settings, 'EXPORT_BUFFER_SIZE', 64 * 1024)
+
+
+def export_until_lag():
+    return timedelta(seconds=getattr(settings, 'EXPORT_UNTIL_LAG_SECONDS', 30))
+
+
+def parse_since(value):
+    """An aware datetime from an ISO 8601 string; raises ``ValueError``."""
+    since = parse_datetime(value.strip().replace(' ', '+'))  # an unescaped "+" arrives as a space
+    if since is None:
+        raise ValueError(f"Invalid datetime: {value!r}")
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since)
+    return since
+
+
+class IgnoreClientContentNegotiation(BaseContentNegotiation):
+    """The export picks its output with ``?output=``; errors are always JSON."""
+
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+
+class PostExport:
+    """
+    One export run: ``chunks()`` yields the encoded body, ``count`` says
+    how many posts it held once consumed.
+    """
+
+    def __init__(self, output='ndjson', since=None, request=None, origin=None, chunk_size=None):
+        if output not in FORMATS:
+            raise ValueError(f"Unknown output {output!r}; expected one of {', '.join(FORMATS)}")
+        self.output = output
+        self.since = since
+        self.until = timezone.now() - export_until_lag()
+        self.serializer = PostRowSerializer(PostSerializer, request, origin=origin)
+        self.chunk_size = chunk_size or export_chunk_size()
+        self.count = 0
+
+    @property
+    def content_type(self):
+        return FORMATS[self.output]
+
+    def queryset(self):
+        posts = Post.objects.filter(updated_at__lte=self.until)
+        if self.since is not None:
+            posts = posts.filter(updated_at__gt=self.since)
+        return posts.order_by('updated_at', 'id').values(*self.serializer.columns)
+
+    def encoded_rows(self):
+        serializer = self.serializer
+        for row in self.queryset().iterator(chunk_size=self.chunk_size):
+            data = serializer.serialize_row(row)
+            self.count += 1
+            yield dumps(data, exact=serializer.exact)
+
+    def parts(self):
+        if self.output == 'ndjson':
+            for encoded in self.encoded_rows():
+                yield encoded
+                yield b'\n'
+            return
+        separator = b'['
+        for encoded in self.encoded_rows():
+            yield separator
+            yield encoded
+            separator = b','
+        yield b'[]' if separator == b'[' else b']'
+
+    def chunks(self, compress=False):
+        """The body in buffers of about ``EXPORT_BUFFER_SIZE`` bytes, gzipped if ``compress``."""
+        limit = export_buffer_size()
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+        buffer, size = [], 0
+        for part in self.parts():
+            buffer.append(part)
+            size += len(part)
+            if size >= limit:
+                data = b''.join(buffer)
+                buffer, size = [], 0
+                if compressor is not None:
+                    data = compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+                if data:
+                    yield data
+        data = b''.join(buffer)
+        if compressor is not None:
+            data = compressor.compress(data) + compressor.flush()
+        if data:
+            yield data
+
+    async def achunks(self, compress=False):
+        """
+        ``chunks()`` as an async iterator: each buffer is built in the
+        request's sync thread, where the cursor lives, and sent before the
+        next one is read.
+        """
+        chunks = self.chunks(compress)
+        next_chunk = sync_to_async(next, thread_sensitive=True)
+        try:
+            while (data := await next_chunk(chunks, None)) is not None:
+                yield data
+        finally:
+            # Also closes the cursor when the client goes away mid-export
+            await sync_to_async(chunks.close, thread_sensitive=True)()
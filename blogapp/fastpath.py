@@ -0,0 +1,178 @@
+"""
+Fast read-only serialization for the post GET endpoints.
+
+``PostRowSerializer`` builds the same structure as ``PostSerializer`` /
+``PostListSerializer`` from ``.values()`` rows, using one small extractor
+per field instead of DRF's per-field machinery, and ``dumps`` encodes it
+with orjson when installed (stdlib json otherwise). The bytes are exactly
+what DRF's ``JSONRenderer`` would produce, so views only take this path
+when the response is plain compact JSON (see ``fast_path_applies``).
+"""
+from operator import itemgetter
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.encoding import filepath_to_uri
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import ISO_8601, api_settings
+
+from .metrics import timed_serialization
+from .serializers import media_base_for, placeholder_name
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# JSONRenderer escapes these for JavaScript; orjson writes them raw
+LINE_SEPARATORS = ((b'\xe2\x80\xa8', b'\\u2028'), (b'\xe2\x80\xa9', b'\\u2029'))
+
+
+def dumps(data, exact=False):
+    """
+    Encode ``data`` to the bytes DRF's compact ``JSONRenderer`` would emit.
+
+    orjson formats float exponents differently (``1e16`` vs ``1e+16``), so
+    pass ``exact=True`` when ``data`` may hold floats.
+    """
+    if orjson is not None and not exact:
+        try:
+            content = orjson.dumps(data)
+        except TypeError:
+            # orjson.JSONEncodeError, e.g. an integer wider than 64 bits
+            pass
+        else:
+            for raw, escaped in LINE_SEPARATORS:
+                content = content.replace(raw, escaped)
+            return content
+    return JSONRenderer().render(data)
+
+
+class JSONBytesResponse(HttpResponse):
+    """An already encoded JSON body; DRF passes plain HttpResponses through untouched."""
+
+    def __init__(self, content, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(content, **kwargs)
+
+
+def fast_path_enabled():
+    """True when the settings let ``PostRowSerializer`` stand in for the serializers."""
+    return (
+        getattr(settings, 'POSTS_FAST_PATH', True)
+        and settings.USE_TZ
+        and api_settings.DATETIME_FORMAT == ISO_8601
+    )
+
+
+def fast_path_applies(request):
+    """True when DRF would render the response with a default, compact ``JSONRenderer``."""
+    renderer = getattr(request, 'accepted_renderer', None)
+    return (
+        type(renderer) is JSONRenderer
+        # A media type parameter such as "; indent=4" changes the output
+        and request.accepted_media_type == renderer.media_type
+        and renderer.compact
+        and not renderer.ensure_ascii
+        and fast_path_enabled()
+    )
+
+
+def format_datetime(value, tz):
+    """``serializers.DateTimeField.to_representation`` for aware datetimes."""
+    if not value:
+        return None
+    value = value.astimezone(tz).isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+class PostRowSerializer:
+    """
+    Serialize Post ``.values()`` rows into the output of ``serializer_class``.
+
+    ``columns`` lists the values to fetch. ``prefix`` is prepended to every
+    column, for rows read through a relation (``related__``). Without a
+    ``request``, media URLs are built on ``origin`` (``scheme://host``), or
+    on the same default as ``MediaURLMixin``. ``fields`` limits the output
+    (and so ``columns``) to a subset of the serializer's fields.
+    """
+
+    def __init__(self, serializer_class, request=None, prefix='', origin=None, fields=None):
+        self.fields = list(serializer_class.Meta.fields if fields is None else fields)
+        self.prefix = prefix
+        if request is not None:
+            scheme, host = request.scheme, request.get_host()
+        elif origin:
+            scheme, _, host = origin.rstrip('/').partition('://')
+        else:
+            scheme, host = 'http', 'localhost:8000'
+        self.base_url = media_base_for(scheme, host, settings.MEDIA_URL)
+        self.tz = timezone.get_current_timezone()
+        # Set when a row carries something orjson would encode differently
+        self.exact = False
+        self.columns = []
+        self.extractors = [(name, self.compile(name)) for name in self.fields]
+
+    def column(self, name):
+        key = self.prefix + name
+        if key not in self.columns:
+            self.columns.append(key)
+        return key
+
+    def compile(self, name):
+        if name in ('id', 'title', 'slug', 'excerpt', 'content', 'author'):
+            return itemgetter(self.column(name))
+        if name in ('published_at', 'updated_at'):
+            key, tz = self.column(name), self.tz
+            return lambda row: format_datetime(row[key], tz)
+        if name == 'tags':
+            key = self.column(name)
+
+            def tags(row):
+                value = row[key]
+                if type(value) is not list or any(type(tag) is not str for tag in value):
+                    self.exact = True
+                return value
+            return tags
+
+        base = self.base_url
+        if name == 'cover_image':
+            key = self.column(name)
+            return lambda row: f"{base}{filepath_to_uri(row[key])}" if row[key] else None
+        if name == 'cover_image_url':
+            key = self.column('cover_image')
+            placeholder_url = f"{base}{placeholder_name()}"
+            return lambda row: f"{base}{filepath_to_uri(row[key])}" if row[key] else placeholder_url
+        if name == 'cover_image_srcset':
+            key = self.column('cover_image_variants')
+
+            def srcset(row):
+                return [
+                    {
+                        'url': f"{base}{filepath_to_uri(variant['name'])}",
+                        'width': variant['width'],
+                        'height': variant['height'],
+                        'format': variant['format'],
+                    }
+                    for variant in (row[key] or {}).get('variants', [])
+                ]
+            return srcset
+        raise ValueError(f"No fast-path extractor for field {name!r}")
+
+    def serialize_row(self, row):
+        return {name: extract(row) for name, extract in self.extractors}
+
+    def serialize(self, rows):
+        extractors = self.extractors
+        # Iterating a values() queryset runs its query; keep that out of the timing
+        rows = list(rows)
+        with timed_serialization():
+            return [{name: extract(row) for name, extract in extractors} for row in rows]
+
+    def response(self, data, **kwargs):
+        with timed_serialization():
+            content = dumps(data, exact=self.exact)
+        return JSONBytesResponse(content, **kwargs)
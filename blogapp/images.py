@@ -0,0 +1,207 @@
+"""
+Cover image variants: fixed-width resizes in modern formats.
+
+A post whose cover changed gets an ``ImageVariantJob`` in the same
+transaction, and the outbox worker (``manage.py drain_outbox``) builds the
+variants with ``build_pending``, so web workers never spend CPU on image
+encoding and uploads never wait on Pillow. With ``IMAGE_VARIANTS_ASYNC``
+off (no worker, e.g. in development) they are built in the request once
+the transaction commits. ``manage.py generate_image_variants`` rebuilds
+whatever is missing or stale. Variant metadata lives in
+``Post.cover_image_variants``::
+
+    {"source": "posts/cover.png",
+     "variants": [{"name": ..., "width": 320, "height": 180, "format": "webp"}, ...]}
+
+File names carry a content hash, so they can be served as immutable.
+"""
+import hashlib
+import logging
+import os
+from datetime import timedelta
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from PIL import Image, ImageOps, features
+
+from .models import ImageVariantJob, Post
+from .outbox import outbox_setting, retry_delay
+
+logger = logging.getLogger('blogapp')
+
+# Pillow format name, file extension and encoder options per output format
+FORMATS = {
+    'avif': ('AVIF', 'avif', {'quality': 55}),
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+}
+
+def variant_widths():
+    return getattr(settings, 'IMAGE_VARIANT_WIDTHS', [320, 640, 1024, 1600])
+
+
+def variant_batch_size():
+    return getattr(settings, 'IMAGE_VARIANTS_BATCH_SIZE', 10)
+
+
+def variant_formats():
+    """Configured formats this Pillow build can actually encode."""
+    wanted = getattr(settings, 'IMAGE_VARIANT_FORMATS', ['avif', 'webp'])
+    return [fmt for fmt in wanted if fmt in FORMATS and features.check(fmt)]
+
+
+def target_widths(original_width):
+    widths = [w for w in variant_widths() if w < original_width]
+    # Always offer at least one re-encoded copy, even of a small original
+    return widths or [original_width]
+
+
+def encode(image, fmt):
+    pil_format, _, options = FORMATS[fmt]
+    buffer = BytesIO()
+    image.save(buffer, format=pil_format, **options)
+    return buffer.getvalue()
+
+
+def build_variants(source_name):
+    """Render and store every variant of ``source_name``; returns the metadata list."""
+    with default_storage.open(source_name, 'rb') as source:
+        original = ImageOps.exif_transpose(Image.open(source))
+        original.load()
+    if original.mode not in ('RGB', 'RGBA'):
+        original = original.convert('RGBA' if 'transparency' in original.info else 'RGB')
+
+    stem = os.path.splitext(os.path.basename(source_name))[0]
+    variants = []
+    for width in target_widths(original.width):
+        height = max(1, round(original.height * width / original.width))
+        resized = original if width == original.width else original.resize((width, height), Image.LANCZOS)
+        for fmt in variant_formats():
+            data = encode(resized, fmt)
+            digest = hashlib.sha256(data).hexdigest()[:12]
+            name = default_storage.save(
+                f"posts/variants/{stem}-{width}w-{digest}.{FORMATS[fmt][1]}", ContentFile(data))
+            variants.append({'name': name, 'width': width, 'height': height, 'format': fmt})
+    return variants
+
+
+def delete_variant_files(variants):
+    for variant in variants:
+        try:
+            default_storage.delete(variant['name'])
+        except OSError as e:
+            logger.warning(f"Could not delete image variant {variant['name']}: {e}")
+
+
+def generate_variants(post_id):
+    """
+    (Re)build the variants for one post's current cover image.
+
+    Returns False if the build failed (e.g. the upload could not be read),
+    True otherwise.
+    """
+    from .cache import invalidate_posts
+    from .documents import refresh_posts
+
+    post = Post.objects.filter(pk=post_id).only('id', 'cover_image', 'cover_image_variants').first()
+    if post is None:
+        return True
+    previous = post.cover_image_variants.get('variants', [])
+    source = post.cover_image.name if post.cover_image else ''
+
+    if not source:
+        metadata = {}
+    else:
+        try:
+            metadata = {'source': source, 'variants': build_variants(source)}
+        except Exception as e:
+            logger.error(f"Failed to build image variants for post {post_id}: {e}")
+            return False
+
+    # Only store them if the cover was not replaced while we were working
+    current = Post.objects.filter(pk=post_id)
+    if source:
+        current = current.filter(cover_image=source)
+    else:
+        current = current.filter(Q(cover_image='') | Q(cover_image__isnull=True))
+    # Touch updated_at as well so ETags and Last-Modified pick up the new srcset
+    if current.update(cover_image_variants=metadata, updated_at=timezone.now()):
+        delete_variant_files([v for v in previous if v not in metadata.get('variants', [])])
+        refresh_posts([post_id])
+        invalidate_posts()
+    else:
+        delete_variant_files(metadata.get('variants', []))
+    return True
+
+
+def claim_jobs(limit):
+    """
+    Lease up to ``limit`` due jobs to this worker, as ``outbox.claim_batch``
+    does for messages: the rows stay queued until the build succeeds.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        due = ImageVariantJob.objects.filter(next_attempt_at__lte=now).order_by('next_attempt_at', 'post_id')
+        if connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        jobs = list(due[:limit])
+        if jobs:
+            lease = timedelta(seconds=outbox_setting('LEASE_SECONDS', 300))
+            ImageVariantJob.objects.filter(pk__in=[job.pk for job in jobs]).update(next_attempt_at=now + lease)
+    return jobs
+
+
+def record_job_failure(job):
+    # Filtering on queued_at leaves a job re-queued for a newer cover alone
+    current = ImageVariantJob.objects.filter(pk=job.pk, queued_at=job.queued_at)
+    attempts = job.attempts + 1
+    if attempts >= getattr(settings, 'IMAGE_VARIANTS_MAX_ATTEMPTS', 5):
+        logger.error(f"Giving up on image variants for post {job.post_id} after {attempts} attempts")
+        current.delete()
+    else:
+        current.update(attempts=attempts, next_attempt_at=timezone.now() + retry_delay(attempts))
+
+
+def build_pending(limit=None):
+    """
+    Build the variants of up to ``limit`` due posts, oldest first.
+
+    A job is only removed once its build succeeded; a failed build is
+    retried with the outbox's backoff, and a worker that dies mid-build
+    gives its jobs back when the lease expires. Returns how many posts
+    were built.
+    """
+    done = 0
+    for job in claim_jobs(limit or variant_batch_size()):
+        try:
+            built = generate_variants(job.post_id)
+        except Exception as e:
+            logger.error(f"Image variant job for post {job.post_id} failed: {e}")
+            built = False
+        if built:
+            ImageVariantJob.objects.filter(pk=job.pk, queued_at=job.queued_at).delete()
+            done += 1
+        else:
+            record_job_failure(job)
+    return done
+
+
+def schedule_variants(post):
+    """Queue variant generation if the post's cover image changed since the last run."""
+    source = post.cover_image.name if post.cover_image else ''
+    if source == (post.cover_image_variants or {}).get('source', ''):
+        return
+    post_id = post.pk
+    if getattr(settings, 'IMAGE_VARIANTS_ASYNC', True):
+        # Re-queueing resets the job, so a build of the previous cover that
+        # finishes meanwhile does not remove it
+        now = timezone.now()
+        ImageVariantJob.objects.update_or_create(
+            post_id=post_id, defaults={'queued_at': now, 'next_attempt_at': now, 'attempts': 0},
+        )
+    else:
+        transaction.on_commit(lambda: generate_variants(post_id))
@@ -0,0 +1,121 @@
+"""
+Bulk post ingestion for ``POST /api/posts/bulk/``.
+
+The body is a JSON array of posts or an NDJSON stream (one post per line,
+``Content-Type: application/x-ndjson``); NDJSON is parsed lazily, so a
+large import is read, validated and written ``BULK_POSTS_BATCH_SIZE``
+posts at a time rather than held in memory. Each batch is validated item
+by item with one serializer instance, given slugs with one reservation
+and inserted with ``bulk_create`` in its own transaction, together with
+its tag, search and (optionally) related-post index updates and the new
+posts' render-on-write documents.
+"""
+import json
+import logging
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from rest_framework import serializers
+from rest_framework.parsers import BaseParser
+
+from . import search
+from .documents import refresh_posts, render_documents
+from .models import Post
+from .related import add_related_posts, index_new_posts
+from .slugs import assign_slugs
+
+logger = logging.getLogger('blogapp')
+
+
+def bulk_batch_size():
+    return getattr(settings, 'BULK_POSTS_BATCH_SIZE', 500)
+
+
+class InvalidLine:
+    """Stands in for an NDJSON line that is not valid JSON."""
+
+    def __init__(self, error):
+        self.error = error
+
+
+def iter_ndjson(stream, encoding='utf-8'):
+    """Yield the value on each non-blank line of ``stream``, or ``InvalidLine``."""
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line.decode(encoding) if isinstance(line, bytes) else line)
+        except ValueError as e:
+            yield InvalidLine(f'Invalid JSON: {e}')
+
+
+class NDJSONParser(BaseParser):
+    """Newline-delimited JSON; ``request.data`` becomes a lazy iterator of the lines."""
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        return iter_ndjson(stream or [], encoding)
+
+
+def batches(items, size):
+    batch = []
+    for index, item in enumerate(items):
+        batch.append((index, item))
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def ingest_posts(items, serializer, author, batch_size=None, with_related=True):
+    """
+    Validate and insert ``items`` (an iterable of dicts) as posts by ``author``.
+
+    ``serializer`` validates one item at a time. Returns one result per item,
+    in input order: ``{"index", "status": "created", "id", "slug"}`` or
+    ``{"index", "status": "invalid" | "error", "errors"}``.
+    """
+    results = []
+    for batch in batches(items, batch_size or bulk_batch_size()):
+        valid = []
+        for index, item in batch:
+            if isinstance(item, InvalidLine):
+                results.append({'index': index, 'status': 'invalid',
+                                'errors': {'non_field_errors': [item.error]}})
+                continue
+            try:
+                valid.append((index, serializer.run_validation(item)))
+            except serializers.ValidationError as e:
+                results.append({'index': index, 'status': 'invalid', 'errors': e.detail})
+
+        if not valid:
+            continue
+        posts = [Post(author=author, **data) for _, data in valid]
+        assign_slugs(posts)
+        try:
+            with transaction.atomic():
+                Post.objects.bulk_create(posts)
+                tag_ids = index_new_posts(posts)
+                search.index_posts(posts)
+                if with_related:
+                    add_related_posts(tag_ids)
+                    refresh_posts([post.pk for post in posts])
+                else:
+                    render_documents([post.pk for post in posts])
+        except DatabaseError as e:
+            logger.error(f"Database error in bulk post batch: {str(e)}")
+            results.extend(
+                {'index': index, 'status': 'error', 'errors': {'non_field_errors': ['Database error occurred']}}
+                for index, _ in valid
+            )
+            continue
+        results.extend(
+            {'index': index, 'status': 'created', 'id': post.pk, 'slug': post.slug}
+            for (index, _), post in zip(valid, posts)
+        )
+
+    results.sort(key=lambda result: result['index'])
+    return results
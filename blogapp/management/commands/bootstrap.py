@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+import pkgutil
+import time
+from importlib import import_module
+
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError
+from django.db.migrations.loader import MigrationLoader
+
+from blogapp.models import BootstrapState, Post
+
+SAMPLE_POSTS = [
+    {
+        'title': 'Getting Started with React',
+        'excerpt': 'Learn the basics of React and build your first app.',
+        'content': '<p>React is a JavaScript library for building user interfaces. It makes it painless to create interactive UIs. Design simple views for each state in your application, and React will efficiently update and render just the right components when your data changes.</p><p>Declarative views make your code more predictable and easier to debug.</p>',
+        'tags': ['react', 'javascript', 'frontend']
+    },
+    {
+        'title': 'Introduction to Django REST Framework',
+        'excerpt': 'Build powerful APIs with Django REST Framework.',
+        'content': '<p>Django REST framework is a powerful and flexible toolkit for building Web APIs. Some reasons you might want to use REST framework:</p><ul><li>The Web browsable API is a huge usability win for your developers.</li><li>Authentication policies including packages for OAuth1a and OAuth2.</li><li>Serialization that supports both ORM and non-ORM data sources.</li></ul>',
+        'tags': ['django', 'python', 'backend', 'api']
+    },
+    {
+        'title': 'Creating a Modern Blog with React and Django',
+        'excerpt': 'A comprehensive guide to building a modern blog with React and Django.',
+        'content': '<p>In this tutorial, we will build a modern blog application using React for the frontend and Django for the backend. We will cover everything from setting up the project to deploying it to production.</p><p>The blog will have features like user authentication, comments, and a rich text editor for writing posts.</p>',
+        'tags': ['react', 'django', 'fullstack', 'tutorial']
+    },
+    {
+        'title': 'Modern CSS Techniques',
+        'excerpt': 'Learn about modern CSS techniques like Flexbox and Grid.',
+        'content': '<p>CSS has come a long way since its inception. With modern features like Flexbox and Grid, we can create complex layouts with ease.</p><p>In this article, we will explore some of the most powerful CSS techniques that you can use in your projects today.</p>',
+        'tags': ['css', 'frontend', 'web design']
+    },
+    {
+        'title': 'The Power of TailwindCSS',
+        'excerpt': 'Discover why TailwindCSS is becoming so popular among developers.',
+        'content': '<p>TailwindCSS is a utility-first CSS framework packed with classes like flex, pt-4, text-center, and rotate-90 that can be composed to build any design, directly in your markup.</p><p>Instead of opinionated predesigned components, Tailwind provides low-level utility classes that let you build completely custom designs without ever leaving your HTML.</p>',
+        'tags': ['css', 'tailwind', 'frontend']
+    }
+]
+
+
+def fingerprint(value):
+    return hashlib.sha256(json.dumps(value, sort_keys=True).encode()).hexdigest()
+
+
+def migration_names():
+    """``app_label.migration`` for every migration file on disk, without importing them."""
+    names = []
+    for app_config in apps.get_app_configs():
+        module_name, _ = MigrationLoader.migrations_module(app_config.label)
+        if module_name is None:
+            continue
+        try:
+            module = import_module(module_name)
+        except ImportError:
+            continue
+        if not hasattr(module, '__path__'):
+            continue
+        names.extend(
+            f'{app_config.label}.{name}'
+            for _, name, is_pkg in pkgutil.iter_modules(module.__path__)
+            if not is_pkg and name[0] not in '_~'
+        )
+    return sorted(names)
+
+
+def superuser_settings():
+    # The same variables "createsuperuser --noinput" reads
+    return {
+        'username': os.getenv('DJANGO_SUPERUSER_USERNAME', 'admin'),
+        'email': os.getenv('DJANGO_SUPERUSER_EMAIL', 'admin@example.com'),
+    }
+
+
+class Command(BaseCommand):
+    help = ('Prepare the database for serving: apply migrations, ensure a superuser exists and '
+            'create the sample posts. Phases whose inputs are unchanged since the last run are skipped.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true',
+                            help='Run every phase even if its fingerprint is unchanged')
+        parser.add_argument('--skip-sample-posts', action='store_true',
+                            help='Do not create the sample posts')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            done = dict(BootstrapState.objects.values_list('phase', 'fingerprint'))
+        except DatabaseError:
+            # First deploy: the state table does not exist yet
+            done = {}
+
+        phases = [
+            ('schema', fingerprint(migration_names()), self.migrate),
+            ('superuser', fingerprint(superuser_settings()), self.ensure_superuser),
+        ]
+        if not options['skip_sample_posts']:
+            phases.append(('sample_posts', fingerprint(SAMPLE_POSTS), self.create_sample_posts))
+
+        for phase, digest, run in phases:
+            phase_started = time.perf_counter()
+            if not options['force'] and done.get(phase) == digest:
+                outcome = 'unchanged, skipped'
+            else:
+                outcome = run(options['verbosity'])
+                BootstrapState.objects.update_or_create(phase=phase, defaults={'fingerprint': digest})
+            elapsed = (time.perf_counter() - phase_started) * 1000
+            self.stdout.write(f'{phase}: {outcome} ({elapsed:.0f} ms)')
+
+        elapsed = (time.perf_counter() - started) * 1000
+        self.stdout.write(self.style.SUCCESS(f'Bootstrap finished in {elapsed:.0f} ms'))
+
+    def migrate(self, verbosity):
+        call_command('migrate', interactive=False, verbosity=max(0, verbosity - 1))
+        return 'migrations applied'
+
+    def ensure_superuser(self, verbosity):
+        if User.objects.filter(is_superuser=True).exists():
+            return 'superuser exists'
+        settings = superuser_settings()
+        User.objects.create_superuser(settings['username'], settings['email'],
+                                      os.getenv('DJANGO_SUPERUSER_PASSWORD', 'Admin@123'))
+        return f"superuser {settings['username']!r} created"
+
+    def create_sample_posts(self, verbosity):
+        author = User.objects.filter(is_superuser=True).order_by('pk').first()
+        existing = set(Post.objects.filter(title__in=[p['title'] for p in SAMPLE_POSTS])
+                       .values_list('title', flat=True))
+        created = 0
+        for data in SAMPLE_POSTS:
+            if data['title'] not in existing:
+                # save() keeps the tag, search and related indexes in step
+                Post.objects.create(author=author, **data)
+                created += 1
+        return f'{created} sample posts created'
@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from blogapp.images import build_pending
+from blogapp.outbox import drain
+
+
+class Command(BaseCommand):
+    help = ('Deliver queued outbox emails in batches, retrying failures with backoff, '
+            'and build queued cover image variants')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Messages per batch (default: OUTBOX_BATCH_SIZE)')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep polling for new work instead of exiting when the queues are empty')
+        parser.add_argument('--interval', type=float, default=5.0,
+                            help='Seconds to sleep between polls when idle in --loop mode')
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = total_variants = 0
+        while True:
+            sent, failed = drain(options['batch_size'])
+            total_sent += sent
+            total_failed += failed
+            if sent or failed:
+                self.stdout.write(f'Batch: {sent} sent, {failed} failed')
+            variants = build_pending()
+            total_variants += variants
+            if variants:
+                self.stdout.write(f'Image variants built for {variants} posts')
+            if sent or failed or variants:
+                continue
+            if not options['loop']:
+                break
+            close_old_connections()
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Outbox drained: {total_sent} sent, {total_failed} failed; '
+            f'image variants built for {total_variants} posts'
+        ))
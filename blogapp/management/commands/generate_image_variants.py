@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from blogapp.images import generate_variants
+from blogapp.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Build resized WebP/AVIF variants for post cover images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='Rebuild every post, not only those whose variants are missing or stale')
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(cover_image='').exclude(cover_image__isnull=True)\
+            .only('id', 'cover_image', 'cover_image_variants')
+        done = 0
+        for post in posts.iterator(chunk_size=500):
+            if options['all'] or post.cover_image_variants.get('source') != post.cover_image.name:
+                generate_variants(post.pk)
+                done += 1
+        self.stdout.write(self.style.SUCCESS(f'Built image variants for {done} posts.'))
@@ -0,0 +1,73 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max
+
+from blogapp.cache import invalidate_posts
+from blogapp.documents import documents_enabled
+from blogapp.models import Post
+from blogapp.related import rebuild_all
+from blogapp.seeding import PostGenerator, copy_supported, ensure_authors, generate_posts, write_batches
+
+
+class Command(BaseCommand):
+    help = ('Generate synthetic posts for capacity testing: realistic tags, authors, content '
+            'lengths and cover images, inserted in batches (COPY on PostgreSQL)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('count', type=int, help='Number of posts to create')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--authors', type=int, default=50, help='Author accounts to spread posts over')
+        parser.add_argument('--tags', type=int, default=500, help='Size of the tag vocabulary')
+        parser.add_argument('--content-length', type=int, default=3000,
+                            help='Median body length in characters')
+        parser.add_argument('--cover-ratio', type=float, default=0.4,
+                            help='Fraction of posts with a cover image reference')
+        parser.add_argument('--days', type=int, default=1095, help='Spread publication dates over this many days')
+        parser.add_argument('--seed', type=int, default=None, help='Random seed, for repeatable data')
+        parser.add_argument('--method', choices=['auto', 'copy', 'bulk'], default='auto',
+                            help='Insert with COPY (PostgreSQL only) or bulk_create; auto prefers COPY')
+        parser.add_argument('--related', action='store_true',
+                            help='Rebuild the related-posts table afterwards (slow for large counts)')
+
+    def handle(self, *args, **options):
+        count, batch_size = options['count'], options['batch_size']
+        if count < 1 or batch_size < 1:
+            raise CommandError('count and --batch-size must be positive')
+        if options['method'] == 'copy' and not copy_supported():
+            raise CommandError('COPY needs PostgreSQL; use --method bulk')
+        use_copy = options['method'] != 'bulk' and copy_supported()
+
+        generator = PostGenerator(
+            random.Random(options['seed']), ensure_authors(options['authors']),
+            tag_count=options['tags'], content_median=options['content_length'],
+            cover_ratio=options['cover_ratio'], days=options['days'],
+        )
+        # Numbering from the highest id keeps cover image names unique across runs
+        start = (Post.objects.aggregate(n=Max('id'))['n'] or 0) + 1
+
+        started = time.perf_counter()
+        report_every = max(batch_size, count // 20)
+
+        def progress(written):
+            if written % report_every < batch_size or written == count:
+                rate = written / (time.perf_counter() - started)
+                self.stdout.write(f'{written}/{count} posts ({rate:.0f} rows/s)')
+
+        written = write_batches(generate_posts(generator, count, start), batch_size, use_copy, progress)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Inserted {written} posts with {'COPY' if use_copy else 'bulk_create'} in {elapsed:.1f}s "
+            f"({written / elapsed:.0f} rows/s, tag and search indexes included)"
+        ))
+
+        if options['related']:
+            related_started = time.perf_counter()
+            rebuild_all()
+            self.stdout.write(f'Related posts rebuilt in {time.perf_counter() - related_started:.1f}s')
+        else:
+            self.stdout.write('Related posts not computed; run "manage.py rebuild_related" if needed.')
+        if documents_enabled():
+            self.stdout.write('Post documents not rendered; run "manage.py render_documents" if needed.')
+        invalidate_posts()
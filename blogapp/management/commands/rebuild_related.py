@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from blogapp.documents import render_all
+from blogapp.related import rebuild_all
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the tag index and the precomputed related-posts table from Post.tags'
+
+    def handle(self, *args, **options):
+        rebuild_all()
+        # Every related list may have changed
+        rendered = render_all()
+        self.stdout.write(self.style.SUCCESS(
+            'Tag index and related posts rebuilt' + (f'; documents of {rendered} posts rendered.' if rendered else '.')
+        ))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from blogapp.search import get_backend, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Drop and rebuild the full-text search index from every post'
+
+    def handle(self, *args, **options):
+        if get_backend() is None:
+            self.stdout.write(self.style.WARNING('Full-text search is not supported on this database.'))
+            return
+        rebuild_index()
+        self.stdout.write(self.style.SUCCESS('Search index rebuilt.'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from blogapp.documents import documents_enabled, render_all
+
+
+class Command(BaseCommand):
+    help = 'Render (and compress) the stored detail and related responses of every post for SITE_URL'
+
+    def handle(self, *args, **options):
+        if not documents_enabled():
+            self.stdout.write(self.style.WARNING('SITE_URL is not set; post documents are off.'))
+            return
+        count = render_all()
+        self.stdout.write(self.style.SUCCESS(f'Rendered the documents of {count} posts.'))
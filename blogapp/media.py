@@ -0,0 +1,167 @@
+"""
+Media file serving for ``/media/``.
+
+Replaces ``django.views.static.serve`` with a handler that sends cache
+validators and long-lived ``Cache-Control`` for content-hashed names,
+answers conditional and single-range requests, streams bodies (using the
+server's sendfile through ``wsgi.file_wrapper``) or hands the transfer to
+the front-end server via ``X-Accel-Redirect``/``X-Sendfile``, and keeps the
+missing-image placeholder in memory.
+"""
+import hashlib
+import mimetypes
+import os
+import re
+import stat
+from functools import lru_cache
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseNotAllowed, StreamingHttpResponse,
+)
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+# Image variants, and only those, are named after their content:
+# "posts/variants/<stem>-<width>w-<12 hex digits of sha256>.<avif|webp>"
+# (see blogapp.images.build_variants). Uploads keep the name they came with,
+# so they may be replaced under it and are never served as immutable.
+HASHED_NAME_RE = re.compile(r'^posts/variants/[^/]+-\d+w-[0-9a-f]{12}\.(?:avif|webp)$')
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+STREAM_CHUNK_SIZE = 64 * 1024
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+def media_max_age():
+    return getattr(settings, 'MEDIA_CACHE_MAX_AGE', 3600)
+
+
+@lru_cache(maxsize=1)
+def placeholder():
+    """The placeholder image bytes and ETag, read from disk once per process."""
+    path = os.path.join(settings.BASE_DIR, 'placeholder.jpg')
+    with open(path, 'rb') as f:
+        data = f.read()
+    return data, '"%s"' % hashlib.sha1(data, usedforsecurity=False).hexdigest()
+
+
+def serve_placeholder(request):
+    data, etag = placeholder()
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(b'' if request.method == 'HEAD' else data, content_type='image/jpeg')
+        response['Content-Length'] = len(data)
+    response['ETag'] = etag
+    # The real file may show up later, so keep this short
+    response['Cache-Control'] = 'public, max-age=300'
+    return response
+
+
+def parse_range(header, size):
+    """Return ``(start, end)`` (inclusive) for a single byte range, ``None`` if absent or unsupported."""
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError('Unsatisfiable range')
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError('Unsatisfiable range')
+    return start, end
+
+
+def if_range_matches(request, etag, last_modified):
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith('"') or if_range.startswith('W/'):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def read_range(path, start, length):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(STREAM_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def offload(path, content_type):
+    """Let the front-end server send the file, if configured."""
+    prefix = getattr(settings, 'MEDIA_ACCEL_REDIRECT_PREFIX', None)
+    if prefix:
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + quote(path)
+        return response
+    if getattr(settings, 'MEDIA_X_SENDFILE', False):
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = os.path.join(settings.MEDIA_ROOT, path)
+        return response
+    return None
+
+
+def serve_media(request, path):
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponseNotAllowed(['GET', 'HEAD'])
+    try:
+        fullpath = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404('Invalid media path')
+    try:
+        st = os.stat(fullpath)
+    except OSError:
+        st = None
+    if st is None or not stat.S_ISREG(st.st_mode):
+        return serve_placeholder(request)
+
+    size = st.st_size
+    last_modified = int(st.st_mtime)
+    etag = f'"{st.st_mtime_ns:x}-{size:x}"'
+    content_type = mimetypes.guess_type(fullpath)[0] or 'application/octet-stream'
+    cache_control = IMMUTABLE_CACHE_CONTROL if HASHED_NAME_RE.match(path) \
+        else f'public, max-age={media_max_age()}'
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = offload(path, content_type)
+    if response is None:
+        try:
+            byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+        if byte_range and if_range_matches(request, etag, last_modified):
+            start, end = byte_range
+            length = end - start + 1
+            body = [] if request.method == 'HEAD' else read_range(fullpath, start, length)
+            response = StreamingHttpResponse(body, status=206, content_type=content_type)
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+            response['Content-Length'] = length
+        elif request.method == 'HEAD':
+            response = HttpResponse(content_type=content_type)
+            response['Content-Length'] = size
+        else:
+            response = FileResponse(open(fullpath, 'rb'), content_type=content_type)
+            response['Content-Length'] = size
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = cache_control
+    response['Accept-Ranges'] = 'bytes'
+    return response
@@ -0,0 +1,181 @@
+"""
+In-process request metrics for the API.
+
+``RequestMetricsMiddleware`` (blogapp.middleware) fills a ``RequestMetrics``
+for each sampled request; finished requests are folded into ``registry``,
+which keeps a rolling window of recent observations per view (for the
+p50/p95/p99 quantiles) plus running sums and counts, and renders them in
+the Prometheus text format for ``/api/_metrics``.
+
+SQL is counted by ``record_query``, installed on every database connection
+as it opens. It finds the request through a context variable, which
+asgiref carries into the threads that run ORM calls for async views, so
+queries are counted on both paths.
+"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Series name -> help text, in exposition order
+SERIES = {
+    'request_duration_seconds': 'Time spent handling the request inside Django.',
+    'db_duration_seconds': 'Time spent executing SQL.',
+    'db_queries': 'SQL queries executed.',
+    'serialize_duration_seconds': 'Time spent serializing and rendering the response body.',
+    'response_bytes': 'Response body size.',
+}
+
+_current = ContextVar('blogapp_request_metrics', default=None)
+
+
+def sample_rate():
+    return getattr(settings, 'METRICS_SAMPLE_RATE', 1.0)
+
+
+def window_size():
+    return getattr(settings, 'METRICS_WINDOW', 1024)
+
+
+class RequestMetrics:
+    """Counters for one sampled request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+
+    def record_query(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries += 1
+
+
+def current():
+    """Metrics of the request being handled, or ``None`` if it is not sampled."""
+    return _current.get()
+
+
+def record_query(execute, sql, params, many, context):
+    """``connection.execute_wrapper`` hook: counts the query for the current request, if sampled."""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics.record_query(execute, sql, params, many, context)
+
+
+def install_query_hook(sender, connection, **kwargs):
+    """``connection_created`` receiver."""
+    if record_query not in connection.execute_wrappers:
+        # First, so that the pop() ending an execute_wrapper() block removes its own hook
+        connection.execute_wrappers.insert(0, record_query)
+
+
+def activate(metrics):
+    return _current.set(metrics)
+
+
+def deactivate(token):
+    _current.reset(token)
+
+
+@contextmanager
+def timed_serialization():
+    """Count the enclosed block as serialization time of the current request."""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.serialize_time += time.perf_counter() - start
+
+
+def quantile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class MetricsRegistry:
+    """Thread-safe rolling windows and totals, keyed by view."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._windows = {}
+            self._totals = {}
+            self._requests = {}
+
+    def observe(self, view, method, status, values):
+        with self._lock:
+            key = (view, method, status)
+            self._requests[key] = self._requests.get(key, 0) + 1
+            for name, value in values.items():
+                window = self._windows.get((name, view))
+                if window is None:
+                    window = self._windows[(name, view)] = deque(maxlen=window_size())
+                window.append(value)
+                totals = self._totals.setdefault((name, view), [0.0, 0])
+                totals[0] += value
+                totals[1] += 1
+
+    def snapshot(self):
+        """``{series: {view: {'quantiles': {q: value}, 'sum': s, 'count': n}}}``."""
+        with self._lock:
+            windows = {key: sorted(window) for key, window in self._windows.items()}
+            totals = {key: tuple(value) for key, value in self._totals.items()}
+            requests = dict(self._requests)
+        series = {}
+        for (name, view), ordered in windows.items():
+            total, count = totals[(name, view)]
+            series.setdefault(name, {})[view] = {
+                'quantiles': {q: quantile(ordered, q) for q in QUANTILES},
+                'sum': total,
+                'count': count,
+            }
+        return series, requests
+
+    def render_prometheus(self):
+        series, requests = self.snapshot()
+        lines = [
+            '# HELP blogapp_metrics_sample_rate Fraction of requests that are measured.',
+            '# TYPE blogapp_metrics_sample_rate gauge',
+            f'blogapp_metrics_sample_rate {sample_rate()}',
+            '# HELP blogapp_requests_total Sampled requests.',
+            '# TYPE blogapp_requests_total counter',
+        ]
+        for (view, method, status), count in sorted(requests.items()):
+            lines.append(
+                f'blogapp_requests_total{{view="{escape_label(view)}",method="{method}",status="{status}"}} {count}'
+            )
+        for name, help_text in SERIES.items():
+            metric = f'blogapp_{name}'
+            lines.append(f'# HELP {metric} {help_text} Quantiles cover the last {window_size()} samples.')
+            lines.append(f'# TYPE {metric} summary')
+            for view, stats in sorted(series.get(name, {}).items()):
+                label = f'view="{escape_label(view)}"'
+                for q, value in stats['quantiles'].items():
+                    lines.append(f'{metric}{{{label},quantile="{q}"}} {value:.6g}')
+                lines.append(f'{metric}_sum{{{label}}} {stats["sum"]:.6g}')
+                lines.append(f'{metric}_count{{{label}}} {stats["count"]}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
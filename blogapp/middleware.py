@@ -1 +1,268 @@
-# This file can be empty as we're handling HTTPS at the settings level
\ No newline at end of file
+"""
+Middleware for the blogapp API.
+
+HTTPS is handled at the settings level; this module holds the request
+metrics middleware, the response compression middleware and an
+async-capable WhiteNoise.
+"""
+import hashlib
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_vary_headers
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from . import compression, metrics
+from .cache import shared_cache
+
+
+def view_label(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.view_name or match.route or 'unnamed'
+
+
+class RequestMetricsMiddleware:
+    """
+    Measure sampled requests: SQL query count and time, serialization time,
+    response size and total time.
+
+    Sampled responses carry a ``Server-Timing`` header and are recorded in
+    ``blogapp.metrics.registry``. ``METRICS_SAMPLE_RATE`` (0-1) bounds the
+    overhead; unsampled requests cost one random number (and a context
+    variable lookup per query).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def sampled(self):
+        rate = metrics.sample_rate()
+        return rate >= 1 or (rate > 0 and random.random() < rate)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+
+        request_metrics = request._request_metrics = metrics.RequestMetrics()
+        token = metrics.activate(request_metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.deactivate(token)
+        return self.record(request, request_metrics, response)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+
+        request_metrics = request._request_metrics = metrics.RequestMetrics()
+        token = metrics.activate(request_metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.deactivate(token)
+        return self.record(request, request_metrics, response)
+
+    def record(self, request, request_metrics, response):
+        total = time.perf_counter() - request_metrics.started
+        if response.streaming:
+            size = int(response.get('Content-Length', 0))
+        else:
+            size = len(response.content)
+
+        timings = [
+            f'db;dur={request_metrics.db_time * 1000:.1f};desc="{request_metrics.queries} queries"',
+            f'serialize;dur={request_metrics.serialize_time * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ]
+        values = {
+            'request_duration_seconds': total,
+            'db_duration_seconds': request_metrics.db_time,
+            'db_queries': request_metrics.queries,
+            'serialize_duration_seconds': request_metrics.serialize_time,
+            'response_bytes': size,
+        }
+        response['Server-Timing'] = ', '.join(timings)
+        metrics.registry.observe(view_label(request), request.method, response.status_code, values)
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF renders its Response right after this hook; count that as serialization
+        request_metrics = getattr(request, '_request_metrics', None)
+        if request_metrics is not None:
+            start = time.perf_counter()
+
+            def rendered(response):
+                request_metrics.serialize_time += time.perf_counter() - start
+            response.add_post_render_callback(rendered)
+        return response
+
+
+class CompressionMiddleware:
+    """
+    Compress responses with the best coding the client accepts: brotli,
+    zstd (when their packages are installed) or gzip, at
+    ``COMPRESSION_LEVELS``.
+
+    Only the API's JSON and NDJSON are compressed (see
+    ``compression.COMPRESSIBLE_TYPES``): HTML pages carry CSRF tokens, which
+    compression would expose to BREACH. Also skipped for bodies under
+    ``COMPRESSION_MIN_SIZE`` bytes, ``Cache-Control: no-transform`` and
+    responses that already have a ``Content-Encoding`` (render-on-write
+    documents). Streaming responses, such as the post export, are
+    compressed chunk by chunk, each flushed as it is produced.
+
+    A compressed body with a strong ETag is cached under that ETag for
+    ``COMPRESSION_CACHE_TIMEOUT`` seconds, so repeated responses (response
+    cache hits, unchanged posts) skip the compressor. The ETag itself is
+    weakened, as Django's ``GZipMiddleware`` does, and still matches the
+    view's in ``If-None-Match``.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        # 206: ranges are of the identity body
+        if (response.status_code < 200 or response.status_code in (204, 206, 304)
+                or response.has_header('Content-Encoding')
+                or not compression.compressible(response.get('Content-Type'))
+                or 'no-transform' in response.get('Cache-Control', '')):
+            return response
+        if not response.streaming and len(response.content) < compression_min_size():
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        coding = compression.negotiate_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if coding is None:
+            return response
+        level = compression_levels().get(coding)
+
+        if response.streaming:
+            encoder = compression.StreamEncoder(coding, level)
+            if response.is_async:
+                response.streaming_content = aencode_stream(response.streaming_content, encoder)
+            else:
+                response.streaming_content = encode_stream(response.streaming_content, encoder)
+            # The length is no longer known
+            del response['Content-Length']
+        else:
+            content = response.content
+            key = self.cache_key(request, response, coding, level)
+            encoded = cache.get(key) if key else None
+            if encoded is None:
+                encoded = compression.encode(content, coding, level)
+                if len(encoded) >= len(content):
+                    return response
+                if key:
+                    cache.set(key, encoded, compression_cache_timeout())
+            response.content = encoded
+            response['Content-Length'] = str(len(encoded))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = f'W/{etag}'
+        response['Content-Encoding'] = coding
+        return response
+
+    def cache_key(self, request, response, coding, level):
+        etag = response.get('ETag', '')
+        if (not etag.startswith('"') or not compression_cache_timeout()
+                or len(response.content) < compression_cache_min_size()):
+            return None
+        # ETags need only be unique per URL
+        digest = hashlib.md5(f'{request.get_full_path()}|{etag}'.encode('utf-8'), usedforsecurity=False).hexdigest()
+        return f'blogapp:compressed:{coding}:{level}:{digest}'
+
+
+def compression_min_size():
+    return getattr(settings, 'COMPRESSION_MIN_SIZE', 1024)
+
+
+def compression_levels():
+    return {**compression.DEFAULT_LEVELS, **getattr(settings, 'COMPRESSION_LEVELS', {})}
+
+
+def compression_cache_timeout():
+    # A per-process cache would hold a copy of every body in every worker
+    if not shared_cache():
+        return 0
+    return getattr(settings, 'COMPRESSION_CACHE_TIMEOUT', 300)
+
+
+def compression_cache_min_size():
+    return getattr(settings, 'COMPRESSION_CACHE_MIN_SIZE', 8192)
+
+
+def encode_stream(chunks, encoder):
+    for chunk in chunks:
+        data = encoder.encode(chunk)
+        if data:
+            yield data
+    yield encoder.finish()
+
+
+async def aencode_stream(chunks, encoder):
+    async for chunk in chunks:
+        data = encoder.encode(chunk)
+        if data:
+            yield data
+    yield encoder.finish()
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """
+    ``WhiteNoiseMiddleware`` that can sit in an async middleware chain.
+
+    WhiteNoise is sync-only, so under ASGI Django would run it, and every
+    request passing through it, on the single thread-sensitive executor
+    thread. Static file lookups are dictionary hits (or finder lookups with
+    autorefresh), which are fine to do on the event loop.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = self.find_file(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
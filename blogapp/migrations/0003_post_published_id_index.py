@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-18 02:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogapp', '0002_contact'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-published_at', '-id'], name='blogapp_post_published_id_idx'),
+        ),
+    ]
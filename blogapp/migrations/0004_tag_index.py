@@ -0,0 +1,137 @@
+# Generated by Django 5.2 on 2026-10-18 02:50
+
+import math
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Frozen copies of the blogapp.related helpers as they stood when this
+# migration was written, so later changes there cannot alter the backfill
+
+def normalize_tags(tags):
+    names = []
+    for tag in tags or []:
+        if not isinstance(tag, str):
+            continue
+        name = tag.strip().lower()[:100]
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def similarity(shared, size_a, size_b, published_a, published_b, half_life_days):
+    if not shared:
+        return 0.0
+    jaccard = shared / (size_a + size_b - shared)
+    gap_days = abs((published_a - published_b).total_seconds()) / 86400
+    return jaccard * math.pow(0.5, gap_days / half_life_days)
+
+
+def rank_key(entry):
+    score, published_at, post_id = entry
+    return (-score, -published_at.timestamp(), -post_id)
+
+
+def compute_related(post_tags, published, limit, half_life_days):
+    posts_by_tag = {}
+    for post_id, tag_ids in post_tags.items():
+        for tag_id in tag_ids:
+            posts_by_tag.setdefault(tag_id, set()).add(post_id)
+
+    result = {}
+    for post_id, tag_ids in post_tags.items():
+        shared = {}
+        for tag_id in tag_ids:
+            for other in posts_by_tag[tag_id]:
+                if other != post_id:
+                    shared[other] = shared.get(other, 0) + 1
+        entries = [
+            (similarity(count, len(tag_ids), len(post_tags[other]),
+                        published[post_id], published[other], half_life_days),
+             published[other], other)
+            for other, count in shared.items()
+        ]
+        entries.sort(key=rank_key)
+        result[post_id] = [(other, score) for score, _, other in entries[:limit]]
+    return result
+
+
+def backfill_tag_index(apps, schema_editor):
+    Post = apps.get_model('blogapp', 'Post')
+    Tag = apps.get_model('blogapp', 'Tag')
+    PostTag = apps.get_model('blogapp', 'PostTag')
+    RelatedPost = apps.get_model('blogapp', 'RelatedPost')
+
+    names_by_post = {post.pk: normalize_tags(post.tags) for post in Post.objects.only('id', 'tags')}
+    all_names = {name for names in names_by_post.values() for name in names}
+    Tag.objects.bulk_create([Tag(name=name) for name in sorted(all_names)])
+    tag_ids = dict(Tag.objects.values_list('name', 'id'))
+
+    post_tags = {pk: {tag_ids[name] for name in names} for pk, names in names_by_post.items()}
+    PostTag.objects.bulk_create(
+        [PostTag(post_id=pk, tag_id=tag_id) for pk, ids in post_tags.items() for tag_id in ids],
+        batch_size=2000,
+    )
+
+    published = dict(Post.objects.values_list('id', 'published_at'))
+    related = compute_related(
+        post_tags,
+        published,
+        getattr(settings, 'RELATED_POSTS_LIMIT', 3),
+        getattr(settings, 'RELATED_POSTS_HALF_LIFE_DAYS', 180),
+    )
+    RelatedPost.objects.bulk_create(
+        [RelatedPost(post_id=pk, related_id=other, score=score, rank=rank)
+         for pk, entries in related.items()
+         for rank, (other, score) in enumerate(entries)],
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogapp', '0003_post_published_id_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RelatedPost',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('post', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='related_entries', to='blogapp.post')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='blogapp.post')),
+            ],
+            options={
+                'ordering': ['post', 'rank'],
+                'constraints': [models.UniqueConstraint(fields=('post', 'rank'), name='blogapp_relatedpost_rank_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='PostTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('post', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='post_tags', to='blogapp.post')),
+                ('tag', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='post_tags', to='blogapp.tag')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['tag', 'post'], name='blogapp_posttag_tag_post_idx')],
+                'constraints': [models.UniqueConstraint(fields=('post', 'tag'), name='blogapp_posttag_post_tag_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_tag_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2 on 2026-10-18 02:53
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+
+
+def backfill_tag_listing(apps, schema_editor):
+    Post = apps.get_model('blogapp', 'Post')
+    PostTag = apps.get_model('blogapp', 'PostTag')
+    Tag = apps.get_model('blogapp', 'Tag')
+    PostTag.objects.update(
+        published_at=Subquery(Post.objects.filter(pk=OuterRef('post_id')).values('published_at')[:1])
+    )
+    for tag in Tag.objects.annotate(n=Count('post_tags')):
+        Tag.objects.filter(pk=tag.pk).update(post_count=tag.n)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogapp', '0004_tag_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='posttag',
+            name='published_at',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='post_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='posttag',
+            index=models.Index(fields=['tag', '-published_at', '-post'], name='blogapp_posttag_tag_pub_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['-post_count', 'name'], name='blogapp_tag_count_name_idx'),
+        ),
+        migrations.RunPython(backfill_tag_listing, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,96 @@
+from django.db import migrations
+from django.utils.html import strip_tags
+
+
+# Frozen copies of the blogapp.search backends as they stood when this
+# migration was written, so later changes there cannot alter the backfill
+
+BATCH_SIZE = 2000
+
+
+def plain_text(html):
+    return strip_tags(html or '')
+
+
+def create_sqlite_index(cursor):
+    cursor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS blogapp_post_fts "
+        "USING fts5(title, excerpt, content, tokenize='porter unicode61')"
+    )
+
+
+def index_sqlite(cursor, rows):
+    cursor.executemany("DELETE FROM blogapp_post_fts WHERE rowid = %s", [(row[0],) for row in rows])
+    cursor.executemany(
+        "INSERT INTO blogapp_post_fts (rowid, title, excerpt, content) VALUES (%s, %s, %s, %s)",
+        [(pk, title, plain_text(excerpt), plain_text(content)) for pk, title, excerpt, content in rows],
+    )
+
+
+def create_postgres_index(cursor):
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS blogapp_post_search ("
+        "post_id bigint PRIMARY KEY REFERENCES blogapp_post (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+        "body text NOT NULL, "
+        "document tsvector NOT NULL)"
+    )
+    cursor.execute("CREATE INDEX IF NOT EXISTS blogapp_post_search_doc_idx ON blogapp_post_search USING GIN (document)")
+
+
+def index_postgres(cursor, rows):
+    cursor.executemany(
+        "INSERT INTO blogapp_post_search (post_id, body, document) VALUES (%s, %s, "
+        "setweight(to_tsvector('english', %s), 'A') || "
+        "setweight(to_tsvector('english', %s), 'B') || "
+        "setweight(to_tsvector('english', %s), 'C')) "
+        "ON CONFLICT (post_id) DO UPDATE SET body = EXCLUDED.body, document = EXCLUDED.document",
+        [
+            (pk, f"{plain_text(excerpt)}\n{plain_text(content)}", title, plain_text(excerpt), plain_text(content))
+            for pk, title, excerpt, content in rows
+        ],
+    )
+
+
+BACKENDS = {
+    'sqlite': (create_sqlite_index, index_sqlite, 'blogapp_post_fts'),
+    'postgresql': (create_postgres_index, index_postgres, 'blogapp_post_search'),
+}
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor not in BACKENDS:
+        return
+    create_index, index, _ = BACKENDS[connection.vendor]
+    Post = apps.get_model('blogapp', 'Post')
+    rows = Post.objects.using(connection.alias).order_by()\
+        .values_list('id', 'title', 'excerpt', 'content').iterator(chunk_size=BATCH_SIZE)
+    with connection.cursor() as cursor:
+        create_index(cursor)
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= BATCH_SIZE:
+                index(cursor, batch)
+                batch = []
+        if batch:
+            index(cursor, batch)
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor in BACKENDS:
+        _, _, table = BACKENDS[connection.vendor]
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {table}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogapp', '0005_tag_listing_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 03:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogapp', '0007_outboxmessage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='cover_image_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2 on 2026-10-18 03:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogapp', '0008_post_cover_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BootstrapState',
+            fields=[
+                ('phase', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('fingerprint', models.CharField(max_length=64)),
+                ('completed_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2 on 2026-10-18 04:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogapp', '0011_post_updated_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostDocument',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='document', serialize=False, to='blogapp.post')),
+                ('slug', models.SlugField(max_length=200, unique=True)),
+                ('origin', models.CharField(max_length=200)),
+                ('detail', models.BinaryField()),
+                ('detail_gzip', models.BinaryField()),
+                ('detail_br', models.BinaryField(null=True)),
+                ('detail_etag', models.CharField(max_length=64)),
+                ('detail_modified', models.BigIntegerField()),
+                ('related', models.BinaryField(null=True)),
+                ('related_gzip', models.BinaryField(null=True)),
+                ('related_br', models.BinaryField(null=True)),
+                ('related_etag', models.CharField(blank=True, max_length=64)),
+                ('related_modified', models.BigIntegerField(null=True)),
+            ],
+        ),
+    ]
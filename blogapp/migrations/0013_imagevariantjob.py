@@ -0,0 +1,24 @@
+# Generated by Django 5.2 on 2026-10-18 04:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogapp', '0012_postdocument'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageVariantJob',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to='blogapp.post')),
+                ('queued_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['queued_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2 on 2026-10-18 04:55
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogapp', '0013_imagevariantjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='imagevariantjob',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='imagevariantjob',
+            name='next_attempt_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AlterField(
+            model_name='imagevariantjob',
+            name='queued_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -2,10 +2,8 @@
 Models for the blogapp application.
 """
 from django.db import models
-from django.utils.text import slugify
 from django.utils import timezone
 from django.conf import settings
-from datetime import datetime
 
 class Post(models.Model):
     title = models.CharField(max_length=200)
@@ -13,6 +11,8 @@ class Post(models.Model):
     excerpt = models.TextField()
     content = models.TextField()
     cover_image = models.ImageField(upload_to='posts/', blank=True, null=True)
+    # Resized/re-encoded copies of cover_image, filled in by blogapp.images
+    cover_image_variants = models.JSONField(default=dict, blank=True)
     author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     tags = models.JSONField(default=list)
     published_at = models.DateTimeField(auto_now_add=True)
@@ -20,11 +20,9 @@ class Post(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.slug:
-            # Generate a unique slug by appending a timestamp
-            base_slug = slugify(self.title)
-            # Add a timestamp to ensure uniqueness
-            unique_id = datetime.now().strftime('%Y%m%d%H%M%S')
-            self.slug = f"{base_slug}-{unique_id}"
+            # slugify(title) plus a number reserved in blocks, unique without a lookup
+            from .slugs import assign_slugs
+            assign_slugs([self])
             
         # Print info about the image being saved
         if hasattr(self, 'cover_image') and self.cover_image:
@@ -41,6 +39,87 @@ class Post(models.Model):
 
     class Meta:
         ordering = ['-published_at']
+        indexes = [
+            # Backs keyset pagination of the post list
+            models.Index(fields=['-published_at', '-id'], name='blogapp_post_published_id_idx'),
+            # Backs incremental exports (?since=)
+            models.Index(fields=['updated_at', 'id'], name='blogapp_post_updated_id_idx'),
+        ]
+
+class Tag(models.Model):
+    """A normalized tag; mirrors the names stored in ``Post.tags``."""
+    name = models.CharField(max_length=100, unique=True)
+    # Denormalized number of posts carrying the tag, maintained by blogapp.related
+    post_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        ordering = ['name']
+        indexes = [
+            models.Index(fields=['-post_count', 'name'], name='blogapp_tag_count_name_idx'),
+        ]
+
+class PostTag(models.Model):
+    """Through table indexing posts by tag, kept in sync with ``Post.tags``."""
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='post_tags', db_index=False)
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='post_tags', db_index=False)
+    # Copy of Post.published_at so a tag's posts can be paged straight off the index
+    published_at = models.DateTimeField(null=True)
+
+    def __str__(self):
+        return f"{self.post_id} - {self.tag_id}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'tag'], name='blogapp_posttag_post_tag_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['tag', 'post'], name='blogapp_posttag_tag_post_idx'),
+            models.Index(fields=['tag', '-published_at', '-post'], name='blogapp_posttag_tag_pub_idx'),
+        ]
+
+class RelatedPost(models.Model):
+    """Precomputed related posts for ``post``, ordered by ``rank`` (0 is best)."""
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='related_entries', db_index=False)
+    related = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+
+    def __str__(self):
+        return f"{self.post_id} -> {self.related_id} ({self.score:.3f})"
+
+    class Meta:
+        ordering = ['post', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'rank'], name='blogapp_relatedpost_rank_uniq'),
+        ]
+
+class PostDocument(models.Model):
+    """
+    The detail and related responses of a post, rendered when it is written
+    (see blogapp.documents), plain and compressed. The related fields are
+    empty while the post has no precomputed related posts.
+    """
+    post = models.OneToOneField(Post, on_delete=models.CASCADE, primary_key=True, related_name='document')
+    slug = models.SlugField(max_length=200, unique=True)
+    # SITE_URL the absolute URLs in the documents were built on
+    origin = models.CharField(max_length=200)
+    detail = models.BinaryField()
+    detail_gzip = models.BinaryField()
+    detail_br = models.BinaryField(null=True)
+    detail_etag = models.CharField(max_length=64)
+    # Last-Modified, as Unix time
+    detail_modified = models.BigIntegerField()
+    related = models.BinaryField(null=True)
+    related_gzip = models.BinaryField(null=True)
+    related_br = models.BinaryField(null=True)
+    related_etag = models.CharField(max_length=64, blank=True)
+    related_modified = models.BigIntegerField(null=True)
+
+    def __str__(self):
+        return self.slug
 
 class Contact(models.Model):
     name = models.CharField(max_length=100)
@@ -53,4 +132,91 @@ class Contact(models.Model):
         return f"{self.name} - {self.subject}"
     
     class Meta:
-        ordering = ['-created_at']
\ No newline at end of file
+        ordering = ['-created_at']
+
+class OutboxMessage(models.Model):
+    """
+    An email waiting to be delivered by the outbox worker.
+
+    Rows are written in the same transaction as the record that triggered
+    them and drained by ``manage.py drain_outbox``.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    # Identical messages queued close together share a key, so a double submit
+    # is only mailed once (see blogapp.outbox.enqueue_email)
+    dedupe_key = models.CharField(max_length=64, unique=True)
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    recipients = models.JSONField(default=list)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.subject} ({self.status})"
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='blogapp_outbox_due_idx'),
+        ]
+
+
+class ImageVariantJob(models.Model):
+    """
+    A post whose cover image variants need (re)building.
+
+    Queued in the transaction that changed the cover and taken by the
+    outbox worker (``manage.py drain_outbox``), so images are never encoded
+    in a web worker. The row stays until the build succeeds; failed builds
+    are retried like outbox messages.
+    """
+    post = models.OneToOneField(Post, on_delete=models.CASCADE, primary_key=True, related_name='+')
+    # Reset whenever the cover changes again (see blogapp.images.schedule_variants)
+    queued_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Variants for post {self.post_id}"
+
+    class Meta:
+        ordering = ['queued_at']
+
+
+class BootstrapState(models.Model):
+    """
+    Fingerprint of what ``manage.py bootstrap`` last completed for a phase
+    (schema, superuser, sample posts), so unchanged deploys skip the work.
+    """
+    phase = models.CharField(max_length=50, primary_key=True)
+    fingerprint = models.CharField(max_length=64)
+    completed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.phase} ({self.fingerprint[:12]})"
+
+
+class SlugSequence(models.Model):
+    """
+    Counter behind the numeric suffix of post slugs (see blogapp.slugs).
+
+    A single row; processes reserve blocks of numbers from it, so creating
+    a post does not need a uniqueness lookup or a retry.
+    """
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return str(self.value)
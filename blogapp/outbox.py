@@ -0,0 +1,152 @@
+"""
+Transactional email outbox.
+
+Requests enqueue ``OutboxMessage`` rows inside their own transaction instead
+of talking to SMTP; ``drain`` (run by ``manage.py drain_outbox``) delivers
+them in batches over one SMTP connection, retrying failures with
+exponential backoff.
+"""
+import hashlib
+import json
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import OutboxMessage
+
+logger = logging.getLogger('blogapp')
+
+
+def outbox_setting(name, default):
+    return getattr(settings, f'OUTBOX_{name}', default)
+
+
+def dedupe_window():
+    return outbox_setting('DEDUPE_WINDOW_SECONDS', 600)
+
+
+def dedupe_key_for(subject, body, recipients, bucket):
+    """The key of a message queued in time bucket ``bucket`` (``dedupe_window()`` seconds wide)."""
+    payload = json.dumps([subject, body, sorted(recipients), bucket])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def enqueue_email(subject, body, recipients, from_email=None, dedupe_key=None):
+    """
+    Queue an email for the outbox worker; call inside the caller's transaction.
+
+    Returns ``(message, created)``; ``created`` is False when an identical
+    message was queued in the last ``OUTBOX_DEDUPE_WINDOW_SECONDS`` (a
+    double submit). The same message sent again later is queued again.
+    """
+    recipients = list(recipients)
+    if dedupe_key is None:
+        now = timezone.now()
+        window = dedupe_window()
+        bucket = int(now.timestamp() // window)
+        # The previous bucket's key too, so a double submit straddling a
+        # bucket boundary is still caught
+        earlier = OutboxMessage.objects.filter(
+            dedupe_key=dedupe_key_for(subject, body, recipients, bucket - 1),
+            created_at__gte=now - timedelta(seconds=window),
+        ).first()
+        if earlier is not None:
+            return earlier, False
+        dedupe_key = dedupe_key_for(subject, body, recipients, bucket)
+    return OutboxMessage.objects.get_or_create(
+        dedupe_key=dedupe_key,
+        defaults={
+            'subject': subject,
+            'body': body,
+            'from_email': from_email or settings.DEFAULT_FROM_EMAIL,
+            'recipients': recipients,
+        },
+    )
+
+
+def retry_delay(attempts):
+    base = outbox_setting('RETRY_BASE_SECONDS', 30)
+    ceiling = outbox_setting('RETRY_MAX_SECONDS', 3600)
+    return timedelta(seconds=min(ceiling, base * 2 ** (attempts - 1)))
+
+
+def claim_batch(batch_size):
+    """
+    Lease up to ``batch_size`` due messages to this worker.
+
+    Pushing ``next_attempt_at`` out by the lease keeps other workers off the
+    rows while they are being sent; if this worker dies they become due
+    again once the lease expires.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        due = OutboxMessage.objects.filter(status=OutboxMessage.STATUS_PENDING, next_attempt_at__lte=now)\
+            .order_by('next_attempt_at', 'id')
+        if connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        batch = list(due[:batch_size])
+        if batch:
+            lease = timedelta(seconds=outbox_setting('LEASE_SECONDS', 300))
+            OutboxMessage.objects.filter(pk__in=[m.pk for m in batch]).update(next_attempt_at=now + lease)
+    return batch
+
+
+def record_failure(message, error):
+    message.attempts += 1
+    message.last_error = str(error)[:2000]
+    if message.attempts >= outbox_setting('MAX_ATTEMPTS', 5):
+        message.status = OutboxMessage.STATUS_FAILED
+        logger.error(f"Giving up on outbox message {message.pk} after {message.attempts} attempts: {error}")
+    else:
+        message.next_attempt_at = timezone.now() + retry_delay(message.attempts)
+        logger.warning(f"Outbox message {message.pk} failed (attempt {message.attempts}): {error}")
+    message.save(update_fields=['attempts', 'last_error', 'status', 'next_attempt_at'])
+
+
+def drain(batch_size=None):
+    """
+    Deliver one batch of due messages. Returns ``(sent, failed)``.
+    """
+    batch = claim_batch(batch_size or outbox_setting('BATCH_SIZE', 50))
+    if not batch:
+        return 0, 0
+
+    sent = failed = 0
+    try:
+        mail_connection = get_connection(fail_silently=False)
+        mail_connection.open()
+    except Exception as e:
+        for message in batch:
+            record_failure(message, e)
+        return 0, len(batch)
+
+    try:
+        for message in batch:
+            email = EmailMessage(
+                subject=message.subject,
+                body=message.body,
+                from_email=message.from_email,
+                to=message.recipients,
+                connection=mail_connection,
+            )
+            try:
+                email.send()
+            except Exception as e:
+                record_failure(message, e)
+                failed += 1
+                continue
+            message.status = OutboxMessage.STATUS_SENT
+            message.attempts += 1
+            message.sent_at = timezone.now()
+            message.save(update_fields=['status', 'attempts', 'sent_at'])
+            sent += 1
+    finally:
+        try:
+            mail_connection.close()
+        except Exception as e:
+            logger.warning(f"Error closing mail connection: {e}")
+    return sent, failed
@@ -0,0 +1,118 @@
+"""
+Pagination classes for the blogapp API.
+"""
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination over ``(published_at, id)`` in descending order.
+
+    The cursor encodes the sort key of the last row on the current page, so
+    fetching the next page is a range scan on the
+    ``blogapp_post_published_id_idx`` index no matter how deep the client
+    has paged. Only forward navigation is supported.
+
+    Filters that drive the listing from another index (such as the tag
+    filter) can set ``view.keyset_fields`` to the lookups holding the same
+    ``(published_at, id)`` values in that index.
+    """
+    keyset_fields = ('published_at', 'id')
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_page_size(self, request):
+        page_size = api_settings.PAGE_SIZE or 20
+        if self.page_size_query_param in request.query_params:
+            try:
+                page_size = int(request.query_params[self.page_size_query_param])
+            except (TypeError, ValueError):
+                pass
+        return max(1, min(page_size, self.max_page_size))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw = urlsafe_b64decode(encoded.encode('ascii')).decode('ascii')
+            published_at, pk = raw.rsplit('|', 1)
+            return datetime.fromisoformat(published_at), int(pk)
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, obj):
+        # Rows from .values() (the fast read path) are dicts
+        if isinstance(obj, dict):
+            published_at, pk = obj['published_at'], obj['id']
+        else:
+            published_at, pk = obj.published_at, obj.pk
+        raw = f"{published_at.isoformat()}|{pk}"
+        return urlsafe_b64encode(raw.encode('ascii')).decode('ascii')
+
+    def get_page_queryset(self, queryset, request, view=None):
+        """The unevaluated query for the requested page, plus one row."""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+
+        published_field, id_field = getattr(view, 'keyset_fields', self.keyset_fields)
+        queryset = queryset.order_by(f'-{published_field}', f'-{id_field}')
+        position = self.decode_cursor(request)
+        if position is not None:
+            published_at, pk = position
+            queryset = queryset.filter(
+                Q(**{f'{published_field}__lt': published_at})
+                | Q(**{published_field: published_at, f'{id_field}__lt': pk})
+            )
+        # Fetch one extra row to find out whether there is a next page
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, rows):
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.set_page(list(self.get_page_queryset(queryset, request, view)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """``paginate_queryset`` on the async ORM, for the async read views."""
+        return self.set_page([row async for row in self.get_page_queryset(queryset, request, view)])
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class SearchPagination(PageNumberPagination):
+    """Page-number pagination for ranked search results, which have no stable keyset."""
+    page_size_query_param = 'page_size'
+    max_page_size = 100
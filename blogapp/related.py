@@ -0,0 +1,365 @@
+"""
+Normalized tag index and precomputed related posts.
+
+``Post.tags`` stays the source of truth; ``Tag``/``PostTag`` mirror it so
+posts can be looked up by tag through an index, and ``RelatedPost`` holds
+the top related posts for every post so the ``related`` endpoint is a
+single indexed read.
+
+Similarity is the Jaccard index of the two tag sets, damped by how far
+apart the posts were published. The score is symmetric, which lets a save
+update its neighbours' lists incrementally instead of recomputing them.
+"""
+import math
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+
+from .models import Post, PostTag, RelatedPost, Tag
+
+
+def related_posts_limit():
+    return getattr(settings, 'RELATED_POSTS_LIMIT', 3)
+
+
+def recency_half_life_days():
+    return getattr(settings, 'RELATED_POSTS_HALF_LIFE_DAYS', 180)
+
+
+def normalize_tags(tags):
+    """Return the distinct, lowercased tag names in ``tags``, keeping order."""
+    names = []
+    for tag in tags or []:
+        if not isinstance(tag, str):
+            continue
+        name = tag.strip().lower()[:100]
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def similarity(shared, size_a, size_b, published_a, published_b, half_life_days=None):
+    """Jaccard similarity of two tag sets, halved every ``half_life_days`` of publication gap."""
+    if not shared:
+        return 0.0
+    if half_life_days is None:
+        half_life_days = recency_half_life_days()
+    jaccard = shared / (size_a + size_b - shared)
+    gap_days = abs((published_a - published_b).total_seconds()) / 86400
+    return jaccard * math.pow(0.5, gap_days / half_life_days)
+
+
+def rank_key(entry):
+    # entry is (score, published_at, post_id); best first, newer posts win ties
+    score, published_at, post_id = entry
+    return (-score, -published_at.timestamp(), -post_id)
+
+
+def compute_related(post_tags, published, limit, half_life_days):
+    """
+    Compute related posts for every post from in-memory maps.
+
+    ``post_tags`` maps post id to a set of tag ids and ``published`` maps post
+    id to its ``published_at``. Returns ``{post_id: [(related_id, score), ...]}``.
+    Used for full rebuilds.
+    """
+    posts_by_tag = {}
+    for post_id, tag_ids in post_tags.items():
+        for tag_id in tag_ids:
+            posts_by_tag.setdefault(tag_id, set()).add(post_id)
+
+    result = {}
+    for post_id, tag_ids in post_tags.items():
+        shared = {}
+        for tag_id in tag_ids:
+            for other in posts_by_tag[tag_id]:
+                if other != post_id:
+                    shared[other] = shared.get(other, 0) + 1
+        entries = [
+            (similarity(count, len(tag_ids), len(post_tags[other]),
+                        published[post_id], published[other], half_life_days),
+             published[other], other)
+            for other, count in shared.items()
+        ]
+        entries.sort(key=rank_key)
+        result[post_id] = [(other, score) for score, _, other in entries[:limit]]
+    return result
+
+
+def sync_post_tags(post):
+    """
+    Bring the ``PostTag`` rows for ``post`` in line with ``post.tags``.
+
+    Returns ``(previous_tag_ids, current_tag_ids)``.
+    """
+    names = normalize_tags(post.tags)
+    if names:
+        Tag.objects.bulk_create([Tag(name=name) for name in names], ignore_conflicts=True)
+    current = set(Tag.objects.filter(name__in=names).values_list('id', flat=True)) if names else set()
+    previous = set(PostTag.objects.filter(post_id=post.pk).values_list('tag_id', flat=True))
+
+    removed = previous - current
+    if removed:
+        PostTag.objects.filter(post_id=post.pk, tag_id__in=removed).delete()
+        Tag.objects.filter(id__in=removed).update(post_count=F('post_count') - 1)
+    added = current - previous
+    if added:
+        PostTag.objects.bulk_create([
+            PostTag(post_id=post.pk, tag_id=tag_id, published_at=post.published_at) for tag_id in added
+        ])
+        Tag.objects.filter(id__in=added).update(post_count=F('post_count') + 1)
+    return previous, current
+
+
+def index_new_posts(posts):
+    """
+    Bulk-add ``PostTag`` rows for freshly inserted posts.
+
+    For ``bulk_create`` paths, which skip the save signals. Related posts are
+    not computed here; run ``rebuild_related`` or ``add_related_posts`` after.
+    Returns ``{post_id: set_of_tag_ids}``.
+    """
+    names_by_post = {post.pk: normalize_tags(post.tags) for post in posts}
+    published = {post.pk: post.published_at for post in posts}
+    all_names = {name for names in names_by_post.values() for name in names}
+    if not all_names:
+        return {post_id: set() for post_id in names_by_post}
+    Tag.objects.bulk_create([Tag(name=name) for name in all_names], ignore_conflicts=True)
+    tag_ids = dict(Tag.objects.filter(name__in=all_names).values_list('name', 'id'))
+
+    added = {}
+    rows = []
+    post_tag_ids = {}
+    for post_id, names in names_by_post.items():
+        post_tag_ids[post_id] = {tag_ids[name] for name in names}
+        for name in names:
+            rows.append(PostTag(post_id=post_id, tag_id=tag_ids[name], published_at=published[post_id]))
+            added[tag_ids[name]] = added.get(tag_ids[name], 0) + 1
+    PostTag.objects.bulk_create(rows, batch_size=2000)
+
+    # One UPDATE per distinct increment rather than one per tag
+    by_increment = {}
+    for tag_id, n in added.items():
+        by_increment.setdefault(n, []).append(tag_id)
+    for n, ids in by_increment.items():
+        Tag.objects.filter(id__in=ids).update(post_count=F('post_count') + n)
+    return post_tag_ids
+
+
+def _tag_counts(post_ids):
+    rows = PostTag.objects.filter(post_id__in=post_ids)\
+        .values('post_id').annotate(n=Count('tag_id')).values_list('post_id', 'n')
+    return dict(rows)
+
+
+def _published(post_ids):
+    return dict(Post.objects.filter(pk__in=post_ids).values_list('id', 'published_at'))
+
+
+def _stored_lists(post_ids):
+    """Stored related lists as ``{post_id: [(score, related_published_at, related_id), ...]}``."""
+    stored = {}
+    for post_id, related_id, score, related_published in RelatedPost.objects.filter(post_id__in=post_ids)\
+            .values_list('post_id', 'related_id', 'score', 'related__published_at'):
+        stored.setdefault(post_id, []).append((score, related_published, related_id))
+    return stored
+
+
+def _write_lists(lists):
+    """Replace the stored related lists of every post in ``lists`` (shaped like ``_stored_lists``)."""
+    post_ids = list(lists)
+    for start in range(0, len(post_ids), 500):
+        RelatedPost.objects.filter(post_id__in=post_ids[start:start + 500]).delete()
+    RelatedPost.objects.bulk_create(
+        (RelatedPost(post_id=post_id, related_id=other, score=score, rank=rank)
+         for post_id, entries in lists.items()
+         for rank, (score, _, other) in enumerate(entries)),
+        batch_size=2000,
+    )
+
+
+def _compute_lists(post_ids):
+    """
+    Compute the related lists of ``post_ids`` from scratch, all together in a
+    fixed number of queries. Returns them shaped like ``_stored_lists``.
+    """
+    tags_of = {post_id: set() for post_id in post_ids}
+    for post_id, tag_id in PostTag.objects.filter(post_id__in=post_ids).values_list('post_id', 'tag_id'):
+        tags_of[post_id].add(tag_id)
+    all_tags = set().union(*tags_of.values())
+    if not all_tags:
+        return {post_id: [] for post_id in tags_of}
+    sharing = PostTag.objects.filter(tag_id__in=all_tags)
+    posts_by_tag = {}
+    for post_id, tag_id in sharing.values_list('post_id', 'tag_id'):
+        posts_by_tag.setdefault(tag_id, set()).add(post_id)
+    affected = sharing.values('post_id')
+    counts = _tag_counts(affected)
+    published = _published(affected)
+    limit = related_posts_limit()
+    half_life = recency_half_life_days()
+
+    lists = {}
+    for post_id, tag_ids in tags_of.items():
+        shared = {}
+        for tag_id in tag_ids:
+            for other in posts_by_tag[tag_id]:
+                if other != post_id:
+                    shared[other] = shared.get(other, 0) + 1
+        entries = [
+            (similarity(n, len(tag_ids), counts[other], published[post_id], published[other], half_life),
+             published[other], other)
+            for other, n in shared.items()
+        ]
+        entries.sort(key=rank_key)
+        lists[post_id] = entries[:limit]
+    return lists
+
+
+def recompute_related(post_id):
+    """Fully recompute and store the related posts for one post."""
+    _write_lists(_compute_lists([post_id]))
+
+
+def update_related(post, previous_tag_ids, current_tag_ids):
+    """
+    Refresh related posts after ``post`` was saved, in a fixed number of
+    queries however many posts share its tags.
+
+    The post's own list is recomputed. For every neighbour (any post sharing
+    an old or new tag) the new pairwise score is merged into its stored list;
+    neighbours that already had ``post`` on their list may have to replace it
+    with another candidate, so theirs are recomputed, all in one batch.
+    """
+    neighbours = set()
+    shared_now = {}
+    stored = {}
+    touched = previous_tag_ids | current_tag_ids
+    if touched:
+        sharing = PostTag.objects.filter(tag_id__in=touched).exclude(post_id=post.pk)
+        for other, tag_id in sharing.values_list('post_id', 'tag_id'):
+            neighbours.add(other)
+            if tag_id in current_tag_ids:
+                shared_now[other] = shared_now.get(other, 0) + 1
+        if neighbours:
+            stored = _stored_lists(sharing.values('post_id'))
+            counts = _tag_counts(sharing.values('post_id'))
+            published = _published(sharing.values('post_id'))
+
+    stale = [other for other, entries in stored.items() if any(entry[2] == post.pk for entry in entries)]
+    lists = _compute_lists([post.pk, *stale])
+
+    limit = related_posts_limit()
+    half_life = recency_half_life_days()
+    for other in neighbours.difference(stale):
+        if other not in published:
+            continue
+        score = similarity(shared_now.get(other, 0), counts.get(other, 0), len(current_tag_ids),
+                           published[other], post.published_at, half_life)
+        if not score:
+            continue
+        current = sorted(stored.get(other, []), key=rank_key)
+        merged = sorted(current + [(score, post.published_at, post.pk)], key=rank_key)[:limit]
+        if merged != current:
+            lists[other] = merged
+    _write_lists(lists)
+
+
+def add_related_posts(post_tag_ids):
+    """
+    ``update_related`` for a batch of freshly inserted posts at once.
+
+    ``post_tag_ids`` maps each new post id to its tag ids, as returned by
+    ``index_new_posts``. The new posts' lists are computed from scratch and
+    the new scores are merged into the stored list of every post sharing a
+    tag with them, in a fixed number of queries however large the batch.
+    """
+    all_tags = set().union(*post_tag_ids.values())
+    if not all_tags:
+        return
+    sharing = PostTag.objects.filter(tag_id__in=all_tags)
+    posts_by_tag = {}
+    for post_id, tag_id in sharing.values_list('post_id', 'tag_id'):
+        posts_by_tag.setdefault(tag_id, set()).add(post_id)
+    affected = sharing.values('post_id')
+    counts = _tag_counts(affected)
+    published = _published(affected)
+    limit = related_posts_limit()
+    half_life = recency_half_life_days()
+
+    lists = {}
+    merges = {}
+    for post_id, tag_ids in post_tag_ids.items():
+        shared = {}
+        for tag_id in tag_ids:
+            for other in posts_by_tag[tag_id]:
+                if other != post_id:
+                    shared[other] = shared.get(other, 0) + 1
+        entries = []
+        for other, n in shared.items():
+            score = similarity(n, counts[post_id], counts[other], published[post_id], published[other], half_life)
+            entries.append((score, published[other], other))
+            if other not in post_tag_ids and score:
+                merges.setdefault(other, []).append((score, published[post_id], post_id))
+        entries.sort(key=rank_key)
+        lists[post_id] = entries[:limit]
+
+    stored = _stored_lists(affected)
+    for other, entries in merges.items():
+        current = sorted(stored.get(other, []), key=rank_key)
+        merged = sorted(current + entries, key=rank_key)[:limit]
+        if merged != current:
+            lists[other] = merged
+
+    _write_lists(lists)
+
+
+def reindex_post(post):
+    """Sync the tag index and related posts for a saved post."""
+    with transaction.atomic():
+        previous, current = sync_post_tags(post)
+        update_related(post, previous, current)
+
+
+def post_tag_ids(post_id):
+    return list(PostTag.objects.filter(post_id=post_id).values_list('tag_id', flat=True))
+
+
+def release_tags(tag_ids):
+    """Decrement tag counts for a deleted post (its PostTag rows go with the cascade)."""
+    if tag_ids:
+        Tag.objects.filter(id__in=tag_ids).update(post_count=F('post_count') - 1)
+
+
+def referencing_posts(post_id):
+    """Ids of posts whose related list includes ``post_id``."""
+    return list(RelatedPost.objects.filter(related_id=post_id).values_list('post_id', flat=True))
+
+
+def rebuild_all():
+    """Rebuild the whole tag index and related-posts table."""
+    with transaction.atomic():
+        for post in Post.objects.only('id', 'tags', 'published_at').iterator(chunk_size=2000):
+            sync_post_tags(post)
+        PostTag.objects.update(
+            published_at=Subquery(Post.objects.filter(pk=OuterRef('post_id')).values('published_at')[:1])
+        )
+
+        post_tags = {pk: set() for pk in Post.objects.values_list('id', flat=True)}
+        for post_id, tag_id in PostTag.objects.values_list('post_id', 'tag_id').iterator(chunk_size=5000):
+            post_tags[post_id].add(tag_id)
+        published = dict(Post.objects.values_list('id', 'published_at'))
+
+        RelatedPost.objects.all().delete()
+        related = compute_related(post_tags, published, related_posts_limit(), recency_half_life_days())
+        RelatedPost.objects.bulk_create(
+            (RelatedPost(post_id=post_id, related_id=other, score=score, rank=rank)
+             for post_id, entries in related.items()
+             for rank, (other, score) in enumerate(entries)),
+            batch_size=2000,
+        )
+        Tag.objects.filter(post_tags__isnull=True).delete()
+        for tag in Tag.objects.annotate(n=Count('post_tags')):
+            if tag.post_count != tag.n:
+                Tag.objects.filter(pk=tag.pk).update(post_count=tag.n)
@@ -0,0 +1,250 @@
+"""
+Full-text search over post title, excerpt and content.
+
+PostgreSQL keeps a weighted ``tsvector`` per post in ``blogapp_post_search``
+behind a GIN index; SQLite (local and test runs) uses an FTS5 virtual table,
+``blogapp_post_fts``. Both are plain tables maintained from the post save and
+delete signals, so the ``Post`` model itself does not change per backend.
+"""
+import re
+
+from django.db import connection as default_connection
+from django.utils.html import escape, strip_tags
+
+from .models import Post
+
+# Control characters can't survive strip_tags/escape, so they are safe
+# placeholders for the highlight markers until the snippet is escaped
+MARK_START = '\x02'
+MARK_END = '\x03'
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def plain_text(html):
+    return strip_tags(html or '')
+
+
+def highlight_html(snippet):
+    """Escape a raw snippet and turn the placeholder markers into ``<mark>`` tags."""
+    return escape(snippet).replace(MARK_START, '<mark>').replace(MARK_END, '</mark>')
+
+
+class SQLiteSearchBackend:
+    table = 'blogapp_post_fts'
+
+    def create_index(self, cursor):
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} "
+            "USING fts5(title, excerpt, content, tokenize='porter unicode61')"
+        )
+
+    def drop_index(self, cursor):
+        cursor.execute(f"DROP TABLE IF EXISTS {self.table}")
+
+    def index(self, cursor, rows):
+        rows = list(rows)
+        cursor.executemany(f"DELETE FROM {self.table} WHERE rowid = %s", [(row[0],) for row in rows])
+        cursor.executemany(
+            f"INSERT INTO {self.table} (rowid, title, excerpt, content) VALUES (%s, %s, %s, %s)",
+            [(pk, title, plain_text(excerpt), plain_text(content)) for pk, title, excerpt, content in rows],
+        )
+
+    def remove(self, cursor, post_ids):
+        cursor.executemany(f"DELETE FROM {self.table} WHERE rowid = %s", [(pk,) for pk in post_ids])
+
+    def to_query(self, text):
+        tokens = TOKEN_RE.findall(text)
+        if not tokens:
+            return None
+        # Quote every token so user input can never be read as FTS5 syntax;
+        # the last one is a prefix match for search-as-you-type
+        terms = [f'"{token}"' for token in tokens]
+        terms[-1] += '*'
+        return ' '.join(terms)
+
+    def count(self, cursor, query):
+        cursor.execute(f"SELECT count(*) FROM {self.table} WHERE {self.table} MATCH %s", [query])
+        return cursor.fetchone()[0]
+
+    def search(self, cursor, query, limit, offset):
+        # Rank first, then build snippets for the page only; asking for the
+        # snippet in the ranking query would compute it for every match
+        cursor.execute(
+            f"SELECT rowid, -bm25({self.table}, 10.0, 4.0, 1.0) AS score "
+            f"FROM {self.table} WHERE {self.table} MATCH %s "
+            "ORDER BY score DESC, rowid DESC LIMIT %s OFFSET %s",
+            [query, limit, offset],
+        )
+        ranked = cursor.fetchall()
+        if not ranked:
+            return []
+        placeholders = ', '.join(['%s'] * len(ranked))
+        cursor.execute(
+            f"SELECT rowid, snippet({self.table}, -1, %s, %s, '…', 24) "
+            f"FROM {self.table} WHERE {self.table} MATCH %s AND rowid IN ({placeholders})",
+            [MARK_START, MARK_END, query, *(pk for pk, _ in ranked)],
+        )
+        snippets = dict(cursor.fetchall())
+        return [(pk, score, snippets.get(pk, '')) for pk, score in ranked]
+
+
+class PostgresSearchBackend:
+    table = 'blogapp_post_search'
+    config = 'english'
+
+    def create_index(self, cursor):
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} ("
+            "post_id bigint PRIMARY KEY REFERENCES blogapp_post (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+            "body text NOT NULL, "
+            "document tsvector NOT NULL)"
+        )
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_doc_idx ON {self.table} USING GIN (document)")
+
+    def drop_index(self, cursor):
+        cursor.execute(f"DROP TABLE IF EXISTS {self.table}")
+
+    def index(self, cursor, rows):
+        cursor.executemany(
+            f"INSERT INTO {self.table} (post_id, body, document) VALUES (%s, %s, "
+            f"setweight(to_tsvector('{self.config}', %s), 'A') || "
+            f"setweight(to_tsvector('{self.config}', %s), 'B') || "
+            f"setweight(to_tsvector('{self.config}', %s), 'C')) "
+            "ON CONFLICT (post_id) DO UPDATE SET body = EXCLUDED.body, document = EXCLUDED.document",
+            [
+                (pk, f"{plain_text(excerpt)}\n{plain_text(content)}", title, plain_text(excerpt), plain_text(content))
+                for pk, title, excerpt, content in rows
+            ],
+        )
+
+    def remove(self, cursor, post_ids):
+        cursor.execute(f"DELETE FROM {self.table} WHERE post_id = ANY(%s)", [list(post_ids)])
+
+    def to_query(self, text):
+        return text.strip() or None
+
+    def count(self, cursor, query):
+        cursor.execute(
+            f"SELECT count(*) FROM {self.table} WHERE document @@ websearch_to_tsquery('{self.config}', %s)",
+            [query],
+        )
+        return cursor.fetchone()[0]
+
+    def search(self, cursor, query, limit, offset):
+        # Rank and page first; ts_headline is costly, so only run it on the page
+        cursor.execute(
+            f"SELECT hit.post_id, hit.score, "
+            f"ts_headline('{self.config}', hit.body, hit.q, %s) "
+            "FROM ("
+            f"  SELECT s.post_id, s.body, q.q, ts_rank_cd(s.document, q.q) AS score "
+            f"  FROM {self.table} s, websearch_to_tsquery('{self.config}', %s) AS q(q) "
+            "  WHERE s.document @@ q.q "
+            "  ORDER BY score DESC, s.post_id DESC LIMIT %s OFFSET %s"
+            ") hit ORDER BY hit.score DESC, hit.post_id DESC",
+            [
+                f"StartSel={MARK_START}, StopSel={MARK_END}, MaxWords=24, MinWords=8, MaxFragments=1",
+                query, limit, offset,
+            ],
+        )
+        return cursor.fetchall()
+
+
+BACKENDS = {
+    'sqlite': SQLiteSearchBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+
+def get_backend(connection=None):
+    """Return the search backend for ``connection``, or None if the database has no support."""
+    backend_class = BACKENDS.get((connection or default_connection).vendor)
+    return backend_class() if backend_class else None
+
+
+def index_posts(posts, connection=None):
+    """(Re)index the given posts; accepts model instances."""
+    connection = connection or default_connection
+    backend = get_backend(connection)
+    if backend is None:
+        return
+    rows = [(post.pk, post.title, post.excerpt, post.content) for post in posts]
+    if rows:
+        with connection.cursor() as cursor:
+            backend.index(cursor, rows)
+
+
+def remove_posts(post_ids, connection=None):
+    connection = connection or default_connection
+    backend = get_backend(connection)
+    if backend is not None and post_ids:
+        with connection.cursor() as cursor:
+            backend.remove(cursor, post_ids)
+
+
+def rebuild_index(connection=None, chunk_size=2000):
+    """Drop and repopulate the search index from every post."""
+    connection = connection or default_connection
+    backend = get_backend(connection)
+    if backend is None:
+        return
+    with connection.cursor() as cursor:
+        backend.drop_index(cursor)
+        backend.create_index(cursor)
+        batch = []
+        rows = Post.objects.using(connection.alias).order_by()\
+            .values_list('id', 'title', 'excerpt', 'content').iterator(chunk_size=chunk_size)
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= chunk_size:
+                backend.index(cursor, batch)
+                batch = []
+        if batch:
+            backend.index(cursor, batch)
+
+
+class SearchResults:
+    """
+    Lazy, sliceable view of ranked search hits, so it can be handed to a
+    Django/DRF paginator. Slicing runs one ranked query for just that page
+    and returns ``Post`` instances annotated with ``search_score`` and
+    ``search_highlight``.
+    """
+
+    def __init__(self, text, queryset=None, connection=None):
+        self.connection = connection or default_connection
+        self.backend = get_backend(self.connection)
+        self.query = self.backend.to_query(text) if self.backend else None
+        self.queryset = queryset if queryset is not None else Post.objects.all()
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            if self.query is None:
+                self._count = 0
+            else:
+                with self.connection.cursor() as cursor:
+                    self._count = self.backend.count(cursor, self.query)
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice):
+            return self[item:item + 1][0]
+        offset = item.start or 0
+        limit = (item.stop if item.stop is not None else self.count()) - offset
+        if self.query is None or limit <= 0:
+            return []
+        with self.connection.cursor() as cursor:
+            hits = self.backend.search(cursor, self.query, limit, offset)
+        posts = self.queryset.in_bulk([pk for pk, _, _ in hits])
+        results = []
+        for pk, score, snippet in hits:
+            post = posts.get(pk)
+            if post is None:
+                continue
+            post.search_score = score
+            post.search_highlight = highlight_html(snippet)
+            results.append(post)
+        return results
@@ -0,0 +1,232 @@
+"""
+Synthetic blog data at production scale, for capacity testing.
+
+``generate_posts`` yields unsaved ``Post`` instances one at a time with
+realistic shapes: Zipf-distributed tags and authors, log-normal content
+lengths, cover images (names only, with a variant set like
+blogapp.images would store) and publication times spread over a period.
+``write_batches`` consumes it in fixed-size batches, inserting each with
+``bulk_create`` or, on PostgreSQL, ``COPY``, and brings the tag and search
+indexes up to date as it goes, so memory use does not grow with the count.
+"""
+import bisect
+import csv
+import io
+import itertools
+import json
+import math
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import search
+from .models import Post
+from .related import index_new_posts
+from .slugs import assign_slugs
+
+WORDS = (
+    'api async backend browser build cache cloud code component container css data database debug '
+    'deploy design django docker event feature frontend function git graph http index javascript '
+    'layout library linux memory migration model network node performance pipeline python query '
+    'queue react render request response schema search security server service state storage '
+    'stream style system template test thread token type user value view web worker'
+).split()
+
+# Head of the tag vocabulary; the long tail is filled with numbered topics
+COMMON_TAGS = [
+    'python', 'javascript', 'django', 'react', 'css', 'frontend', 'backend', 'tutorial', 'api',
+    'devops', 'databases', 'performance', 'testing', 'security', 'career', 'typescript',
+    'docker', 'postgresql', 'web design', 'tailwind',
+]
+
+# Tags per post and how often each count occurs
+TAG_COUNT_WEIGHTS = {1: 10, 2: 25, 3: 30, 4: 20, 5: 10, 6: 5}
+
+VARIANT_WIDTHS = (320, 640, 1024)
+
+
+def zipf_cum_weights(n, exponent=1.1):
+    total, weights = 0.0, []
+    for rank in range(1, n + 1):
+        total += 1 / rank ** exponent
+        weights.append(total)
+    return weights
+
+
+def pick(rng, population, cum_weights):
+    """``rng.choices(population, cum_weights=...)[0]`` without building a list."""
+    return population[bisect.bisect(cum_weights, rng.random() * cum_weights[-1])]
+
+
+class PostGenerator:
+    """
+    Produces realistic posts from a seeded random generator.
+
+    ``content_median`` is the median body length in characters; lengths are
+    log-normal around it. ``cover_ratio`` of the posts get a cover image.
+    """
+
+    def __init__(self, rng, authors, tag_count=500, content_median=3000, cover_ratio=0.4, days=1095):
+        self.rng = rng
+        self.authors = authors
+        self.author_weights = zipf_cum_weights(len(authors), exponent=0.8)
+        self.tags = (COMMON_TAGS + [f'topic-{n}' for n in range(tag_count)])[:max(1, tag_count)]
+        self.tag_weights = zipf_cum_weights(len(self.tags))
+        self.tag_counts = list(TAG_COUNT_WEIGHTS)
+        self.tag_count_weights = list(itertools.accumulate(TAG_COUNT_WEIGHTS.values()))
+        self.content_mu = math.log(content_median)
+        self.cover_ratio = cover_ratio
+        self.span_seconds = days * 86400
+        self.now = timezone.now()
+        # Bodies are slices of one long text, so building them costs a copy
+        corpus_words = [rng.choice(WORDS) for _ in range(40000)]
+        self.corpus = ' '.join(corpus_words)
+
+    def words(self, n):
+        return [self.rng.choice(WORDS) for _ in range(n)]
+
+    def content(self):
+        length = int(min(60000, max(300, self.rng.lognormvariate(self.content_mu, 0.6))))
+        start = self.rng.randrange(0, len(self.corpus) - length) if length < len(self.corpus) else 0
+        text = self.corpus[start:start + length]
+        paragraphs = [text[i:i + 600] for i in range(0, len(text), 600)]
+        return ''.join(f'<p>{paragraph}</p>' for paragraph in paragraphs)
+
+    def post_tags(self):
+        wanted = pick(self.rng, self.tag_counts, self.tag_count_weights)
+        tags = []
+        for _ in range(wanted * 2):
+            tag = pick(self.rng, self.tags, self.tag_weights)
+            if tag not in tags:
+                tags.append(tag)
+                if len(tags) == wanted:
+                    break
+        return tags
+
+    def cover(self, n):
+        if self.rng.random() >= self.cover_ratio:
+            return {}
+        name = f'posts/seed-{n}.jpg'
+        digest = f'{self.rng.getrandbits(48):012x}'
+        variants = [
+            {'name': f'posts/variants/seed-{n}-{width}w-{digest}.webp',
+             'width': width, 'height': width * 9 // 16, 'format': 'webp'}
+            for width in VARIANT_WIDTHS
+        ]
+        return {'cover_image': name, 'cover_image_variants': {'source': name, 'variants': variants}}
+
+    def post(self, n):
+        title = ' '.join(self.words(self.rng.randint(4, 9))).capitalize()
+        published = self.now - timedelta(seconds=self.rng.randrange(self.span_seconds))
+        return Post(
+            title=title[:200],
+            excerpt=' '.join(self.words(self.rng.randint(12, 30))).capitalize() + '.',
+            content=self.content(),
+            author_id=pick(self.rng, self.authors, self.author_weights),
+            tags=self.post_tags(),
+            published_at=published,
+            updated_at=published,
+            **self.cover(n),
+        )
+
+
+def generate_posts(generator, count, start):
+    """Yield ``count`` posts numbered from ``start``."""
+    for n in range(start, start + count):
+        yield generator.post(n)
+
+
+def ensure_authors(count):
+    """Ids of ``count`` author accounts, creating the missing ones."""
+    names = [f'author{n}' for n in range(1, count + 1)]
+    existing = set(User.objects.filter(username__in=names).values_list('username', flat=True))
+    User.objects.bulk_create([
+        User(username=name, email=f'{name}@example.com', password='!')  # unusable password
+        for name in names if name not in existing
+    ])
+    return list(User.objects.filter(username__in=names).order_by('id').values_list('id', flat=True))
+
+
+@contextmanager
+def explicit_timestamps():
+    """Let ``bulk_create`` keep the generated ``published_at``/``updated_at``."""
+    fields = [Post._meta.get_field('published_at'), Post._meta.get_field('updated_at')]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+COPY_COLUMNS = ['id', 'title', 'slug', 'excerpt', 'content', 'cover_image', 'cover_image_variants',
+                'author_id', 'tags', 'published_at', 'updated_at']
+
+
+def copy_supported():
+    return connection.vendor == 'postgresql'
+
+
+def copy_posts(posts):
+    """Insert ``posts`` with PostgreSQL ``COPY``, assigning their ids from the table's sequence."""
+    table = Post._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT nextval(pg_get_serial_sequence('{table}', 'id')) FROM generate_series(1, %s)",
+            [len(posts)],
+        )
+        for post, (pk,) in zip(posts, cursor.fetchall()):
+            post.pk = pk
+
+        buffer = io.StringIO()
+        # Quoted, an empty cover_image stays '' instead of becoming NULL
+        writer = csv.writer(buffer, quoting=csv.QUOTE_ALL)
+        for post in posts:
+            writer.writerow([
+                post.pk, post.title, post.slug, post.excerpt, post.content,
+                post.cover_image.name or '', json.dumps(post.cover_image_variants), post.author_id,
+                json.dumps(post.tags), post.published_at.isoformat(), post.updated_at.isoformat(),
+            ])
+        sql = f"COPY {table} ({', '.join(COPY_COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+        raw = cursor.cursor
+        if hasattr(raw, 'copy_expert'):
+            # psycopg2
+            buffer.seek(0)
+            raw.copy_expert(sql, buffer)
+        else:
+            with raw.copy(sql) as copy:
+                copy.write(buffer.getvalue())
+
+
+def write_batches(posts, batch_size, use_copy=False, progress=None):
+    """
+    Insert ``posts`` (any iterable) ``batch_size`` at a time, indexing each
+    batch's tags and text in the same transaction. Returns the row count.
+
+    ``progress(rows_written)`` is called after every batch.
+    """
+    written = 0
+    posts = iter(posts)
+    with explicit_timestamps():
+        while True:
+            batch = list(itertools.islice(posts, batch_size))
+            if not batch:
+                break
+            # One block reservation covers the batch's slugs
+            assign_slugs(batch)
+            with transaction.atomic():
+                if use_copy:
+                    copy_posts(batch)
+                else:
+                    Post.objects.bulk_create(batch)
+                index_new_posts(batch)
+                search.index_posts(batch)
+            written += len(batch)
+            if progress is not None:
+                progress(written)
+    return written
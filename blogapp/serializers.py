@@ -1,42 +1,131 @@
 from rest_framework import serializers
-from .models import Post, Contact
+from .models import Post, Contact, Tag
 from django.conf import settings
-import os
+from django.utils.encoding import filepath_to_uri
+from functools import lru_cache
 
-class PostSerializer(serializers.ModelSerializer):
+def placeholder_name():
+    """Storage name of the cover placeholder; ``/media/`` serves it for any missing file."""
+    return getattr(settings, 'COVER_PLACEHOLDER_NAME', 'posts/placeholder.jpg')
+
+@lru_cache(maxsize=128)
+def media_base_for(scheme, host, media_url):
+    """Absolute media prefix for one request origin, built once per process."""
+    if '://' in media_url:
+        return media_url
+    return f"{scheme}://{host}{media_url}"
+
+class MediaURLMixin:
+    """Builds absolute media URLs without touching the filesystem."""
+
+    def _media_base_url(self):
+        # Resolve the absolute media prefix once per serializer instead of once per row
+        if not hasattr(self, '_media_base'):
+            request = self.context.get('request')
+            if request:
+                self._media_base = media_base_for(request.scheme, request.get_host(), settings.MEDIA_URL)
+            else:
+                self._media_base = media_base_for('http', 'localhost:8000', settings.MEDIA_URL)
+        return self._media_base
+
+    def get_cover_image_url(self, obj):
+        """Return the complete URL for the cover image, or for the placeholder"""
+        if obj.cover_image and obj.cover_image.name:
+            return f"{self._media_base_url()}{filepath_to_uri(obj.cover_image.name)}"
+        return f"{self._media_base_url()}{placeholder_name()}"
+
+    def get_cover_image_srcset(self, obj):
+        """Resized WebP/AVIF variants of the cover image, smallest first"""
+        variants = (obj.cover_image_variants or {}).get('variants', [])
+        base = self._media_base_url()
+        return [
+            {
+                'url': f"{base}{filepath_to_uri(variant['name'])}",
+                'width': variant['width'],
+                'height': variant['height'],
+                'format': variant['format'],
+            }
+            for variant in variants
+        ]
+
+# Model columns behind the computed post fields
+POST_FIELD_SOURCES = {'cover_image_url': 'cover_image', 'cover_image_srcset': 'cover_image_variants'}
+
+def requested_fields(request, serializer_class):
+    """
+    The fields named in ``?fields=`` (a comma-separated sparse fieldset), in
+    ``serializer_class`` order, or ``None`` without the parameter.
+    """
+    value = request.GET.get('fields')
+    if value is None:
+        return None
+    wanted = {name.strip() for name in value.split(',') if name.strip()}
+    available = serializer_class.Meta.fields
+    unknown = wanted.difference(available)
+    if unknown or not wanted:
+        raise serializers.ValidationError({
+            'fields': [f"Unknown field(s): {', '.join(sorted(unknown))}" if unknown else "No fields given"]
+        })
+    return [name for name in available if name in wanted]
+
+def post_columns(fields):
+    """Post model fields to load for the serializer ``fields``."""
+    columns = []
+    for name in fields:
+        column = POST_FIELD_SOURCES.get(name, name)
+        if column not in columns:
+            columns.append(column)
+    return columns
+
+class SparseFieldsMixin:
+    """Takes ``fields=[...]`` to output only those of the declared fields."""
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+class PostSerializer(SparseFieldsMixin, MediaURLMixin, serializers.ModelSerializer):
     # Add a serialized field for the full image URL
     cover_image_url = serializers.SerializerMethodField()
+    cover_image_srcset = serializers.SerializerMethodField()
     
     class Meta:
         model = Post
-        fields = ['id', 'title', 'slug', 'excerpt', 'content', 'cover_image', 'cover_image_url', 'author', 'tags', 'published_at', 'updated_at']
-        read_only_fields = ['slug', 'author', 'published_at', 'updated_at', 'cover_image_url']
-    
-    def get_cover_image_url(self, obj):
-        """Return the complete URL for the cover image"""
-        if obj.cover_image and obj.cover_image.name:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.cover_image.url)
-            # Make sure we return an absolute URL, not just the relative path
-            media_url = settings.MEDIA_URL.rstrip('/')
-            base_url = "http://localhost:8000"  # Fallback if request is not available
-            return f"{base_url}{media_url}/{obj.cover_image}"
-        
-        # Return a default placeholder image URL
-        request = self.context.get('request')
-        if request:
-            # Check if the placeholder exists, create it if not
-            placeholder_path = os.path.join(settings.MEDIA_ROOT, 'posts', 'placeholder.jpg')
-            if not os.path.exists(placeholder_path):
-                os.makedirs(os.path.dirname(placeholder_path), exist_ok=True)
-                with open(placeholder_path, 'w') as f:
-                    pass  # Create empty file
-            
-            return request.build_absolute_uri(f"{settings.MEDIA_URL}posts/placeholder.jpg")
-        
-        # Fallback with absolute URL
-        return f"http://localhost:8000{settings.MEDIA_URL}posts/placeholder.jpg"
+        fields = ['id', 'title', 'slug', 'excerpt', 'content', 'cover_image', 'cover_image_url', 'cover_image_srcset', 'author', 'tags', 'published_at', 'updated_at']
+        read_only_fields = ['slug', 'author', 'published_at', 'updated_at', 'cover_image_url', 'cover_image_srcset']
+
+class PostListSerializer(MediaURLMixin, serializers.ModelSerializer):
+    """Compact post representation for list views; leaves out ``content``."""
+    cover_image_url = serializers.SerializerMethodField()
+    cover_image_srcset = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Post
+        fields = ['id', 'title', 'slug', 'excerpt', 'cover_image_url', 'cover_image_srcset', 'author', 'tags', 'published_at', 'updated_at']
+        read_only_fields = fields
+
+class PostSearchResultSerializer(PostListSerializer):
+    """List representation plus the search rank and a highlighted snippet."""
+    score = serializers.FloatField(source='search_score', read_only=True)
+    highlight = serializers.CharField(source='search_highlight', read_only=True)
+
+    class Meta(PostListSerializer.Meta):
+        fields = PostListSerializer.Meta.fields + ['score', 'highlight']
+        read_only_fields = fields
+
+class PostBulkItemSerializer(serializers.ModelSerializer):
+    """One post of a bulk import; the author and slug are assigned by the endpoint."""
+    class Meta:
+        model = Post
+        fields = ['title', 'excerpt', 'content', 'tags']
+
+class TagSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Tag
+        fields = ['name', 'post_count']
+        read_only_fields = fields
 
 class ContactSerializer(serializers.ModelSerializer):
     class Meta:
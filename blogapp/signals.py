@@ -0,0 +1,39 @@
+"""
+Signal handlers keeping derived post data in sync with ``Post``.
+"""
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import Post
+from . import documents, images, related, search
+from .cache import invalidate_posts
+
+
+@receiver(post_save, sender=Post, dispatch_uid='blogapp_post_saved')
+def post_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    # Lists that drop the post are re-rendered too
+    referrers = related.referencing_posts(instance.pk) if documents.documents_enabled() else []
+    related.reindex_post(instance)
+    search.index_posts([instance])
+    documents.refresh_posts([instance.pk], referrers)
+    images.schedule_variants(instance)
+    invalidate_posts()
+
+
+@receiver(pre_delete, sender=Post, dispatch_uid='blogapp_post_deleting')
+def post_deleting(sender, instance, **kwargs):
+    # The cascade removes rows pointing at this post; remember what needs updating
+    instance._related_referrers = related.referencing_posts(instance.pk)
+    instance._indexed_tag_ids = related.post_tag_ids(instance.pk)
+
+
+@receiver(post_delete, sender=Post, dispatch_uid='blogapp_post_deleted')
+def post_deleted(sender, instance, **kwargs):
+    search.remove_posts([instance.pk])
+    related.release_tags(getattr(instance, '_indexed_tag_ids', []))
+    for post_id in getattr(instance, '_related_referrers', []):
+        related.recompute_related(post_id)
+    documents.render_related(getattr(instance, '_related_referrers', []))
+    invalidate_posts()
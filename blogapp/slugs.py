@@ -0,0 +1,142 @@
+"""
+Unique post slugs: ``slugify(title)`` plus a short base-36 number.
+
+The numbers come from ``SlugSequence`` in blocks of ``SLUG_BLOCK_SIZE``
+reserved with one UPDATE, and are then handed out in memory, so a post
+(or a whole ``bulk_create`` batch) gets a slug without a uniqueness
+lookup, and two posts can never be given the same number, whichever
+process or thread creates them. Numbers increase within a process; blocks
+left unused when a process exits are simply skipped.
+
+A reservation commits on its own, whatever the caller's transaction does:
+a block kept in memory after the UPDATE behind it was rolled back would
+be handed out again by another process. Inside a transaction it goes
+through a separate autocommit connection, so the sequence row is locked
+for one statement rather than for the whole post creation. SQLite has one
+writer at a time and the caller's transaction already holds the lock, so
+there the reservation stays in that transaction and is not kept past the
+call; callers that can reserve before their transaction (``prefetch``)
+still get whole blocks.
+"""
+import threading
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.utils.text import slugify
+
+from .models import Post, SlugSequence
+
+SLUG_MAX_LENGTH = Post._meta.get_field('slug').max_length
+DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+
+def block_size():
+    return getattr(settings, 'SLUG_BLOCK_SIZE', 100)
+
+
+def base36(number):
+    digits = ''
+    while True:
+        number, remainder = divmod(number, 36)
+        digits = DIGITS[remainder] + digits
+        if not number:
+            return digits
+
+
+def sequence_sql(db):
+    table = db.ops.quote_name(SlugSequence._meta.db_table)
+    return (
+        f'INSERT INTO {table} (id, value) VALUES (1, 0) ON CONFLICT (id) DO NOTHING',
+        f'UPDATE {table} SET value = value + %s WHERE id = 1 RETURNING value',
+    )
+
+
+def reserve_on(db, size):
+    create, update = sequence_sql(db)
+    with db.cursor() as cursor:
+        cursor.execute(update, [size])
+        row = cursor.fetchone()
+        if row is None:
+            cursor.execute(create)
+            cursor.execute(update, [size])
+            row = cursor.fetchone()
+    return row[0] - size + 1
+
+
+def reservation_committed():
+    """Whether a reservation made now commits on its own (see the module docstring)."""
+    return not connection.in_atomic_block or connection.vendor != 'sqlite'
+
+
+def reserve(size):
+    """Reserve ``size`` numbers; returns the first one."""
+    if not connection.in_atomic_block:
+        # Autocommit: the UPDATE is its own transaction
+        return reserve_on(connection, size)
+    if connection.vendor == 'sqlite':
+        return reserve_on(connection, size)
+    side = connections.create_connection(DEFAULT_DB_ALIAS)
+    try:
+        return reserve_on(side, size)
+    finally:
+        side.close()
+
+
+class SlugNumbers:
+    """Thread-safe dispenser of reserved numbers."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._next = self._end = 0
+
+    def take(self, count):
+        with self._lock:
+            available = self._end - self._next
+            numbers = list(range(self._next, self._next + min(count, available)))
+            missing = count - len(numbers)
+            if not missing:
+                self._next += count
+            elif reservation_committed():
+                # One reservation covers the rest, however large the batch,
+                # rounded up to whole blocks
+                block = block_size()
+                size = -(-missing // block) * block
+                start = reserve(size)
+                numbers.extend(range(start, start + missing))
+                self._next, self._end = start + missing, start + size
+            else:
+                # Rolled back with the caller's transaction, if it is
+                self._next = self._end
+                start = reserve(missing)
+                numbers.extend(range(start, start + missing))
+            return numbers
+
+    def prefetch(self, count=1):
+        """Make sure ``count`` numbers are at hand, reserving a block now if not."""
+        with self._lock:
+            if self._end - self._next >= count or not reservation_committed():
+                return
+            block = block_size()
+            size = -(-count // block) * block
+            self._next = reserve(size)
+            self._end = self._next + size
+
+    def reset(self):
+        with self._lock:
+            self._next = self._end = 0
+
+
+numbers = SlugNumbers()
+
+
+def make_slug(title, number):
+    suffix = '-' + base36(number)
+    base = slugify(title)[:SLUG_MAX_LENGTH - len(suffix)].strip('-') or 'post'
+    return base + suffix
+
+
+def assign_slugs(posts):
+    """Give every post in ``posts`` that has no slug a unique one; at most one query."""
+    pending = [post for post in posts if not post.slug]
+    for post, number in zip(pending, numbers.take(len(pending))):
+        post.slug = make_slug(post.title, number)
@@ -0,0 +1,192 @@
+"""
+Request throttles for the contact form, keyed by client IP and by email.
+
+Rates come from ``REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']`` as
+``"<requests>/<period>"`` (``"5/min"``; ``"none"`` turns a throttle off).
+DRF checks throttles in ``APIView.initial()``, before the view validates
+the body or opens a transaction, and answers a rejection with 429 and a
+``Retry-After`` header.
+
+Two backends, chosen with ``THROTTLE_BACKEND``:
+
+``memory``
+    A token bucket per key in a dict: a burst of ``requests``, refilled
+    evenly over ``period``. O(1) per request, no I/O, but per process, so
+    with N workers a client gets up to N times the rate.
+``cache``
+    A sliding-window counter per key in the default cache, shared by every
+    worker that uses the same cache (Redis, memcached): the count of the
+    current fixed window plus the previous one's, weighted by how much of it
+    still overlaps the sliding window. Counting uses the cache's atomic
+    ``incr``. Keys rejected by this process are remembered locally until
+    their ``Retry-After`` passes, so a flood is turned away without a
+    cache round trip. On a per-process cache with several workers it would
+    be no better than ``memory``, so ``memory`` is used instead.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.exceptions import APIException
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from .cache import shared_cache
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """``"5/min"`` -> ``(5, 60)``; ``None`` or ``"none"`` -> ``None``."""
+    if rate is None or str(rate).strip().lower() == 'none':
+        return None
+    requests, period = rate.split('/')
+    return int(requests), PERIODS[period.strip()[0]]
+
+
+class MemoryBuckets:
+    """Token buckets for the keys seen by this process, least recently used evicted first."""
+
+    def __init__(self, max_keys=100_000):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()
+
+    def hit(self, key, requests, period, now=None):
+        """Take a token for ``key``; returns 0 if there was one, else seconds until there is."""
+        now = time.monotonic() if now is None else now
+        refill = requests / period
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (requests, now))
+            tokens = min(requests, tokens + (now - updated) * refill)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0
+            else:
+                wait = (1 - tokens) / refill
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class CacheWindows:
+    """Sliding-window counters in the Django cache; see the module docstring."""
+
+    def __init__(self, max_blocked=10_000):
+        self.max_blocked = max_blocked
+        self._blocked = {}
+
+    def hit(self, key, requests, period, now=None):
+        now = time.time() if now is None else now
+        blocked_until = self._blocked.get(key)
+        if blocked_until is not None:
+            if now < blocked_until:
+                return blocked_until - now
+            self._blocked.pop(key, None)
+
+        window = int(now // period)
+        elapsed = now - window * period
+        current_key = f'throttle:{key}:{window}'
+        try:
+            count = cache.incr(current_key)
+        except ValueError:
+            # First hit in this window, unless another worker just made it
+            if cache.add(current_key, 1, timeout=2 * period + 1):
+                count = 1
+            else:
+                count = cache.incr(current_key)
+        previous = cache.get(f'throttle:{key}:{window - 1}', 0)
+        overlap = 1 - elapsed / period
+        if previous * overlap + count <= requests:
+            return 0
+
+        # A rejected request does not use up the allowance
+        try:
+            cache.decr(current_key)
+        except ValueError:
+            pass
+        remaining = period - elapsed
+        if previous and count <= requests:
+            # When the previous window's share has decayed enough
+            wait = min(remaining, (previous * overlap + count - requests) / previous * period)
+        else:
+            wait = remaining
+        if len(self._blocked) >= self.max_blocked:
+            self._blocked = {k: until for k, until in self._blocked.items() if until > now}
+        self._blocked[key] = now + wait
+        return wait
+
+    def reset(self):
+        self._blocked.clear()
+
+
+BACKENDS = {
+    'memory': MemoryBuckets(),
+    'cache': CacheWindows(),
+}
+
+
+def get_backend():
+    name = getattr(settings, 'THROTTLE_BACKEND', 'memory')
+    if name == 'cache' and not shared_cache():
+        name = 'memory'
+    return BACKENDS[name]
+
+
+def reset():
+    """Forget all local throttle state (entries in the cache expire on their own)."""
+    for backend in BACKENDS.values():
+        backend.reset()
+
+
+class RateThrottle(BaseThrottle):
+    """Throttles requests with the same ``get_key()`` to the rate configured for ``scope``."""
+    scope = None
+
+    def get_key(self, request, view):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+        rate = parse_rate(api_settings.DEFAULT_THROTTLE_RATES.get(self.scope))
+        if rate is None:
+            return True
+        key = self.get_key(request, view)
+        if key is None:
+            return True
+        requests, period = rate
+        self.wait_seconds = get_backend().hit(f'{self.scope}:{key}', requests, period)
+        return not self.wait_seconds
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class ContactIPThrottle(RateThrottle):
+    scope = 'contact_ip'
+
+    def get_key(self, request, view):
+        return self.get_ident(request)
+
+
+class ContactEmailThrottle(RateThrottle):
+    scope = 'contact_email'
+
+    def get_key(self, request, view):
+        try:
+            email = request.data.get('email')
+        except (APIException, AttributeError):
+            # Unparsable or not an object: the view rejects it anyway
+            return None
+        if not isinstance(email, str) or not email.strip():
+            return None
+        # Hashed: cache keys must not contain spaces or control characters
+        return hashlib.sha256(email.strip().lower().encode()).hexdigest()[:32]
@@ -1,57 +1,183 @@
 from django.shortcuts import render
-from rest_framework import viewsets, permissions, status
+from rest_framework import mixins, viewsets, permissions, status
 from rest_framework.decorators import action
+from rest_framework.views import APIView
+from rest_framework.exceptions import NotFound
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
-from django.core.mail import send_mail
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.conf import settings
 from django.db import DatabaseError, transaction
+from django.db.models import Count, F, Max, Sum
 from django.core.exceptions import ValidationError
-from .models import Post, Contact
-from .serializers import PostSerializer, ContactSerializer
+from django.core.handlers.asgi import ASGIRequest
+from .models import Post, Contact, RelatedPost, Tag
+from .serializers import (
+    PostSerializer, PostListSerializer, PostSearchResultSerializer, PostBulkItemSerializer, TagSerializer,
+    ContactSerializer, post_columns, requested_fields,
+)
+from .filters import TagFilterBackend
+from .pagination import KeysetPagination, SearchPagination
+from .search import SearchResults, get_backend as get_search_backend
+from .cache import cached_response, get_content_version, invalidate_posts, shared_cache
+from .conditional import conditional_response
+from .outbox import enqueue_email
+from .ingest import NDJSONParser, ingest_posts
+from .export import IgnoreClientContentNegotiation, PostExport, parse_since
+from .throttling import ContactEmailThrottle, ContactIPThrottle
+from .fastpath import PostRowSerializer, fast_path_applies
+from .metrics import registry as metrics_registry, timed_serialization
+from .slugs import numbers as slug_numbers
 import logging
 
 # Set up logger
 logger = logging.getLogger('blogapp')
 
+# Validator queries for conditional GET, shared with blogapp.async_views.
+# LIST_STATS is only needed when the content version is not shared; with it,
+# the list just looks up the archive's latest change on blogapp_post_updated_id_idx
+LIST_STATS = {'count': Count('id'), 'latest': Max('updated_at')}
+LATEST_UPDATE = {'latest': Max('updated_at')}
+RELATED_STATS = {
+    'count': Count('id'),
+    'latest': Max('related__updated_at'),
+    # Changes whenever the set or the order of related posts changes
+    'checksum': Sum(F('related_id') * (F('rank') + 1)),
+}
+
+def list_validators_result(stats):
+    return (stats['count'], stats['latest']), stats['latest']
+
+def version_validators_result(version, stats):
+    # Every post save and delete bumps the content version, so it validates
+    # any list (and filter). The archive's latest change is the Last-Modified
+    # and part of the ETag, so a write from a process that does not share the
+    # version (e.g. a queryset update in a worker) still changes it
+    return (version, stats['latest']), stats['latest']
+
+def detail_stats_query(slug):
+    return Post.objects.filter(slug=slug).values_list('id', 'updated_at')
+
+def detail_validators_result(row):
+    if row is None:
+        return None
+    return row, row[1]
+
+def related_validators_result(stats):
+    if not stats['count']:
+        # The fallback (most recent posts) depends on the whole archive
+        return None
+    return (stats['count'], stats['latest'], stats['checksum']), stats['latest']
+
+def list_error_response(e):
+    """The response the post list sends when ``e`` is raised while building it."""
+    if isinstance(e, NotFound):
+        return Response(
+            {"error": str(e.detail)},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    if isinstance(e, DatabaseError):
+        logger.error(f"Database error in list view: {str(e)}")
+        return Response(
+            {"error": "Database error occurred"},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+    logger.error(f"Unexpected error in list view: {str(e)}")
+    return Response(
+        {"error": "An unexpected error occurred"},
+        status=status.HTTP_500_INTERNAL_SERVER_ERROR
+    )
+
 class PostViewSet(viewsets.ModelViewSet):
     queryset = Post.objects.all()
     serializer_class = PostSerializer
     permission_classes = [permissions.AllowAny]
     lookup_field = 'slug'
+    pagination_class = KeysetPagination
+    filter_backends = [TagFilterBackend]
+
+    def get_serializer_class(self):
+        if self.action in ('list', 'related'):
+            return PostListSerializer
+        return super().get_serializer_class()
 
     def get_queryset(self):
         try:
-            return Post.objects.all().select_related('author')
+            # The serializers only output the author's id, so no join
+            queryset = Post.objects.all()
+            if self.action in ('list', 'related', 'search'):
+                # Their representations leave the body out; don't read it
+                queryset = queryset.defer('content')
+            return queryset
         except DatabaseError as e:
             logger.error(f"Database error in get_queryset: {str(e)}")
             raise
 
+    def list_validators(self, request, *args, **kwargs):
+        if shared_cache():
+            latest = Post.objects.order_by().aggregate(**LATEST_UPDATE)
+            return version_validators_result(get_content_version(), latest)
+        stats = self.filter_queryset(self.get_queryset()).order_by().aggregate(**LIST_STATS)
+        return list_validators_result(stats)
+
+    def detail_validators(self, request, slug=None, *args, **kwargs):
+        return detail_validators_result(detail_stats_query(slug).first())
+
+    def related_validators(self, request, slug=None, *args, **kwargs):
+        stats = RelatedPost.objects.filter(post__slug=slug).aggregate(**RELATED_STATS)
+        return related_validators_result(stats)
+
+    @conditional_response('list', 'list_validators')
+    @cached_response('list')
     def list(self, request, *args, **kwargs):
         try:
             queryset = self.filter_queryset(self.get_queryset())
+            if fast_path_applies(request):
+                rows = PostRowSerializer(PostListSerializer, request)
+                page = self.paginate_queryset(queryset.values(*rows.columns))
+                return rows.response({
+                    'next': self.paginator.get_next_link(),
+                    'results': rows.serialize(page),
+                })
+
             page = self.paginate_queryset(queryset)
             if page is not None:
-                serializer = self.get_serializer(page, many=True)
-                return self.get_paginated_response(serializer.data)
+                with timed_serialization():
+                    data = self.get_serializer(page, many=True).data
+                return self.get_paginated_response(data)
 
-            serializer = self.get_serializer(queryset, many=True)
-            return Response(serializer.data)
-        except DatabaseError as e:
-            logger.error(f"Database error in list view: {str(e)}")
-            return Response(
-                {"error": "Database error occurred"},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+            with timed_serialization():
+                data = self.get_serializer(queryset, many=True).data
+            return Response(data)
         except Exception as e:
-            logger.error(f"Unexpected error in list view: {str(e)}")
-            return Response(
-                {"error": "An unexpected error occurred"},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+            return list_error_response(e)
+
+    @conditional_response('detail', 'detail_validators')
+    @cached_response('detail')
+    def retrieve(self, request, *args, **kwargs):
+        # ?fields=title,slug returns (and reads) only those fields
+        fields = requested_fields(request, PostSerializer)
+        if fast_path_applies(request):
+            rows = PostRowSerializer(PostSerializer, request, fields=fields)
+            lookup = {self.lookup_field: kwargs[self.lookup_url_kwarg or self.lookup_field]}
+            found = list(self.get_queryset().filter(**lookup).values(*rows.columns)[:1])
+            if not found:
+                # Same message as get_object()
+                raise Http404(f"No {Post._meta.object_name} matches the given query.")
+            return rows.response(rows.serialize(found)[0])
+        if fields is None:
+            return super().retrieve(request, *args, **kwargs)
+        lookup = {self.lookup_field: kwargs[self.lookup_url_kwarg or self.lookup_field]}
+        instance = get_object_or_404(self.get_queryset().only(*post_columns(fields)), **lookup)
+        return Response(self.get_serializer(instance, fields=fields).data)
 
     def create(self, request, *args, **kwargs):
         try:
+            # Reserve slug numbers before the transaction, so that on SQLite
+            # they come from a committed block (see blogapp.slugs)
+            slug_numbers.prefetch()
             with transaction.atomic():
                 logger.info(f"Creating new post with data: {request.data}")
                 
@@ -106,21 +232,140 @@ class PostViewSet(viewsets.ModelViewSet):
             logger.error(f"Error in perform_create: {str(e)}")
             raise
 
+    @action(detail=False, methods=['post'], permission_classes=[permissions.IsAdminUser],
+            parser_classes=[JSONParser, NDJSONParser])
+    def bulk(self, request):
+        """
+        Create many posts in one request, from a JSON array or an NDJSON stream.
+
+        Posts are written in batches, each in its own transaction, so a bad
+        item only fails itself. ``?related=false`` skips the related-posts
+        update (run ``manage.py rebuild_related`` once the import is done).
+        """
+        items = request.data
+        if isinstance(items, (dict, str)) or not hasattr(items, '__iter__'):
+            return Response(
+                {"error": "Expected a JSON array or an NDJSON stream of posts"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        with_related = request.query_params.get('related', 'true').lower() != 'false'
+        results = ingest_posts(items, PostBulkItemSerializer(context=self.get_serializer_context()),
+                               request.user, with_related=with_related)
+        created = sum(1 for result in results if result['status'] == 'created')
+        if created:
+            invalidate_posts()
+        logger.info(f"Bulk post import: {created} created, {len(results) - created} rejected")
+
+        if not results:
+            return Response({"error": "No posts in the request body"}, status=status.HTTP_400_BAD_REQUEST)
+        if created == len(results):
+            code = status.HTTP_201_CREATED
+        elif created:
+            code = status.HTTP_200_OK
+        else:
+            code = status.HTTP_400_BAD_REQUEST
+        return Response(
+            {"created": created, "failed": len(results) - created, "results": results},
+            status=code
+        )
+
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAdminUser],
+            renderer_classes=[JSONRenderer], content_negotiation_class=IgnoreClientContentNegotiation)
+    def export(self, request):
+        """
+        Stream every post, as on the detail endpoint, in ``(updated_at, id)`` order.
+
+        ``?output=ndjson`` (the default) or ``json`` for one array;
+        ``?since=<ISO datetime>`` only exports posts updated after it. The
+        ``X-Export-Until`` header is the ``since`` for the next delta. The body
+        is compressed by ``CompressionMiddleware`` in the coding the client
+        prefers.
+        """
+        try:
+            since = request.query_params.get('since')
+            export = PostExport(
+                output=request.query_params.get('output', 'ndjson'),
+                since=parse_since(since) if since else None,
+                request=request,
+            )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        asgi = isinstance(request._request, ASGIRequest)
+        response = StreamingHttpResponse(
+            export.achunks() if asgi else export.chunks(), content_type=export.content_type,
+        )
+        response['X-Export-Until'] = export.until.isoformat()
+        response['Cache-Control'] = 'no-store'
+        return response
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response(
+                {"error": "Query parameter 'q' is required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if get_search_backend() is None:
+            return Response(
+                {"error": "Search is not available on this database"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        try:
+            results = SearchResults(query, queryset=self.get_queryset())
+            paginator = SearchPagination()
+            page = paginator.paginate_queryset(results, request, view=self)
+            serializer = PostSearchResultSerializer(page, many=True, context=self.get_serializer_context())
+            with timed_serialization():
+                data = serializer.data
+            return paginator.get_paginated_response(data)
+        except NotFound as e:
+            return Response(
+                {"error": str(e.detail)},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        except DatabaseError as e:
+            logger.error(f"Database error in search view: {str(e)}")
+            return Response(
+                {"error": "Database error occurred"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        except Exception as e:
+            logger.error(f"Unexpected error in search view: {str(e)}")
+            return Response(
+                {"error": "An unexpected error occurred"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
     @action(detail=True, methods=['get'])
+    @conditional_response('related', 'related_validators')
+    @cached_response('related')
     def related(self, request, slug=None):
         try:
-            post = self.get_object()
-            # Get posts with similar tags
-            related_posts = Post.objects.filter(tags__overlap=post.tags)\
-                .exclude(id=post.id)\
-                .distinct()[:3]
-            
+            if fast_path_applies(request):
+                return self.related_fast(request, slug)
+
+            # Precomputed by blogapp.related; one indexed read joined to the posts
+            entries = RelatedPost.objects.filter(post__slug=slug)\
+                .select_related('related')\
+                .defer('related__content')\
+                .order_by('rank')
+            related_posts = [entry.related for entry in entries]
+
             if not related_posts:
                 # If no posts with similar tags, get most recent posts
-                related_posts = Post.objects.exclude(id=post.id)[:3]
+                post = self.get_object()
+                related_posts = list(self.get_queryset().exclude(id=post.id)[:3])
                 
-            serializer = self.get_serializer(related_posts, many=True)
-            return Response(serializer.data)
+            with timed_serialization():
+                data = self.get_serializer(related_posts, many=True).data
+            return Response(data)
+        except Http404:
+            return Response(
+                {"error": "Post not found"},
+                status=status.HTTP_404_NOT_FOUND
+            )
         except DatabaseError as e:
             logger.error(f"Database error in related posts view: {str(e)}")
             return Response(
@@ -134,10 +379,42 @@ class PostViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    def related_fast(self, request, slug):
+        """``related`` built from ``.values()`` rows; same output, no model instances."""
+        rows = PostRowSerializer(PostListSerializer, request, prefix='related__')
+        related_rows = list(
+            RelatedPost.objects.filter(post__slug=slug).order_by('rank').values(*rows.columns)
+        )
+        if not related_rows:
+            post_id = Post.objects.filter(slug=slug).values_list('id', flat=True).first()
+            if post_id is None:
+                raise Http404
+            rows = PostRowSerializer(PostListSerializer, request)
+            related_rows = self.get_queryset().exclude(id=post_id).values(*rows.columns)[:3]
+        return rows.response(rows.serialize(related_rows))
+
+class TagViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """Tag facet counts, most used first, read from the denormalized Tag.post_count."""
+    queryset = Tag.objects.filter(post_count__gt=0).order_by('-post_count', 'name')
+    serializer_class = TagSerializer
+    permission_classes = [permissions.AllowAny]
+
+class MetricsView(APIView):
+    """Request metrics of this process in the Prometheus text format; staff only."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return HttpResponse(
+            metrics_registry.render_prometheus(),
+            content_type='text/plain; version=0.0.4; charset=utf-8',
+        )
+
 class ContactViewSet(viewsets.ModelViewSet):
     queryset = Contact.objects.all()
     serializer_class = ContactSerializer
     http_method_names = ['post']
+    # Checked before the body is validated or a transaction opened; see blogapp.throttling
+    throttle_classes = [ContactIPThrottle, ContactEmailThrottle]
 
     def create(self, request, *args, **kwargs):
         try:
@@ -154,7 +431,8 @@ class ContactViewSet(viewsets.ModelViewSet):
                 
                 self.perform_create(serializer)
                 
-                # Send email notification
+                # Queue the email notification; the outbox worker sends it
+                # after commit, so SMTP latency never holds this transaction
                 contact_data = serializer.validated_data
                 email_subject = f"Blog Contact: {contact_data['subject']}"
                 email_message = f"""
@@ -167,18 +445,11 @@ class ContactViewSet(viewsets.ModelViewSet):
                 Message:
                 {contact_data['message']}
                 """
-                
-                try:
-                    send_mail(
-                        subject=email_subject,
-                        message=email_message,
-                        from_email=settings.DEFAULT_FROM_EMAIL,
-                        recipient_list=[settings.DEFAULT_FROM_EMAIL],
-                        fail_silently=False,
-                    )
-                except Exception as e:
-                    logger.error(f"Error sending email notification: {str(e)}")
-                    # Log but don't fail the request if email fails
+                enqueue_email(
+                    subject=email_subject,
+                    body=email_message,
+                    recipients=[settings.DEFAULT_FROM_EMAIL],
+                )
                 
                 headers = self.get_success_headers(serializer.data)
                 return Response(
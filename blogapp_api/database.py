@@ -0,0 +1,138 @@
+"""
+Database connection settings: pooling, connection reuse and timeouts.
+
+PostgreSQL, with psycopg 3 and psycopg_pool installed
+    Each process keeps a connection pool (Django's ``OPTIONS['pool']``).
+    The pool is sized so that all the web workers together stay within
+    ``DJANGO_DB_MAX_CONNECTIONS``. Each worker gets an equal share, capped
+    at its thread count for gthread workers. gunicorn.conf.py exports the
+    worker layout. Other processes (the outbox worker, bootstrap and
+    other management commands) run without that layout and get a pool of
+    at most ``COMMAND_POOL_MAX_SIZE`` connections, outside that budget.
+    Connections are checked before they are handed out.
+PostgreSQL, with psycopg2
+    Connections persist for ``DJANGO_DB_CONN_MAX_AGE`` seconds and are
+    health-checked before each request reuses one (``CONN_HEALTH_CHECKS``).
+SQLite
+    WAL journal, so readers no longer wait for a writer, and a busy
+    timeout. Write transactions start ``IMMEDIATE`` so two writers queue
+    on the busy timeout instead of failing with "database is locked".
+    Connections persist as above.
+
+On PostgreSQL, every connection gets a connect timeout and an
+idle-in-transaction timeout. A statement timeout applies when
+``DJANGO_DB_STATEMENT_TIMEOUT`` is set; gunicorn.conf.py sets it to the
+worker timeout, so management commands are not limited.
+
+Environment:
+    DATABASE_URL                  the database (SQLite file by default)
+    DJANGO_DB_POOL                "false" turns the pool off (default on when
+                                  psycopg_pool is installed)
+    DJANGO_DB_MAX_CONNECTIONS     connections all web workers may hold
+                                  together (default 20); leave room for the
+                                  other processes' pools
+    DJANGO_DB_POOL_MIN_SIZE       connections a pool keeps open (default 1)
+    DJANGO_DB_POOL_TIMEOUT        seconds to wait for a pooled connection
+                                  (default 10)
+    DJANGO_DB_CONN_MAX_AGE        seconds to keep a connection without a pool
+                                  (default 600)
+    DJANGO_DB_CONNECT_TIMEOUT     seconds (default 5)
+    DJANGO_DB_STATEMENT_TIMEOUT   milliseconds, 0 for none (default none)
+    DJANGO_DB_IDLE_IN_TRANSACTION_TIMEOUT
+                                  milliseconds (default 60000)
+    DJANGO_SQLITE_JOURNAL_MODE    default "WAL"
+    DJANGO_SQLITE_BUSY_TIMEOUT    seconds (default 20)
+    DJANGO_WORKER_PROCESSES       web worker processes (set by gunicorn.conf.py;
+                                  unset outside the web server)
+    DJANGO_WORKER_THREADS         threads per worker, if threaded (likewise)
+"""
+import os
+
+import dj_database_url
+
+# Pool size of processes other than the web workers: they run one thread
+COMMAND_POOL_MAX_SIZE = 2
+
+
+def env_int(name, default):
+    value = os.getenv(name)
+    return int(value) if value not in (None, '') else default
+
+
+def pool_available():
+    try:
+        import psycopg  # noqa: F401
+        import psycopg_pool  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def pool_sizes(workers, threads, max_connections, min_size=1):
+    """
+    ``(min_size, max_size)`` of one worker's pool: an equal share of
+    ``max_connections``, no more than ``threads`` when the worker has a
+    fixed number of threads (0 for an event loop, whose concurrency is not
+    bounded by threads).
+    """
+    max_size = max(1, max_connections // max(1, workers))
+    if threads:
+        max_size = min(max_size, threads)
+    return min(min_size, max_size), max_size
+
+
+def postgresql_options(pooled):
+    options = {'connect_timeout': env_int('DJANGO_DB_CONNECT_TIMEOUT', 5)}
+    server_settings = [
+        f"-c idle_in_transaction_session_timeout={env_int('DJANGO_DB_IDLE_IN_TRANSACTION_TIMEOUT', 60000)}",
+    ]
+    statement_timeout = env_int('DJANGO_DB_STATEMENT_TIMEOUT', 0)
+    if statement_timeout:
+        server_settings.append(f'-c statement_timeout={statement_timeout}')
+    options['options'] = ' '.join(server_settings)
+    if pooled:
+        if os.getenv('DJANGO_WORKER_PROCESSES'):
+            min_size, max_size = pool_sizes(
+                env_int('DJANGO_WORKER_PROCESSES', 1),
+                env_int('DJANGO_WORKER_THREADS', 0),
+                env_int('DJANGO_DB_MAX_CONNECTIONS', 20),
+                env_int('DJANGO_DB_POOL_MIN_SIZE', 1),
+            )
+        else:
+            min_size, max_size = pool_sizes(1, 0, COMMAND_POOL_MAX_SIZE)
+        options['pool'] = {
+            'min_size': min_size,
+            'max_size': max_size,
+            'timeout': env_int('DJANGO_DB_POOL_TIMEOUT', 10),
+            # Give idle connections back to the server after a burst, and
+            # replace long-lived ones now and then
+            'max_idle': 300,
+            'max_lifetime': 3600,
+        }
+    return options
+
+
+def sqlite_options():
+    journal_mode = os.getenv('DJANGO_SQLITE_JOURNAL_MODE', 'WAL')
+    return {
+        'timeout': env_int('DJANGO_SQLITE_BUSY_TIMEOUT', 20),
+        'transaction_mode': 'IMMEDIATE',
+        # WAL is a property of the file; NORMAL sync is safe with it
+        'init_command': f'PRAGMA journal_mode={journal_mode}; PRAGMA synchronous=NORMAL',
+    }
+
+
+def database_config(default):
+    """``DATABASES['default']`` from ``DATABASE_URL`` (or ``default``) and the environment above."""
+    config = dj_database_url.config(default=default, conn_health_checks=True)
+    engine = config['ENGINE']
+    options = config.setdefault('OPTIONS', {})
+    pooled = False
+    if engine == 'django.db.backends.postgresql':
+        pooled = os.getenv('DJANGO_DB_POOL', 'true').lower() != 'false' and pool_available()
+        options.update(postgresql_options(pooled))
+    elif engine == 'django.db.backends.sqlite3':
+        options.update(sqlite_options())
+    # A pool hands connections back at the end of each request itself
+    config['CONN_MAX_AGE'] = 0 if pooled else env_int('DJANGO_DB_CONN_MAX_AGE', 600)
+    return config
@@ -4,7 +4,6 @@ Django settings for blogapp_api project.
 
 import os
 from pathlib import Path
-import dj_database_url
 
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -33,7 +32,11 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    # WhiteNoise, usable in the async middleware chain under ASGI
+    'blogapp.middleware.StaticFilesMiddleware',
+    'blogapp.middleware.RequestMetricsMiddleware',
+    # Compresses API responses; above everything that sets or reads the body
+    'blogapp.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -64,18 +67,93 @@ TEMPLATES = [
 WSGI_APPLICATION = 'blogapp_api.wsgi.application'
 
 # Database
-import dj_database_url
+from blogapp_api.database import database_config
 
 # Database configuration
 # Use DATABASE_URL from environment if available (Render provides this)
-# Otherwise fall back to SQLite for local development
+# Otherwise fall back to SQLite for local development. Connection pooling,
+# health checks, timeouts and SQLite's WAL mode come from blogapp_api.database.
 DATABASES = {
-    'default': dj_database_url.config(
-        default=f'sqlite:///{os.path.join(BASE_DIR, "db.sqlite3")}',
-        conn_max_age=600
-    )
+    'default': database_config(f'sqlite:///{os.path.join(BASE_DIR, "db.sqlite3")}'),
 }
 
+# Django REST framework
+REST_FRAMEWORK = {
+    # Used by the keyset pagination on the post list (?page_size= can override up to 100)
+    'PAGE_SIZE': 20,
+    # Contact form limits per client IP and per email address (blogapp.throttling);
+    # "none" disables one
+    'DEFAULT_THROTTLE_RATES': {
+        'contact_ip': os.getenv('CONTACT_THROTTLE_IP', '5/min'),
+        'contact_email': os.getenv('CONTACT_THROTTLE_EMAIL', '3/hour'),
+    },
+    # Render's proxy appends the client address to X-Forwarded-For; trust only that entry
+    'NUM_PROXIES': int(os.getenv('DJANGO_NUM_PROXIES', 1)),
+}
+
+# "memory": token buckets per worker process; "cache": sliding windows in the
+# default cache, shared by all workers when that cache is (Redis, memcached)
+THROTTLE_BACKEND = os.getenv('DJANGO_THROTTLE_BACKEND', 'memory')
+
+# PAGE_SIZE is only consumed by views that set pagination_class explicitly
+SILENCED_SYSTEM_CHECKS = ['rest_framework.W001']
+
+# Cache
+# Local memory by default; point DJANGO_CACHE_BACKEND/DJANGO_CACHE_LOCATION at a
+# shared backend (file-based, Redis, memcached) when running several workers.
+# With a per-process cache and more than one worker, the response cache, the
+# compressed-body cache and the "cache" throttles are off (blogapp.cache.shared_cache)
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('DJANGO_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('DJANGO_CACHE_LOCATION', 'blogapp'),
+    }
+}
+
+# Web worker processes serving the app; gunicorn.conf.py exports its worker count
+WORKER_PROCESSES = int(os.getenv('DJANGO_WORKER_PROCESSES', 1))
+
+# Seconds a cached post list/detail/related response lives; 0 disables the cache.
+# Entries are invalidated by a content version bump whenever a post changes.
+POSTS_CACHE_TIMEOUT = int(os.getenv('POSTS_CACHE_TIMEOUT', 300))
+
+# Serve JSON post reads from .values() rows + orjson instead of the DRF serializers
+POSTS_FAST_PATH = True
+
+# Response compression (blogapp.middleware.CompressionMiddleware): bodies
+# under COMPRESSION_MIN_SIZE bytes go out as they are. Levels per coding were
+# picked with benchmarks/bench_compression.py. Compressed bodies with a strong
+# ETag of at least COMPRESSION_CACHE_MIN_SIZE bytes are cached for
+# COMPRESSION_CACHE_TIMEOUT seconds (0 turns that off).
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_LEVELS = {'br': 4, 'zstd': 3, 'gzip': 6}
+COMPRESSION_CACHE_TIMEOUT = 300
+COMPRESSION_CACHE_MIN_SIZE = 8192
+
+# scheme://host the API is served on. When set, post detail/related responses
+# are rendered (and compressed) on write and served from PostDocument for
+# requests to this origin (see blogapp.documents)
+SITE_URL = os.getenv('DJANGO_SITE_URL', '')
+
+# Serve post list/detail/related reads from native async views. Opt-in, and
+# only worth it under an ASGI server (GUNICORN_INTERFACE=asgi): gthread
+# workers on the WSGI app serve ordinary clients faster
+ASYNC_POST_VIEWS = os.getenv('DJANGO_ASYNC_POST_VIEWS', 'False').lower() == 'true'
+
+# Request metrics (Server-Timing header, /api/_metrics): the fraction of
+# requests measured and how many recent samples the quantiles are taken over
+METRICS_SAMPLE_RATE = float(os.getenv('METRICS_SAMPLE_RATE', 0.1))
+METRICS_WINDOW = 1024
+
+# Post exports stop this many seconds before they start, so posts whose save
+# has not committed yet land in the next delta instead of being skipped
+EXPORT_UNTIL_LAG_SECONDS = 30
+
+# Related posts: how many are precomputed per post, and the publication gap
+# (in days) after which tag similarity counts half as much
+RELATED_POSTS_LIMIT = 3
+RELATED_POSTS_HALF_LIFE_DAYS = 180
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -114,6 +192,26 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedStaticFilesStorage'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Browser/CDN lifetime for uploaded media (image variants, named after their
+# content, are always served as immutable)
+MEDIA_CACHE_MAX_AGE = 3600
+# Hand media transfers to the front-end server when one is in place:
+# nginx internal location prefix for X-Accel-Redirect, or Apache/lighttpd X-Sendfile
+MEDIA_ACCEL_REDIRECT_PREFIX = os.getenv('MEDIA_ACCEL_REDIRECT_PREFIX') or None
+MEDIA_X_SENDFILE = os.getenv('MEDIA_X_SENDFILE', 'False').lower() == 'true'
+
+# Cover image variants (see blogapp/images.py). Queued for the outbox worker
+# (`python manage.py drain_outbox --loop`), which builds up to
+# IMAGE_VARIANTS_BATCH_SIZE per round and retries a failed build up to
+# IMAGE_VARIANTS_MAX_ATTEMPTS times. The worker reads the uploads, so only
+# turn this on where it shares media storage with the web service; off,
+# variants are built in the request
+IMAGE_VARIANT_WIDTHS = [320, 640, 1024, 1600]
+IMAGE_VARIANT_FORMATS = ['avif', 'webp']
+IMAGE_VARIANTS_ASYNC = os.getenv('IMAGE_VARIANTS_ASYNC', 'True').lower() == 'true'
+IMAGE_VARIANTS_BATCH_SIZE = 10
+IMAGE_VARIANTS_MAX_ATTEMPTS = 5
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -148,3 +246,11 @@ if not DEBUG:
         EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
 
 DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'noreply@blog-aftab.netlify.app')
+
+# Email outbox (drained by `python manage.py drain_outbox`, which also builds image variants)
+OUTBOX_BATCH_SIZE = 50
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_BASE_SECONDS = 30  # doubles on every failed attempt
+OUTBOX_RETRY_MAX_SECONDS = 3600
+OUTBOX_LEASE_SECONDS = 300  # how long a claimed batch is hidden from other workers
+OUTBOX_DEDUPE_WINDOW_SECONDS = 600  # identical messages within this long are mailed once
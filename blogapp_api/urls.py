@@ -17,35 +17,36 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include, re_path
 from rest_framework.routers import DefaultRouter
-from blogapp.views import PostViewSet, ContactViewSet
+from blogapp.views import PostViewSet, TagViewSet, ContactViewSet, MetricsView
 from django.conf import settings
 from django.conf.urls.static import static
-from django.views.static import serve
+from blogapp.media import serve_media
+from blogapp.async_views import async_post_urls
+from blogapp.documents import document_post_urls
 
 router = DefaultRouter()
 router.register(r'posts', PostViewSet)
+router.register(r'tags', TagViewSet)
 router.register(r'contact', ContactViewSet)
 
+api_urls = router.urls
+if settings.ASYNC_POST_VIEWS:
+    # Native async post reads under ASGI (see blogapp.async_views)
+    api_urls = async_post_urls(api_urls)
+# Plain JSON detail/related reads served from render-on-write documents
+# when SITE_URL is set (see blogapp.documents)
+api_urls = document_post_urls(api_urls)
+
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('api/', include(router.urls)),
+    path('api/_metrics', MetricsView.as_view(), name='metrics'),
+    path('api/', include(api_urls)),
     
-    # Explicitly serve media files - this helps in both development and production
-    re_path(r'^media/(?P<path>.*)$', serve, {'document_root': settings.MEDIA_ROOT}),
+    # Serve media files (with caching headers, ranges and a placeholder for
+    # missing images) in both development and production
+    re_path(r'^media/(?P<path>.*)$', serve_media),
 ]
 
-# Add a catch-all pattern for media files to serve placeholder for missing images
-def serve_placeholder(request, path):
-    # Try to serve the requested file
-    response = serve(request, path, document_root=settings.MEDIA_ROOT)
-    # If the file doesn't exist (404), serve the placeholder
-    if response.status_code == 404:
-        return serve(request, 'placeholder.jpg', document_root=settings.BASE_DIR)
-    return response
-
-# Replace the media URL pattern with our custom handler
-urlpatterns[2] = re_path(r'^media/(?P<path>.*)$', serve_placeholder)
-
 # Add static URLs - this is the standard Django way and works in development
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
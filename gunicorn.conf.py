@@ -0,0 +1,144 @@
+"""
+Gunicorn settings for the API.
+
+Gunicorn reads this file from the working directory, so ``gunicorn`` on its
+own starts the app (``wsgi_app`` below). Worker counts are derived from the
+CPUs and memory actually available to the container (cgroup limits
+included) unless ``WEB_CONCURRENCY`` / ``GUNICORN_THREADS`` say otherwise.
+
+Environment:
+    GUNICORN_INTERFACE      "wsgi" (gthread workers, the default) or "asgi"
+                            (uvicorn workers; pair with
+                            DJANGO_ASYNC_POST_VIEWS=true). gthread serves
+                            ordinary clients faster and in less memory;
+                            see benchmarks/bench_gunicorn.py
+    WEB_CONCURRENCY         fixed number of worker processes
+    GUNICORN_THREADS        threads per gthread worker (default 4)
+    GUNICORN_WORKER_MEMORY  expected RSS of one worker in MB (default 150),
+                            used to cap the worker count on small instances
+    GUNICORN_MAX_REQUESTS   recycle a worker after this many requests
+                            (default 1000, with up to 10% jitter; 0 disables)
+    GUNICORN_KEEPALIVE      seconds to hold idle keep-alive connections
+                            (default 5)
+    GUNICORN_TIMEOUT        seconds before a silent worker is restarted
+                            (default 30)
+
+The worker layout and timeout are passed on to Django's database settings
+(blogapp_api.database) as DJANGO_WORKER_PROCESSES, DJANGO_WORKER_THREADS
+and DJANGO_DB_STATEMENT_TIMEOUT, to size each worker's connection pool and
+cancel queries that outlive the request, unless those are set already.
+"""
+import gc
+import math
+import os
+
+INTERFACE = os.getenv('GUNICORN_INTERFACE', 'wsgi').lower()
+WORKER_MEMORY_MB = int(os.getenv('GUNICORN_WORKER_MEMORY', 150))
+
+
+def read_first_line(path):
+    try:
+        with open(path) as f:
+            return f.readline().strip()
+    except OSError:
+        return None
+
+
+def available_cpus():
+    """CPUs this process may use: affinity mask, capped by a cgroup CPU quota."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    # cgroup v2 "quota period", then v1
+    quota = read_first_line('/sys/fs/cgroup/cpu.max')
+    if quota and not quota.startswith('max'):
+        limit, period = quota.split()
+        cpus = min(cpus, math.ceil(int(limit) / int(period)))
+    else:
+        limit = read_first_line('/sys/fs/cgroup/cpu/cpu.cfs_quota_us')
+        period = read_first_line('/sys/fs/cgroup/cpu/cpu.cfs_period_us')
+        if limit and period and int(limit) > 0:
+            cpus = min(cpus, math.ceil(int(limit) / int(period)))
+    return max(1, cpus)
+
+
+def available_memory_mb():
+    """Memory this process may use: the cgroup limit, or physical memory."""
+    total = os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    for path in ('/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory/memory.limit_in_bytes'):
+        limit = read_first_line(path)
+        if limit and limit.isdigit():
+            total = min(total, int(limit))
+            break
+    return total // (1024 * 1024)
+
+
+def default_workers(cpus, memory_mb):
+    # uvicorn workers multiplex connections on an event loop, one per core
+    # is enough; sync code needs spare processes to cover blocking I/O
+    by_cpu = cpus + 1 if INTERFACE == 'asgi' else 2 * cpus + 1
+    # Leave room for the master, which holds the preloaded app too
+    by_memory = memory_mb // WORKER_MEMORY_MB - 1
+    return max(1, min(by_cpu, by_memory))
+
+
+CPUS = available_cpus()
+MEMORY_MB = available_memory_mb()
+
+if INTERFACE == 'asgi':
+    wsgi_app = 'blogapp_api.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+else:
+    wsgi_app = 'blogapp_api.wsgi:application'
+    worker_class = 'gthread'
+    threads = int(os.getenv('GUNICORN_THREADS', 4))
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv('WEB_CONCURRENCY') or default_workers(CPUS, MEMORY_MB))
+
+# Import Django once in the master; workers share those pages copy-on-write
+preload_app = True
+
+# Recycle workers to bound memory growth; the jitter keeps them from all
+# restarting at once
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = max_requests // 10
+
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 30
+
+# Worker heartbeats go to a tmpfs rather than a possibly slow container disk
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+# Before the app is preloaded, so the database settings see them
+os.environ.setdefault('DJANGO_WORKER_PROCESSES', str(workers))
+if INTERFACE != 'asgi':
+    os.environ.setdefault('DJANGO_WORKER_THREADS', str(threads))
+os.environ.setdefault('DJANGO_DB_STATEMENT_TIMEOUT', str(timeout * 1000))
+
+accesslog = None
+errorlog = '-'
+
+
+def when_ready(server):
+    # Move everything imported so far out of the collector's reach: a GC pass
+    # in a worker would otherwise write to (and so copy) the shared pages
+    gc.freeze()
+    server.log.info(
+        "%s: %d workers%s (%d CPUs, %d MB available), max_requests %d (+0-%d), keepalive %ds",
+        worker_class, workers, f" x {threads} threads" if INTERFACE != 'asgi' else '',
+        CPUS, MEMORY_MB, max_requests, max_requests_jitter, keepalive,
+    )
+
+
+def pre_fork(server, worker):
+    # Never hand a database connection (or a pool and its threads) opened
+    # while preloading to a worker
+    from django.db import connections
+    connections.close_all()
+    for connection in connections.all(initialized_only=True):
+        if hasattr(connection, 'close_pool'):
+            connection.close_pool()